@@ -0,0 +1,255 @@
+import ctypes
+import ctypes.util
+import time
+
+# Constants
+BACKENDS = ("pynput", "xtest", "recording")
+DEFAULT_BACKEND = "pynput"
+X11_BUTTONS = {'left': 1, 'middle': 2, 'right': 3}
+X11_SCROLL_BUTTONS = (4, 5, 6, 7)  # up, down, left, right, one click per scroll step
+X11_KEYSYM_NAMES = {'enter': 'Return', 'esc': 'Escape', 'space': 'space', 'tab': 'Tab',
+                    'backspace': 'BackSpace', 'shift': 'Shift_L', 'ctrl': 'Control_L',
+                    'alt': 'Alt_L'}
+
+# Keys are single characters or pynput Key names such as 'enter' and 'esc',
+# buttons are 'left', 'middle' or 'right', positions are (x, y) tuples
+# in screen pixels and scrolls are (dx, dy) steps, positive dy scrolling up.
+
+
+class PynputBackend:
+    """Injects input through pynput's mouse and keyboard controllers"""
+
+    name = "pynput"
+
+    def __init__(self):
+        from pynput import mouse, keyboard
+        self._mouse = mouse.Controller()
+        self._keyboard = keyboard.Controller()
+        self._buttons = mouse.Button
+        self._special_keys = keyboard.Key
+
+    def position(self):
+        return self._mouse.position
+
+    def move_to(self, position):
+        self._mouse.position = position
+
+    def click(self):
+        self._mouse.click(self._buttons.left)
+
+    def mouse_press(self, button):
+        self._mouse.press(self._buttons[button])
+
+    def mouse_release(self, button):
+        self._mouse.release(self._buttons[button])
+
+    def scroll(self, dx, dy):
+        self._mouse.scroll(dx, dy)
+
+    def press(self, key):
+        self._keyboard.press(self._key(key))
+
+    def release(self, key):
+        self._keyboard.release(self._key(key))
+
+    def type(self, text):
+        self._keyboard.type(text)
+
+    def close(self):
+        pass
+
+    def _key(self, key):
+        return key if len(key) == 1 else self._special_keys[key]
+
+
+class XTestBackend:
+    """Injects input with the X11 XTest extension through ctypes
+
+    Each event is a single library call on an already open display, with
+    keycodes looked up once and cached, so there is no per-event Python
+    object translation like in pynput.
+    """
+
+    name = "xtest"
+
+    def __init__(self, display_name=None):
+        xlib_path = ctypes.util.find_library('X11')
+        xtst_path = ctypes.util.find_library('Xtst')
+        if not xlib_path or not xtst_path:
+            raise OSError("XTest backend needs libX11 and libXtst")
+        self._xlib = ctypes.cdll.LoadLibrary(xlib_path)
+        self._xtst = ctypes.cdll.LoadLibrary(xtst_path)
+        self._xlib.XOpenDisplay.restype = ctypes.c_void_p
+        self._xlib.XDefaultRootWindow.restype = ctypes.c_ulong
+        self._xlib.XDefaultRootWindow.argtypes = [ctypes.c_void_p]
+        self._xlib.XStringToKeysym.restype = ctypes.c_ulong
+        self._xlib.XKeysymToKeycode.argtypes = [ctypes.c_void_p, ctypes.c_ulong]
+        self._xlib.XKeycodeToKeysym.restype = ctypes.c_ulong
+        self._xlib.XKeycodeToKeysym.argtypes = [ctypes.c_void_p, ctypes.c_ubyte, ctypes.c_int]
+        self._xlib.XFlush.argtypes = [ctypes.c_void_p]
+        self._xlib.XCloseDisplay.argtypes = [ctypes.c_void_p]
+        self._xlib.XQueryPointer.argtypes = [ctypes.c_void_p, ctypes.c_ulong] + \
+            [ctypes.c_void_p] * 2 + [ctypes.POINTER(ctypes.c_int)] * 4 + [ctypes.c_void_p]
+        self._xtst.XTestFakeMotionEvent.argtypes = [ctypes.c_void_p, ctypes.c_int, ctypes.c_int,
+                                                    ctypes.c_int, ctypes.c_ulong]
+        self._xtst.XTestFakeButtonEvent.argtypes = [ctypes.c_void_p, ctypes.c_uint,
+                                                    ctypes.c_int, ctypes.c_ulong]
+        self._xtst.XTestFakeKeyEvent.argtypes = [ctypes.c_void_p, ctypes.c_uint,
+                                                 ctypes.c_int, ctypes.c_ulong]
+
+        self._display = self._xlib.XOpenDisplay(display_name)
+        if not self._display:
+            raise OSError("Could not open the X display")
+        self._root = self._xlib.XDefaultRootWindow(self._display)
+        self._keycodes = {}
+        self._shift = self._keycode('shift')[0]
+
+    def position(self):
+        root_x, root_y, win_x, win_y = (ctypes.c_int() for _ in range(4))
+        window = ctypes.c_ulong()
+        mask = ctypes.c_uint()
+        self._xlib.XQueryPointer(self._display, self._root, ctypes.byref(window),
+                                 ctypes.byref(window), ctypes.byref(root_x), ctypes.byref(root_y),
+                                 ctypes.byref(win_x), ctypes.byref(win_y), ctypes.byref(mask))
+        return (root_x.value, root_y.value)
+
+    def move_to(self, position):
+        self._xtst.XTestFakeMotionEvent(self._display, -1, int(position[0]), int(position[1]), 0)
+        self._xlib.XFlush(self._display)
+
+    def click(self):
+        self._xtst.XTestFakeButtonEvent(self._display, X11_BUTTONS['left'], True, 0)
+        self._xtst.XTestFakeButtonEvent(self._display, X11_BUTTONS['left'], False, 0)
+        self._xlib.XFlush(self._display)
+
+    def mouse_press(self, button):
+        self._xtst.XTestFakeButtonEvent(self._display, X11_BUTTONS[button], True, 0)
+        self._xlib.XFlush(self._display)
+
+    def mouse_release(self, button):
+        self._xtst.XTestFakeButtonEvent(self._display, X11_BUTTONS[button], False, 0)
+        self._xlib.XFlush(self._display)
+
+    def scroll(self, dx, dy):
+        up, down, left, right = X11_SCROLL_BUTTONS
+        for button, steps in ((up if dy > 0 else down, abs(dy)), (right if dx > 0 else left, abs(dx))):
+            for _ in range(steps):
+                self._xtst.XTestFakeButtonEvent(self._display, button, True, 0)
+                self._xtst.XTestFakeButtonEvent(self._display, button, False, 0)
+        self._xlib.XFlush(self._display)
+
+    def press(self, key):
+        keycode, shifted = self._keycode(key)
+        if shifted:
+            self._xtst.XTestFakeKeyEvent(self._display, self._shift, True, 0)
+        self._xtst.XTestFakeKeyEvent(self._display, keycode, True, 0)
+        self._xlib.XFlush(self._display)
+
+    def release(self, key):
+        keycode, shifted = self._keycode(key)
+        self._xtst.XTestFakeKeyEvent(self._display, keycode, False, 0)
+        if shifted:
+            self._xtst.XTestFakeKeyEvent(self._display, self._shift, False, 0)
+        self._xlib.XFlush(self._display)
+
+    def type(self, text):
+        for char in text:
+            self.press(char)
+            self.release(char)
+
+    def close(self):
+        if self._display:
+            self._xlib.XCloseDisplay(self._display)
+            self._display = None
+
+    def _keycode(self, key):
+        """Return the keycode for a key and whether it needs Shift held"""
+        cached = self._keycodes.get(key)
+        if cached is None:
+            if len(key) == 1:
+                keysym = ord(key)  # Latin-1 keysyms equal their code points
+            else:
+                keysym = self._xlib.XStringToKeysym(X11_KEYSYM_NAMES.get(key, key).encode())
+            keycode = self._xlib.XKeysymToKeycode(self._display, keysym)
+            if not keycode:
+                raise ValueError(f"No keycode for key: {key}")
+            shifted = self._xlib.XKeycodeToKeysym(self._display, keycode, 0) != keysym
+            cached = self._keycodes[key] = (keycode, shifted)
+        return cached
+
+
+class RecordingBackend:
+    """Keeps every injected event in memory instead of sending it to the desktop
+
+    Events are (timestamp_ns, kind, value) tuples in injection order, with
+    kind one of 'move', 'click', 'mouse_press', 'mouse_release', 'scroll',
+    'press' or 'release'. clock defaults to time.perf_counter_ns and can be a
+    simulated clock's now().
+    """
+
+    name = "recording"
+
+    def __init__(self, position=(0, 0), clock=None):
+        self.clock = clock or time.perf_counter_ns
+        self.events = []
+        self._position = position
+
+    def position(self):
+        return self._position
+
+    def move_to(self, position):
+        self._position = position
+        self.events.append((self.clock(), 'move', position))
+
+    def click(self):
+        self.events.append((self.clock(), 'click', self._position))
+
+    def mouse_press(self, button):
+        self.events.append((self.clock(), 'mouse_press', button))
+
+    def mouse_release(self, button):
+        self.events.append((self.clock(), 'mouse_release', button))
+
+    def scroll(self, dx, dy):
+        self.events.append((self.clock(), 'scroll', (dx, dy)))
+
+    def press(self, key):
+        self.events.append((self.clock(), 'press', key))
+
+    def release(self, key):
+        self.events.append((self.clock(), 'release', key))
+
+    def type(self, text):
+        for char in text:
+            self.press(char)
+            self.release(char)
+
+    def close(self):
+        pass
+
+    def timestamps(self, kind):
+        """Timestamps of every recorded event of one kind"""
+        return [timestamp for timestamp, event_kind, _ in self.events if event_kind == kind]
+
+    def typed_text(self):
+        """Characters pressed, in order, with special keys shown as <name>"""
+        return ''.join(value if len(value) == 1 else f'<{value}>'
+                       for _, kind, value in self.events if kind == 'press')
+
+    def clear(self):
+        self.events = []
+
+
+def make_backend(name, target=None):
+    """Build an input backend by name
+
+    target is the X display for xtest; pynput always drives the
+    current desktop and the recording backend keeps events in memory.
+    """
+    if name == "pynput":
+        return PynputBackend()
+    if name == "xtest":
+        return XTestBackend(target)
+    if name == "recording":
+        return RecordingBackend()
+    raise ValueError(f"Unknown input backend: {name}")
@@ -0,0 +1,271 @@
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from dataclasses import replace
+
+from backends import RecordingBackend
+from commands import parse_commands
+from delays import DelayStream, make_distribution
+from engine import ClickerEngine
+from persistence import read_config
+from scheduler import Scheduler
+from settings import Settings
+from timing import MonotonicClock, SimulatedClock
+from wakeups import WakeupMeter
+
+# Constants
+BENCH_FORMAT_VERSION = 1
+DEFAULT_DURATION = 10.0  # seconds of real time per scenario
+DEFAULT_SIMULATED = 600.0  # seconds of simulated time per scenario, long enough for feed to type
+DEFAULT_SEED = 12345
+DEFAULT_TOGGLES = 200  # start/stop cycles for the latency measurement
+DEFAULT_WAKEUP_SECONDS = 10.0  # seconds idle and then active for the wakeup measurement
+TOGGLE_HOLD_MAX = 0.005  # seconds, longest run between a start and its stop
+PERCENTILES = (50, 99, 99.9)
+SCENARIOS = {
+    'click': {},
+    'circle': {'circle': True},
+    'motion': {'circle': True, 'motion_path': 'spline'},
+    'walk': {'walk': True},
+    'feed': {'feed': True},
+    'afk': {'afk': True},
+    'commands': {'commands': parse_commands('/fix@30-40+10; /sell@60-90+20')},
+    'all': {'circle': True, 'walk': True, 'feed': True, 'afk': True},
+    'cps': {'target_cps': 12.0, 'cps_variance': 2.0, 'feed': True},
+}
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * q // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def requested_delays(settings, count):
+    """Regenerate the delays a seeded run asked for, in order"""
+    distribution = make_distribution(settings.delay_distribution, settings.min_delay,
+                                     settings.max_delay, settings.delay_histogram)
+    delays = DelayStream(distribution, settings.delay_seed).start()
+    try:
+        return [delays.next() for _ in range(count)]
+    finally:
+        delays.stop()
+
+
+def click_timing(settings, clicks):
+    """Achieved rate and inter-click error against the requested delays"""
+    if len(clicks) < 2:
+        return {'clicks': len(clicks)}
+    if settings.target_cps:
+        return cps_tracking(settings, clicks)
+    requested = requested_delays(settings, len(clicks) - 1)
+    errors_us = sorted(abs((clicks[i + 1] - clicks[i]) / 1e3 - requested[i] * 1e6)
+                       for i in range(len(clicks) - 1))
+    elapsed = (clicks[-1] - clicks[0]) / 1e9
+    result = {
+        'clicks': len(clicks),
+        'achieved_cps': (len(clicks) - 1) / elapsed,
+        'requested_cps': len(requested) / sum(requested),
+        'mean_error_us': sum(errors_us) / len(errors_us),
+        'max_error_us': errors_us[-1],
+    }
+    for q in PERCENTILES:
+        result[f'p{q:g}_error_us'] = percentile(errors_us, q)
+    return result
+
+
+def cps_tracking(settings, clicks):
+    """Achieved rate against the target CPS, overall and per second"""
+    elapsed = (clicks[-1] - clicks[0]) / 1e9
+    achieved = (len(clicks) - 1) / elapsed
+    per_second = {}
+    for timestamp in clicks:
+        second = (timestamp - clicks[0]) // 1_000_000_000
+        per_second[second] = per_second.get(second, 0) + 1
+    # The last second is partial, leave it out of the spread
+    full_seconds = sorted(count for second, count in per_second.items() if second < int(elapsed))
+    return {
+        'clicks': len(clicks),
+        'achieved_cps': achieved,
+        'target_cps': settings.target_cps,
+        'tracking_error': achieved / settings.target_cps - 1,
+        'min_second_cps': full_seconds[0] if full_seconds else None,
+        'max_second_cps': full_seconds[-1] if full_seconds else None,
+    }
+
+
+def run_scenario(settings, clock, until_ns):
+    """Run the engine's tasks on one scheduler in this thread against a recording backend"""
+    with tempfile.TemporaryDirectory() as config_dir:
+        backend = RecordingBackend(position=(500, 500), clock=clock.now)
+        engine = ClickerEngine(os.path.join(config_dir, 'config.txt'), backend)
+        engine.settings.publish(settings)
+        engine.scheduler = Scheduler(clock)
+        engine.schedule_features(settings)
+        tasks = dict(engine.scheduler.tasks)
+
+        process_start = time.process_time_ns()
+        wall_start = time.perf_counter_ns()
+        engine.scheduler.run(until_ns)
+        wall_ns = time.perf_counter_ns() - wall_start
+        process_ns = time.process_time_ns() - process_start
+        engine.close()
+
+    scheduler_ns = engine.scheduler.cpu_ns
+    return backend, {
+        'wall_ms': wall_ns / 1e6,
+        'cpu_ms': {
+            'process': process_ns / 1e6,
+            'threads': {
+                'scheduler': scheduler_ns / 1e6,
+                'other': max(0, process_ns - scheduler_ns) / 1e6,
+            },
+            'features': {name: task.cpu_ns / 1e6 for name, task in tasks.items()},
+        },
+        'steps': {name: task.steps for name, task in tasks.items()},
+        'events': {kind: len(backend.timestamps(kind))
+                   for kind in ('click', 'move', 'press', 'release')},
+        'telemetry': engine.telemetry.summary(),
+    }
+
+
+def toggle_latency(settings, cycles, seed=DEFAULT_SEED):
+    """Start and stop the engine in rapid succession, timing both ends of each run
+
+    Start latency runs from start() to the scheduler loop beginning, stop
+    latency from stop() to its thread being joined. overlaps counts starts
+    that found the previous run's thread still alive afterwards.
+    """
+    rng = random.Random(seed)
+    starts_us = []
+    stops_us = []
+    overlaps = 0
+    with tempfile.TemporaryDirectory() as config_dir:
+        engine = ClickerEngine(os.path.join(config_dir, 'config.txt'),
+                               RecordingBackend(position=(500, 500)))
+        engine.settings.publish(settings)
+        previous = None
+        for _ in range(cycles):
+            engine.start()
+            if previous is not None and previous.is_alive():
+                overlaps += 1
+            previous = engine.scheduler_thread
+            time.sleep(rng.uniform(0, TOGGLE_HOLD_MAX))
+            engine.stop()
+            starts_us.append(engine.start_latency_ns / 1e3)
+            stops_us.append(engine.stop_latency_ns / 1e3)
+        engine.close()
+
+    result = {'cycles': cycles, 'overlaps': overlaps}
+    for name, values in (('start', sorted(starts_us)), ('stop', sorted(stops_us))):
+        for q in PERCENTILES:
+            result[f'{name}_p{q:g}_us'] = percentile(values, q)
+        result[f'{name}_max_us'] = values[-1] if values else None
+    return result
+
+
+def wakeup_profile(settings, seconds):
+    """Wakeups and CPU time of a real engine stopped for seconds, then clicking for seconds"""
+    with tempfile.TemporaryDirectory() as config_dir:
+        engine = ClickerEngine(os.path.join(config_dir, 'config.txt'),
+                               RecordingBackend(position=(500, 500)))
+        engine.settings.publish(settings)
+        meter = WakeupMeter().attach(engine)
+        time.sleep(seconds)
+        # Report each state before leaving it, so the start and stop themselves are left out
+        report = {'idle': meter.report()['idle']}
+        engine.start()
+        meter.enter(engine.state())
+        time.sleep(seconds)
+        report['active'] = meter.report()['active']
+        engine.stop()
+        engine.close()
+    return report
+
+
+def run_benchmarks(settings, scenarios, duration, simulated):
+    """Run each scenario in real time for timing and simulated time for CPU cost"""
+    results = {}
+    for name in scenarios:
+        scenario_settings = replace(settings, **SCENARIOS[name])
+        print(f"Benchmarking {name}...", file=sys.stderr)
+
+        clock = MonotonicClock(settings.spin_budget_us)
+        backend, realtime = run_scenario(scenario_settings, clock,
+                                         clock.now() + int(duration * 1e9))
+        realtime['timing'] = click_timing(scenario_settings, backend.timestamps('click'))
+
+        clock = SimulatedClock()
+        _, simulated_result = run_scenario(scenario_settings, clock, int(simulated * 1e9))
+        results[name] = {'realtime': realtime, 'simulated': simulated_result}
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure achieved CPS, timing error and CPU cost")
+    parser.add_argument('--config', help="read settings from this config file instead of defaults")
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS),
+                        help=f"comma separated subset of: {', '.join(SCENARIOS)}")
+    parser.add_argument('--duration', type=float, default=DEFAULT_DURATION,
+                        help="real seconds per scenario")
+    parser.add_argument('--simulated', type=float, default=DEFAULT_SIMULATED,
+                        help="simulated seconds per scenario")
+    parser.add_argument('--min-delay', type=int, help="click delay minimum in ms")
+    parser.add_argument('--max-delay', type=int, help="click delay maximum in ms")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--toggles', type=int, default=DEFAULT_TOGGLES,
+                        help="start/stop cycles for the latency measurement, 0 to skip")
+    parser.add_argument('--wakeups', type=float, default=DEFAULT_WAKEUP_SECONDS, metavar='SECONDS',
+                        help="seconds idle and then clicking for the wakeup measurement, 0 to skip")
+    parser.add_argument('--output', help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    config = read_config(args.config) if args.config else {}
+    if args.min_delay is not None:
+        config['min_delay'] = str(args.min_delay)
+    if args.max_delay is not None:
+        config['max_delay'] = str(args.max_delay)
+    config['delay_seed'] = str(args.seed)
+    settings = Settings.from_config(config)
+    scenarios = [name for name in args.scenarios.split(',') if name]
+    for name in scenarios:
+        if name not in SCENARIOS:
+            parser.error(f"unknown scenario: {name}")
+
+    report = {
+        'version': BENCH_FORMAT_VERSION,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'duration_s': args.duration,
+        'simulated_s': args.simulated,
+        'settings': settings.to_config(),
+    }
+    # Engine diagnostics go to stderr so stdout stays valid JSON
+    with contextlib.redirect_stdout(sys.stderr):
+        report['scenarios'] = run_benchmarks(settings, scenarios, args.duration, args.simulated)
+        if args.toggles > 0:
+            print("Benchmarking start/stop latency...", file=sys.stderr)
+            toggle_settings = replace(settings, **SCENARIOS['all'])
+            report['toggle'] = toggle_latency(toggle_settings, args.toggles, args.seed)
+        if args.wakeups > 0:
+            print("Measuring idle and active wakeups...", file=sys.stderr)
+            report['wakeups'] = wakeup_profile(settings, args.wakeups)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+import collections
+
+# Constants
+CPS_TOLERANCE = 0.02  # the long-run rate is held within 2% of the target
+CORRECTION_HORIZON = 1.0  # seconds over which a click deficit is paid back
+MAX_CORRECTION = 0.25  # an interval moves at most 25% away from its draw
+MAX_DEFICIT = 2.0  # seconds' worth of clicks made up at most, anything beyond is forgiven
+RATE_SAMPLES = 32  # recent clicks behind the live rate
+
+
+class CadenceController:
+    """Click intervals that hold a target clicks per second on average
+
+    Each interval is drawn around 1/target_cps, spread so the rate varies
+    by about +-variance while the mean interval stays exact. The
+    controller counts the clicks actually delivered against the target
+    and shortens or stretches upcoming intervals, by at most
+    MAX_CORRECTION, to pay back the difference over CORRECTION_HORIZON.
+    Clicks lost to chat typing, stalls or slow injection are made up, but
+    more than MAX_DEFICIT seconds' worth is forgiven rather than paid back
+    in a burst. Forgiven clicks only leave the correction; tracking_error()
+    is always measured against every click since the first, and forgiven
+    counts the clicks given up.
+
+    Timer slack is the clock's business, see MonotonicClock.calibrate().
+    """
+
+    def __init__(self, target_cps, variance, rng):
+        self.target_cps = target_cps
+        self.spread = min(variance / target_cps, 0.9)
+        self.rng = rng
+        self.clicks = 0
+        self.started_ns = None
+        self.forgiven = 0.0  # clicks behind the target that will not be made up
+        self.inject_ns = 0
+        self.recent = collections.deque(maxlen=RATE_SAMPLES)
+
+    def next_interval(self, clicked_ns, inject_ns):
+        """Record the click sent at clicked_ns and return the delay until the next in seconds"""
+        if self.started_ns is None:
+            self.started_ns = clicked_ns
+        self.clicks += 1
+        self.recent.append(clicked_ns)
+        self.inject_ns += (inject_ns - self.inject_ns) / 8
+
+        # Clicks behind the target still to be made up, the first click is at time zero
+        elapsed = (clicked_ns - self.started_ns) / 1e9
+        deficit = self.target_cps * elapsed + 1 - self.clicks - self.forgiven
+        limit = self.target_cps * MAX_DEFICIT
+        if abs(deficit) > limit:
+            # Forgive the excess so it is not paid back later in a burst
+            excess = deficit - limit if deficit > 0 else deficit + limit
+            self.forgiven += excess
+            deficit -= excess
+        correction = deficit / (self.target_cps * CORRECTION_HORIZON)
+        correction = max(-MAX_CORRECTION, min(MAX_CORRECTION, correction))
+
+        interval = (1 + self.rng.uniform(-self.spread, self.spread)) / self.target_cps
+        return max(interval * (1 - correction), self.inject_ns / 1e9)
+
+    def realized_cps(self):
+        """Rate over the last RATE_SAMPLES clicks, None until there are two"""
+        if len(self.recent) < 2 or self.recent[-1] == self.recent[0]:
+            return None
+        return (len(self.recent) - 1) * 1e9 / (self.recent[-1] - self.recent[0])
+
+    def tracking_error(self):
+        """Relative difference between delivered and target clicks since the first click"""
+        if self.started_ns is None or self.clicks < 2:
+            return None
+        expected = self.target_cps * (self.recent[-1] - self.started_ns) / 1e9 + 1
+        return self.clicks / expected - 1
+
+    def tracking(self):
+        """(realized_cps, target_cps, error, forgiven clicks) for display, None before two clicks"""
+        realized = self.realized_cps()
+        error = self.tracking_error()
+        if realized is None or error is None:
+            return None
+        return realized, self.target_cps, error, self.forgiven
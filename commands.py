@@ -0,0 +1,111 @@
+import heapq
+import itertools
+import random
+from dataclasses import dataclass
+
+# Constants
+COMMAND_SEPARATOR = ';'
+
+
+@dataclass(frozen=True)
+class ChatCommand:
+    """A chat command sent every interval_min to interval_max seconds
+
+    An interval of 0 sends it once. first_delay is the wait after
+    clicking starts, and commands due together go in priority order,
+    lowest first.
+    """
+
+    text: str
+    interval_min: float = 0.0
+    interval_max: float = 0.0
+    first_delay: float = 0.0
+    priority: int = 0
+
+    @property
+    def repeats(self):
+        return self.interval_max > 0
+
+
+FEED_COMMAND = ChatCommand("/feed", 61, 70, first_delay=30)
+AFK_COMMAND = ChatCommand("/afk", first_delay=5)
+
+
+def _parse_range(text):
+    low, _, high = text.partition('-')
+    low = float(low)
+    high = float(high) if high else low
+    if low < 0 or high < low:
+        raise ValueError(f"'{text}' is not a valid interval")
+    return low, high
+
+
+def parse_commands(text):
+    """Parse 'TEXT@INTERVAL[+FIRST]' specs separated by ';'
+
+    INTERVAL is seconds or MIN-MAX seconds, 0 sends once, and FIRST is
+    the delay before the first send, e.g. '/fix@300-360+60; /sell@0+10'.
+    Commands get priorities in the order they are listed.
+    """
+    commands = []
+    for priority, spec in enumerate(part.strip() for part in text.split(COMMAND_SEPARATOR)):
+        if not spec:
+            continue
+        chat, at, timing = spec.rpartition('@')
+        if not at or not chat.strip():
+            raise ValueError(f"'{spec}' should look like /command@interval[+first]")
+        interval, _, first = timing.partition('+')
+        try:
+            interval_min, interval_max = _parse_range(interval)
+            first_delay = float(first) if first else interval_min
+        except ValueError:
+            raise ValueError(f"'{spec}' has an invalid interval or first delay")
+        commands.append(ChatCommand(chat.strip(), interval_min, interval_max, first_delay,
+                                    priority + 1))
+    return tuple(commands)
+
+
+def format_commands(commands):
+    """Render commands back into the parse_commands format"""
+    specs = []
+    for command in commands:
+        interval = f"{command.interval_min:g}"
+        if command.interval_max != command.interval_min:
+            interval += f"-{command.interval_max:g}"
+        specs.append(f"{command.text}@{interval}+{command.first_delay:g}")
+    return f"{COMMAND_SEPARATOR} ".join(specs)
+
+
+class CommandQueue:
+    """Due times of every chat command in one heap ordered by (due, priority)"""
+
+    def __init__(self, rng=None):
+        self.rng = rng or random.Random()
+        self._heap = []
+        self._sequence = itertools.count()
+
+    def __len__(self):
+        return len(self._heap)
+
+    def schedule(self, command, due_ns):
+        heapq.heappush(self._heap, (due_ns, command.priority, next(self._sequence), command))
+
+    def schedule_next(self, command, now_ns):
+        """Put a repeating command back in the queue for its next send"""
+        if command.repeats:
+            interval = self.rng.uniform(command.interval_min, command.interval_max)
+            self.schedule(command, now_ns + int(interval * 1e9))
+
+    def peek(self):
+        """(due_ns, command) of the next command, or None when empty"""
+        if not self._heap:
+            return None
+        due, _, _, command = self._heap[0]
+        return due, command
+
+    def pop(self):
+        return heapq.heappop(self._heap)[3]
+
+    def due_times(self):
+        """Pending due time of each command"""
+        return {command: due for due, _, _, command in self._heap}
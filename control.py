@@ -0,0 +1,425 @@
+import errno
+import hmac
+import json
+import os
+import secrets
+import selectors
+import socket
+import stat
+import threading
+
+from eventlog import LOG, format_metrics
+from metrics import CURRENT_DELAY
+from settings import SettingsError
+
+# Constants
+CONTROL_SOCKET_NAME = 'control.sock'
+CONTROL_TCP_HOST = '127.0.0.1'
+CONTROL_TCP_PORT = 47615  # used where Unix sockets are unavailable
+CONTROL_TOKEN_NAME = 'control.token'  # holds the per-run token the TCP fallback requires
+METRICS_HOST = '127.0.0.1'
+DISPATCH_TIMEOUT = 2.0  # seconds to wait for the engine to run a command
+MAX_LINE_BYTES = 1 << 20  # a connection sending a longer request is dropped
+READ_SIZE = 65536
+
+
+class ControlError(Exception):
+    """A request the control server cannot carry out"""
+
+
+def control_path(config_path):
+    """Socket path next to the config file"""
+    return os.path.join(os.path.dirname(os.path.abspath(config_path)), CONTROL_SOCKET_NAME)
+
+
+def start_control(engine, config_path, control=None, metrics_port=None):
+    """Start a ControlServer for the command line options, or return None if both are off"""
+    if control is None and metrics_port is None:
+        return None
+    path = None if control is None else control or control_path(config_path)
+    return ControlServer(engine, path, metrics_port).start()
+
+
+def _config_value(value):
+    """Render a JSON value the way config.txt stores it"""
+    if isinstance(value, bool):
+        return str(value).lower()
+    return str(value)
+
+
+class ControlServer:
+    """Local control API speaking JSON lines over a Unix socket
+
+    Every request is one JSON object per line, answered by one line in
+    the same order, so clients can pipeline as many requests as they like
+    on a connection without waiting:
+
+        {"id": 1, "cmd": "toggle"}
+        {"id": 1, "ok": true, "result": "running"}
+
+    Commands are ping, start, stop, toggle, pause, profile {name},
+    profiles, set {settings: {key: value}}, stats {sessions: [names] or
+    true}, sessions, add_session {name, target, backend, settings},
+    remove_session {name}. start, stop, toggle and set take an optional
+    session name. Engine commands run through engine.dispatch, the same
+    path the hotkey takes, and settings go through the config.txt
+    validation.
+
+    The Unix socket is made accessible to the current user only before
+    it starts listening. Where there are no Unix sockets the server
+    listens on localhost TCP, which any local user could reach, so every
+    request there must carry a "token" field matching the one written
+    for this run to control.token next to the socket path. On POSIX that
+    file is mode 0600; Windows ignores the mode, so there it is only as
+    private as the folder it is written to and inherits that folder's
+    ACL, so keep the config in a folder other users cannot read.
+
+    With metrics_port set, the same thread also answers plain HTTP GET
+    /metrics on localhost with the counters in the Prometheus text
+    format; a path of None serves only that. One thread serves every
+    connection and blocks in select with no timeout while idle.
+    """
+
+    def __init__(self, engine, path, metrics_port=None):
+        self.engine = engine
+        self.path = path
+        self.metrics_port = metrics_port
+        self.address = None
+        self.token = None
+        self.token_path = None
+        self.sessions = None
+        self._selector = None
+        self._listener = None
+        self._metrics_listener = None
+        self._wake_read, self._wake_write = socket.socketpair()
+        self._stopping = False
+        self._thread = None
+        self.commands = {
+            'ping': lambda request: "pong",
+            'start': self._start,
+            'stop': self._stop,
+            'toggle': self._toggle,
+            'pause': self._pause,
+            'profile': self._profile,
+            'profiles': lambda request: {'names': self.engine.profiles.names(),
+                                         'active': self.engine.active_profile},
+            'set': self._set,
+            'stats': self._stats,
+            'metrics': lambda request: self.metrics_text(),
+            'sessions': lambda request: list(self.sessions.sessions) if self.sessions else [],
+            'add_session': self._add_session,
+            'remove_session': self._remove_session,
+        }
+
+    def start(self):
+        """Bind the sockets and start serving on a background thread"""
+        self._selector = selectors.DefaultSelector()
+        if self.path is not None:
+            self._bind_control()
+        if self.metrics_port is not None:
+            self._metrics_listener = socket.create_server((METRICS_HOST, self.metrics_port))
+            self._metrics_listener.setblocking(False)
+            self._selector.register(self._metrics_listener, selectors.EVENT_READ, None)
+            LOG.info('metrics_listening', f"Metrics on http://{METRICS_HOST}:{self.metrics_port}/metrics",
+                     port=self.metrics_port)
+        self._selector.register(self._wake_read, selectors.EVENT_READ, None)
+        self._thread = threading.Thread(target=self._serve)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def _bind_control(self):
+        if hasattr(socket, 'AF_UNIX'):
+            if os.path.lexists(self.path):
+                self._remove_stale_socket()
+            self._listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._listener.bind(self.path)
+            # Connections are refused until listen(), so nobody else gets in before this
+            os.chmod(self.path, 0o600)
+            self.address = self.path
+        else:
+            self._listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self._listener.bind((CONTROL_TCP_HOST, CONTROL_TCP_PORT))
+            self._write_token()
+            self.address = f"{CONTROL_TCP_HOST}:{CONTROL_TCP_PORT}"
+        self._listener.listen()
+        self._listener.setblocking(False)
+        self._selector.register(self._listener, selectors.EVENT_READ, None)
+        LOG.info('control_listening', f"Control API listening on {self.address}", address=self.address)
+
+    def _remove_stale_socket(self):
+        """Remove a socket left behind by a run that did not exit cleanly
+
+        Raises FileExistsError when the path is not a socket or another
+        instance is still serving on it.
+        """
+        if not stat.S_ISSOCK(os.lstat(self.path).st_mode):
+            raise FileExistsError(errno.EEXIST, "Control path exists and is not a socket", self.path)
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.path)
+        except ConnectionRefusedError:
+            os.remove(self.path)  # Nobody is listening
+            return
+        finally:
+            probe.close()
+        raise FileExistsError(errno.EEXIST, "Another instance is serving the control API", self.path)
+
+    def _write_token(self):
+        """Write a fresh token for this run, user-only on POSIX, see the class docstring"""
+        self.token = secrets.token_hex(16)
+        self.token_path = os.path.join(os.path.dirname(os.path.abspath(self.path)), CONTROL_TOKEN_NAME)
+        if os.path.exists(self.token_path):
+            os.remove(self.token_path)  # Recreate rather than reuse another file's permissions
+        fd = os.open(self.token_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            f.write(self.token)
+
+    def close(self):
+        """Stop serving, drop every connection and remove the socket and token files"""
+        self._stopping = True
+        self._wake_write.send(b'\0')
+        if self._thread:
+            self._thread.join()
+        self._wake_write.close()
+        if self.sessions:
+            self.sessions.close()
+        if self._listener and self._listener.family == getattr(socket, 'AF_UNIX', None):
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+        if self.token_path:
+            try:
+                os.remove(self.token_path)
+            except OSError:
+                pass
+
+    def _serve(self):
+        try:
+            while not self._stopping:
+                for key, events in self._selector.select():
+                    if key.fileobj is self._listener:
+                        self._accept(self._listener)
+                    elif key.fileobj is self._metrics_listener:
+                        self._accept(self._metrics_listener, http=True)
+                    elif key.fileobj is self._wake_read:
+                        self._wake_read.recv(64)
+                    else:
+                        self._service(key.fileobj, key.data, events)
+        finally:
+            for key in list(self._selector.get_map().values()):
+                key.fileobj.close()
+            self._selector.close()
+
+    def _accept(self, listener, http=False):
+        try:
+            connection, _ = listener.accept()
+        except BlockingIOError:
+            return
+        connection.setblocking(False)
+        self._selector.register(connection, selectors.EVENT_READ,
+                                {'inbox': bytearray(), 'outbox': bytearray(), 'http': http,
+                                 'closing': False})
+
+    def _service(self, connection, buffers, events):
+        if events & selectors.EVENT_READ:
+            try:
+                data = connection.recv(READ_SIZE)
+            except (BlockingIOError, InterruptedError):
+                data = None
+            except OSError:
+                data = b''
+            if data == b'':
+                self._drop(connection)
+                return
+            if data and buffers['http']:
+                buffers['inbox'] += data
+                self._answer_http(buffers)
+            elif data:
+                inbox = buffers['inbox']
+                inbox += data
+                # Answer every complete line that arrived, in order, with one send
+                end = inbox.rfind(b'\n')
+                if end >= 0:
+                    for line in bytes(inbox[:end]).split(b'\n'):
+                        if line.strip():
+                            buffers['outbox'] += self.handle_line(line) + b'\n'
+                    del inbox[:end + 1]
+                elif len(inbox) > MAX_LINE_BYTES:
+                    self._drop(connection)
+                    return
+        outbox = buffers['outbox']
+        if outbox:
+            try:
+                sent = connection.send(outbox)
+                del outbox[:sent]
+            except (BlockingIOError, InterruptedError):
+                pass
+            except OSError:
+                self._drop(connection)
+                return
+        if buffers['closing'] and not outbox:
+            self._drop(connection)
+            return
+        wanted = selectors.EVENT_READ | (selectors.EVENT_WRITE if outbox else 0)
+        self._selector.modify(connection, wanted, buffers)
+
+    def _drop(self, connection):
+        self._selector.unregister(connection)
+        connection.close()
+
+    def _answer_http(self, buffers):
+        """Queue the reply to a complete HTTP request and close after sending it"""
+        inbox = buffers['inbox']
+        if b'\r\n\r\n' not in inbox and b'\n\n' not in inbox:
+            if len(inbox) > MAX_LINE_BYTES:
+                buffers['closing'] = True
+            return
+        request_line = bytes(inbox).split(b'\n', 1)[0].split()
+        inbox.clear()
+        if len(request_line) >= 2 and request_line[0] == b'GET' and request_line[1].startswith(b'/metrics'):
+            status, body = "200 OK", self.metrics_text().encode()
+        else:
+            status, body = "404 Not Found", b"Not found\n"
+        buffers['outbox'] += (f"HTTP/1.0 {status}\r\n"
+                              f"Content-Type: text/plain; version=0.0.4\r\n"
+                              f"Content-Length: {len(body)}\r\n"
+                              f"Connection: close\r\n\r\n").encode() + body
+        buffers['closing'] = True
+
+    def metrics_text(self):
+        """Event log counters and engine gauges in the Prometheus text format"""
+        summary = self.engine.telemetry.summary()
+        p99 = summary.get('lateness_p99_ns')
+        active = sum(session.active for session in self.sessions.sessions.values()) if self.sessions else 0
+        gauges = (
+            ('running', "1 while the engine is clicking", self.engine.state() == "running"),
+            ('current_delay_seconds', "Last click delay handed to the scheduler",
+             self.engine.metrics.values[CURRENT_DELAY]),
+            ('click_lateness_p99_seconds', "99th percentile click lateness this run",
+             p99 / 1e9 if p99 is not None else None),
+            ('listener_alive', "1 while the hotkey listener is hooked in", self.engine.listener.is_alive()),
+            ('sessions_active', "Extra sessions switched on", active),
+            ('events_dropped', "Event log records dropped because the buffer was full", LOG.dropped),
+        )
+        return format_metrics(LOG.counters, gauges)
+
+    def handle_line(self, line):
+        """Answer one request line with one response line, never raising"""
+        request_id = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ControlError("request must be a JSON object")
+            request_id = request.get('id')
+            if self.token is not None and not hmac.compare_digest(str(request.get('token', '')),
+                                                                  self.token):
+                raise ControlError(f"missing or wrong token, see {self.token_path}")
+            handler = self.commands.get(request.get('cmd'))
+            if handler is None:
+                raise ControlError(f"unknown command: {request.get('cmd')}")
+            response = {'id': request_id, 'ok': True, 'result': handler(request)}
+        except SettingsError as e:
+            response = {'id': request_id, 'ok': False, 'error': str(e), 'field': e.field}
+        except (ControlError, ValueError, KeyError, TypeError) as e:
+            response = {'id': request_id, 'ok': False, 'error': str(e)}
+        except Exception as e:
+            LOG.error('control_error', f"Error in control request: {e}", error=str(e))
+            response = {'id': request_id, 'ok': False, 'error': str(e)}
+        return json.dumps(response, separators=(',', ':'), default=str).encode()
+
+    def _call(self, action):
+        """Run action through engine.dispatch and wait for its result"""
+        done = threading.Event()
+        outcome = {}
+
+        def run():
+            try:
+                outcome['result'] = action()
+            except Exception as e:
+                outcome['error'] = e
+            finally:
+                done.set()
+
+        self.engine.dispatch(run)
+        if not done.wait(DISPATCH_TIMEOUT):
+            raise ControlError("timed out waiting for the engine")
+        if 'error' in outcome:
+            raise outcome['error']
+        return outcome.get('result')
+
+    def _session(self, name):
+        if not self.sessions or name not in self.sessions.sessions:
+            raise ControlError(f"unknown session: {name}")
+        return name
+
+    def _start(self, request):
+        if 'session' in request:
+            self.sessions.start(self._session(request['session']))
+            return "running"
+        self._call(self.engine.start)
+        return self.engine.state()
+
+    def _stop(self, request):
+        if 'session' in request:
+            self.sessions.stop(self._session(request['session']))
+            return "stopped"
+        self._call(self.engine.stop)
+        return self.engine.state()
+
+    def _toggle(self, request):
+        if 'session' in request:
+            name = self._session(request['session'])
+            self.sessions.toggle(name)
+            return "running" if self.sessions.sessions[name].active else "stopped"
+        self._call(self.engine.toggle)
+        return self.engine.state()
+
+    def _pause(self, request):
+        self._call(self.engine.toggle_pause)
+        return self.engine.state()
+
+    def _profile(self, request):
+        name = request['name']
+        if not self._call(lambda: self.engine.switch_profile(name)):
+            raise ControlError(f"unknown profile: {name}")
+        return name
+
+    def _set(self, request):
+        values = request['settings']
+        if not isinstance(values, dict):
+            raise ControlError("settings must be an object of key: value")
+        values = {key: _config_value(value) for key, value in values.items()}
+        if 'session' in request:
+            runner = self.sessions.sessions[self._session(request['session'])]
+            return runner.update_settings(values).to_config()
+        return self._call(lambda: self.engine.update_settings(values)).to_config()
+
+    def _stats(self, request):
+        """Engine stats plus any sessions asked for, in one reply"""
+        stats = {'engine': self.engine.stats()}
+        wanted = request.get('sessions')
+        if wanted and self.sessions:
+            names = list(self.sessions.sessions) if wanted is True else wanted
+            stats['sessions'] = {name: self.sessions.sessions[name].stats()
+                                 for name in names if name in self.sessions.sessions}
+        return stats
+
+    def _add_session(self, request):
+        from sessions import SessionManager
+        from settings import Settings
+
+        if self.sessions is None:
+            self.sessions = SessionManager()
+            self.sessions.run_in_background()
+        values = {key: _config_value(value) for key, value in request.get('settings', {}).items()}
+        settings = Settings.from_config(values)
+        session = self.sessions.add(request['name'], settings, request.get('backend'),
+                                    request.get('target'), request.get('seed'))
+        return session.name
+
+    def _remove_session(self, request):
+        name = self._session(request['name'])
+        self.sessions.remove(name)
+        return name
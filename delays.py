@@ -0,0 +1,274 @@
+import math
+import random
+import threading
+
+np = None  # Set by load_numpy() so NumPy is only imported once delays are generated
+_numpy_checked = False
+
+# Constants
+DEFAULT_BUFFER_CAPACITY = 4096
+DEFAULT_BATCH_SIZE = 1024  # Fixed so a seed yields the same sequence however refills are timed
+DEFAULT_LOW_WATER = 1024  # Wake the refill thread when fewer delays are queued
+DEFAULT_NORMAL_SIGMAS = 3.0  # Half the delay range spans this many standard deviations
+DEFAULT_LOGNORMAL_SIGMA = 0.35
+MAX_REDRAWS = 16  # rounds of redrawing out-of-range samples before clipping them
+DISTRIBUTIONS = ("uniform", "normal", "lognormal", "empirical")
+
+
+def load_numpy():
+    """Import NumPy on first use, leaving np as None when it is not installed"""
+    global np, _numpy_checked
+    if not _numpy_checked:
+        _numpy_checked = True
+        try:
+            import numpy
+            np = numpy
+        except ImportError:  # NumPy is optional, fall back to the stdlib generator
+            pass
+    return np
+
+
+class _Sampler:
+    """Batch sampling on top of a seeded NumPy or stdlib generator"""
+
+    def __init__(self, seed):
+        self.seed = seed
+        if load_numpy() is not None:
+            self.rng = np.random.default_rng(seed)
+        else:
+            self.rng = random.Random(seed)
+
+    def uniform(self, low, high, n):
+        if np is not None:
+            return self.rng.uniform(low, high, n)
+        return [self.rng.uniform(low, high) for _ in range(n)]
+
+    def normal(self, mu, sigma, n):
+        if np is not None:
+            return self.rng.normal(mu, sigma, n)
+        return [self.rng.gauss(mu, sigma) for _ in range(n)]
+
+    def lognormal(self, mu, sigma, n):
+        if np is not None:
+            return self.rng.lognormal(mu, sigma, n)
+        return [self.rng.lognormvariate(mu, sigma) for _ in range(n)]
+
+    def weighted_index(self, cum_weights, n):
+        if np is not None:
+            return np.searchsorted(cum_weights, self.rng.random(n) * cum_weights[-1], side='right')
+        return self.rng.choices(range(len(cum_weights)), cum_weights=cum_weights, k=n)
+
+    def truncated(self, draw, low, high, n):
+        """Redraw samples falling outside [low, high], clipping what is still out after MAX_REDRAWS"""
+        if high <= low:
+            # A zero-width range has nothing to redraw into
+            return np.full(n, float(low)) if np is not None else [float(low)] * n
+        values = draw(n)
+        if np is not None:
+            bad = (values < low) | (values > high)
+            for _ in range(MAX_REDRAWS):
+                if not bad.any():
+                    break
+                values[bad] = draw(int(bad.sum()))
+                bad = (values < low) | (values > high)
+            return np.clip(values, low, high)
+        values = list(values)
+        for i, value in enumerate(values):
+            for _ in range(MAX_REDRAWS):
+                if low <= value <= high:
+                    break
+                value = draw(1)[0]
+            values[i] = min(max(value, low), high)
+        return values
+
+
+class UniformDistribution:
+    """Flat delays between min and max"""
+
+    def __init__(self, min_delay, max_delay):
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+
+    def sample(self, sampler, n):
+        return sampler.uniform(self.min_delay, self.max_delay, n)
+
+
+class TruncatedNormalDistribution:
+    """Normal delays centered in the range and cut off at its bounds"""
+
+    def __init__(self, min_delay, max_delay, sigmas=DEFAULT_NORMAL_SIGMAS):
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.mu = (min_delay + max_delay) / 2
+        self.sigma = max((max_delay - min_delay) / 2 / sigmas, 1e-9)
+
+    def sample(self, sampler, n):
+        return sampler.truncated(lambda k: sampler.normal(self.mu, self.sigma, k),
+                                 self.min_delay, self.max_delay, n)
+
+
+class LogNormalDistribution:
+    """Right-skewed delays, mostly near the fast end with an occasional slow click"""
+
+    def __init__(self, min_delay, max_delay, sigma=DEFAULT_LOGNORMAL_SIGMA):
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        median = min_delay + (max_delay - min_delay) * 0.4
+        self.mu = math.log(max(median, 1e-6))
+        self.sigma = sigma
+
+    def sample(self, sampler, n):
+        return sampler.truncated(lambda k: sampler.lognormal(self.mu, self.sigma, k),
+                                 self.min_delay, self.max_delay, n)
+
+
+class EmpiricalDistribution:
+    """Delays drawn from a histogram of (low, high, weight) bins in seconds"""
+
+    def __init__(self, bins):
+        if not bins:
+            raise ValueError("Empirical distribution needs at least one bin")
+        self.lows = [low for low, _, _ in bins]
+        self.widths = [high - low for low, high, _ in bins]
+        cum_weights = []
+        total = 0.0
+        for _, _, weight in bins:
+            total += weight
+            cum_weights.append(total)
+        if total <= 0:
+            raise ValueError("Empirical distribution weights must be positive")
+        load_numpy()
+        self.cum_weights = np.array(cum_weights) if np is not None else cum_weights
+        if np is not None:
+            self.lows = np.array(self.lows)
+            self.widths = np.array(self.widths)
+
+    @classmethod
+    def from_file(cls, path):
+        """Load a histogram file with 'delay_ms weight' or 'low_ms high_ms weight' lines"""
+        bins = []
+        with open(path, 'r') as f:
+            for line in f:
+                parts = line.split('#', 1)[0].split()
+                if len(parts) == 2:
+                    low = high = float(parts[0]) / 1000
+                    weight = float(parts[1])
+                elif len(parts) == 3:
+                    low, high = float(parts[0]) / 1000, float(parts[1]) / 1000
+                    weight = float(parts[2])
+                else:
+                    continue
+                bins.append((low, high, weight))
+        return cls(bins)
+
+    def sample(self, sampler, n):
+        index = sampler.weighted_index(self.cum_weights, n)
+        offsets = sampler.uniform(0.0, 1.0, n)
+        if np is not None:
+            return self.lows[index] + self.widths[index] * offsets
+        return [self.lows[i] + self.widths[i] * u for i, u in zip(index, offsets)]
+
+
+def make_distribution(name, min_delay, max_delay, histogram_path=None):
+    """Build a delay distribution by name, with delays in seconds"""
+    if name == "uniform":
+        return UniformDistribution(min_delay, max_delay)
+    if name == "normal":
+        return TruncatedNormalDistribution(min_delay, max_delay)
+    if name == "lognormal":
+        return LogNormalDistribution(min_delay, max_delay)
+    if name == "empirical":
+        if not histogram_path:
+            raise ValueError("Empirical distribution needs a histogram file")
+        return EmpiricalDistribution.from_file(histogram_path)
+    raise ValueError(f"Unknown delay distribution: {name}")
+
+
+def new_seed():
+    """Pick a fresh seed for a session that did not ask for one"""
+    return random.SystemRandom().randrange(2 ** 32)
+
+
+class DelayStream:
+    """Ring buffer of pre-generated delays refilled in batches off the click path
+
+    The click loop is the only consumer and the refill thread the only
+    producer, so both sides just move their own counter forward.
+    """
+
+    def __init__(self, distribution, seed=None, capacity=DEFAULT_BUFFER_CAPACITY,
+                 batch_size=DEFAULT_BATCH_SIZE, low_water=DEFAULT_LOW_WATER):
+        self.distribution = distribution
+        self.seed = new_seed() if seed is None else seed
+        self.capacity = capacity
+        self.batch_size = min(batch_size, capacity)
+        self.low_water = min(low_water, capacity - 1)
+        self.starved = 0
+        self._sampler = _Sampler(self.seed)
+        self._buffer = [0.0] * capacity
+        self._read = 0
+        self._write = 0
+        self._fill_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._running = False
+        self._thread = None
+
+    def start(self, background=True):
+        """Fill the buffer and start the background refill thread
+
+        Without background, next() refills the buffer itself when it runs
+        low, for callers that cannot afford a thread per stream.
+        """
+        self._refill()
+        self._running = True
+        if background:
+            self._thread = threading.Thread(target=self._refill_loop)
+            self._thread.daemon = True
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the refill thread and wait for it to exit"""
+        self._running = False
+        self._wake.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+
+    def next(self):
+        """Pop the next delay in seconds"""
+        if self._read == self._write:
+            # Refill thread fell behind, generate on the caller rather than block
+            self.starved += 1
+            self._refill()
+        value = self._buffer[self._read % self.capacity]
+        self._read += 1
+        if self._write - self._read < self.low_water:
+            if self._thread is None:
+                self._refill()
+            else:
+                self._wake.set()
+        return value
+
+    def _refill(self):
+        """Generate whole batches until no further batch fits"""
+        with self._fill_lock:
+            batch = self.batch_size
+            while self.capacity - (self._write - self._read) >= batch:
+                values = self.distribution.sample(self._sampler, batch)
+                if np is not None:
+                    values = values.tolist()
+                start = self._write % self.capacity
+                first = min(batch, self.capacity - start)
+                self._buffer[start:start + first] = values[:first]
+                if first < batch:
+                    self._buffer[0:batch - first] = values[first:]
+                self._write += batch
+
+    def _refill_loop(self):
+        """Background loop topping the buffer up whenever it runs low"""
+        while self._running:
+            self._wake.wait()
+            self._wake.clear()
+            if self._running:
+                self._refill()
@@ -0,0 +1,839 @@
+import contextlib
+import random
+import threading
+import time
+
+from backends import make_backend
+from timing import MonotonicClock
+from scheduler import Scheduler, PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW
+from delays import DelayStream, make_distribution
+from settings import Settings, SettingsError, SettingsStore
+from trajectory import Trajectory
+from motion import Motion
+from hotkeys import HotkeyMatcher, normalize_key, parse_hotkey, format_hotkey
+from listener import ListenerSupervisor
+from persistence import ConfigWriter, read_config, DEFAULT_CONFIG_PATH
+from startup import StartupProfile
+from eventlog import LOG, log_dir
+from commands import CommandQueue
+from metrics import (MetricsBoard, CURRENT_DELAY, CLICK_LATENESS, CLICKS_DONE, NEXT_COMMAND,
+                     COMMAND_ERROR, LISTENER_STATUS, HOTKEY_PRESSED, CPS_TRACKING)
+
+# Constants
+HOTKEY_CONFIG_KEYS = {'toggle': 'hotkey', 'pause': 'hotkey_pause', 'profile': 'hotkey_profile'}
+STOP_JOIN_TIMEOUT = 1.0  # seconds to wait for the scheduler thread to close its tasks
+
+
+class FeatureRunner:
+    """The clicking, movement, chat command and walk tasks for one input target
+
+    Tasks read settings.current, publish into metrics and telemetry and
+    inject through backend, so everything one clicker needs lives on the
+    runner. ClickerEngine is the single-target runner behind the GUI and
+    sessions.py runs many on one scheduler, telling their tasks apart by
+    task_prefix and group.
+    """
+
+    def __init__(self, backend=None, profiles=None, task_prefix='', group=None, seed=None):
+        self.backend = backend
+        self.scheduler = None
+        self.settings = SettingsStore()
+        self.metrics = MetricsBoard()
+        self.profiles = profiles
+        self._telemetry = None
+        self.task_prefix = task_prefix
+        self.group = group
+        self.rng = random.Random(seed)
+        self.walk_key = None
+        self.background_refill = True  # False refills delays on the click path, no extra thread
+        self._delays_lock = threading.Lock()
+        self._click_tasks = 0  # running click tasks, delay streams are only prepared for them
+        self._next_delays = None  # (delay_params, stream) prepared for the click task to swap in
+
+    @property
+    def telemetry(self):
+        """Click timing statistics, created on first use"""
+        if self._telemetry is None:
+            from telemetry import Telemetry
+            self._telemetry = Telemetry()
+        return self._telemetry
+
+    def schedule_features(self, settings):
+        """Add the click task and every enabled feature to self.scheduler"""
+        self._prepare_delay_stream(settings)
+        self._add_task("click", self._click_task())
+        # These sleep while they have nothing to do and are woken by settings changes
+        self._add_task("motion", self._motion_task(), PRIORITY_NORMAL, wakeable=True)
+        self._add_task("commands", self._command_task(), PRIORITY_HIGH, wakeable=True)
+        self._add_task("walk", self._walk_task(), PRIORITY_NORMAL, wakeable=True)
+
+    def _add_task(self, name, generator, priority=PRIORITY_LOW, wakeable=False):
+        self.scheduler.add(self.task_prefix + name, generator, priority=priority, group=self.group,
+                           wakeable=wakeable)
+
+    def publish_settings(self, settings):
+        """Hand running tasks a new settings snapshot, waking the ones waiting for a change"""
+        if self._click_tasks and settings.delay_params != self.settings.current.delay_params:
+            # Built before the snapshot goes out, so the click task finds it waiting
+            self._prepare_delay_stream(settings)
+        self.settings.publish(settings)
+        if self.scheduler:
+            self.scheduler.wake(self.group)
+
+    def update_settings(self, values):
+        """Apply config.txt style values over the current settings, raising SettingsError
+
+        Goes through the same validation as config.txt and the GUI.
+        """
+        config = self.settings.current.to_config()
+        for key in values:
+            if key not in config:
+                raise SettingsError(key, "unknown setting")
+        config.update(values)
+        settings = Settings.from_config(config)
+        self.publish_settings(settings)
+        return settings
+
+    def stats(self):
+        """Live counters and whole-run click timing"""
+        _, values = self.metrics.snapshot()
+        next_command = values[NEXT_COMMAND]
+        return {
+            'clicks': values[CLICKS_DONE],
+            'current_delay': values[CURRENT_DELAY],
+            'next_command': None if next_command in (None, COMMAND_ERROR) else next_command[0],
+            'cps': values[CPS_TRACKING],
+            'timing': self.telemetry.summary(),
+        }
+
+    def _create_delay_stream(self, settings):
+        """Start a delay stream from the configured distribution"""
+        distribution = self.profiles.distribution(settings) if self.profiles is not None else None
+        try:
+            if distribution is None:
+                distribution = make_distribution(settings.delay_distribution, settings.min_delay,
+                                                 settings.max_delay, settings.delay_histogram)
+        except (ValueError, OSError) as e:
+            LOG.warning('delay_distribution_invalid', f"Invalid delay distribution ({e}), using uniform",
+                        distribution=settings.delay_distribution, error=str(e))
+            distribution = make_distribution("uniform", settings.min_delay, settings.max_delay)
+        delays = DelayStream(distribution, settings.delay_seed).start(self.background_refill)
+        LOG.info('delay_stream', f"Delay stream: {settings.delay_distribution}, seed {delays.seed}",
+                 distribution=settings.delay_distribution, seed=delays.seed)
+        return delays
+
+    def _prepare_delay_stream(self, settings):
+        """Build the stream for settings on the calling thread, ready for the click task
+
+        Filling the buffer and starting the refill thread happen here
+        rather than on the click path; only the newest prepared stream is
+        kept.
+        """
+        prepared = (settings.delay_params, self._create_delay_stream(settings))
+        with self._delays_lock:
+            prepared, self._next_delays = self._next_delays, prepared
+        if prepared:
+            prepared[1].stop()
+
+    def _take_delay_stream(self, settings):
+        """The stream prepared for settings, or None when there is none to swap in"""
+        with self._delays_lock:
+            prepared, self._next_delays = self._next_delays, None
+        if prepared is None:
+            return None
+        params, delays = prepared
+        if params != settings.delay_params:
+            delays.stop()
+            return None
+        return delays
+
+    def _create_cadence(self, settings):
+        """Start the target CPS controller, or None when clicking by min/max delay"""
+        self.metrics.reset(CPS_TRACKING)
+        if not settings.target_cps:
+            return None
+        # Turned on mid-run, so no calibration burst; the clock tunes from ordinary waits
+        self.scheduler.clock.start_tuning()
+        LOG.info('cadence_started', f"Target {settings.target_cps:g} CPS",
+                 target_cps=settings.target_cps)
+        from cadence import CadenceController
+        return CadenceController(settings.target_cps, settings.cps_variance, self.rng)
+
+    def _create_trajectory(self, settings):
+        """Build the per-click movement trajectory, or None when it is off or smooth"""
+        if not settings.circle or settings.motion_path != "step":
+            return None
+        return Trajectory(self.backend.position(), settings.shape, settings.radius,
+                          settings.steps, settings.spins, settings.drift)
+
+    def _create_motion(self, settings):
+        """Build the smooth motion path, or None unless smooth movement is on"""
+        if not settings.circle or settings.motion_path == "step":
+            return None
+        return Motion(self.backend.position(), settings.shape, settings.radius, settings.steps,
+                      settings.spins, settings.drift, settings.motion_path,
+                      settings.motion_rate, settings.spin_time)
+
+    def _move_mouse(self, position):
+        """Move the cursor to an absolute position"""
+        self.backend.move_to(position)
+
+    def _click_task(self):
+        """Clicking task with optional pattern movement"""
+        settings = None
+        delays = None
+        cadence = None
+        trajectory = None
+        with self._delays_lock:
+            self._click_tasks += 1
+        try:
+            while True:
+                # Live edits arrive as a new snapshot, rebuild only what they touch
+                current = self.settings.current
+                if current is not settings:
+                    if settings is None or current.delay_params != settings.delay_params:
+                        # Prepared when the settings were published, so this only swaps streams
+                        if delays:
+                            delays.stop()
+                        delays = self._take_delay_stream(current)
+                    if settings is None or current.cadence_params != settings.cadence_params:
+                        cadence = self._create_cadence(current)
+                    if settings is None or current.movement_params != settings.movement_params:
+                        trajectory = self._create_trajectory(current)
+                    settings = current
+
+                self.metrics.set(CLICK_LATENESS, self.scheduler.lateness_ns)
+                if trajectory:
+                    trajectory.step(self._move_mouse)
+                clicked_ns = self.scheduler.clock.now()
+                inject_start = time.perf_counter_ns()
+                self.backend.click()
+                inject_ns = time.perf_counter_ns() - inject_start
+                self.telemetry.record_click(self.scheduler.due_ns, clicked_ns, inject_ns)
+                self.metrics.increment(CLICKS_DONE)
+                LOG.count('clicks_injected')
+                if cadence:
+                    delay = cadence.next_interval(clicked_ns, inject_ns)
+                    self.metrics.set(CPS_TRACKING, cadence.tracking())
+                else:
+                    if delays is None:
+                        # Lost a race with another publish, build it here instead
+                        delays = self._create_delay_stream(settings)
+                    delay = delays.next()
+                self.metrics.set(CURRENT_DELAY, delay)
+                yield delay
+        finally:
+            if delays:
+                delays.stop()
+            with self._delays_lock:
+                self._click_tasks -= 1
+                prepared = None
+                if not self._click_tasks:
+                    prepared, self._next_delays = self._next_delays, None
+            if prepared:
+                prepared[1].stop()
+
+    def _motion_task(self):
+        """Smooth movement task running at the motion rate, independent of clicks"""
+        settings = None
+        motion = None
+        started = 0
+        last_position = None
+        while True:
+            current = self.settings.current
+            if current is not settings:
+                if settings is None or current.movement_params != settings.movement_params:
+                    motion = self._create_motion(current)
+                    started = self.scheduler.clock.now()
+                settings = current
+            if motion is None:
+                yield None  # Movement is off, sleep until the settings change
+                continue
+            position = motion.position_at(self.scheduler.clock.now() - started)
+            if position != last_position:
+                self.backend.move_to(position)
+                last_position = position
+            yield motion.interval
+
+    def _command_task(self):
+        """Send every enabled chat command from one queue, holding other tasks while typing"""
+        settings = None
+        queue = CommandQueue(self.rng)
+        typed = {}
+        name = self.task_prefix + "commands"
+        while True:
+            current = self.settings.current
+            if current is not settings:
+                # Keep pending due times for commands that are still enabled
+                now = self.scheduler.clock.now()
+                due_times = queue.due_times()
+                queue = CommandQueue(self.rng)
+                for command in current.chat_commands:
+                    due = due_times.get(command)
+                    if due is None and settings is not None and command in settings.chat_commands:
+                        continue  # A one-shot command that was already sent
+                    queue.schedule(command, due or now + int(command.first_delay * 1e9))
+                settings = current
+
+            upcoming = queue.peek()
+            self.metrics.set(NEXT_COMMAND, (upcoming[1].text, upcoming[0]) if upcoming else None)
+            if upcoming is None:
+                yield None  # No commands enabled, sleep until the settings change
+                continue
+            now = self.scheduler.clock.now()
+            if upcoming[0] > now:
+                # A settings change wakes the task sooner, it is added wakeable
+                yield (upcoming[0] - now) / 1e9
+                continue
+            while self.walk_key:
+                yield 0.01  # Let a held walk key go before opening chat
+
+            command = queue.pop()
+            if command not in typed:
+                from macros import chat_timeline
+                typed[command] = chat_timeline(command.text)
+            self.scheduler.hold_others(name)
+            try:
+                yield from typed[command].play(self.backend, self.rng)
+                LOG.count('commands_sent')
+            except Exception as e:
+                LOG.error('command_error', f"Error sending {command.text}: {e}",
+                          command=command.text, error=str(e))
+                self.metrics.set(NEXT_COMMAND, COMMAND_ERROR)
+            finally:
+                self.scheduler.release_others(name)
+            queue.schedule_next(command, self.scheduler.clock.now())
+
+    def _walk_task(self):
+        """Auto walk task, sleeping while walking is off"""
+        while True:
+            settings = self.settings.current
+            if not settings.walk:
+                yield None  # Walking is off, sleep until the settings change
+                continue
+            if not (yield from self._walk_wait(self.rng.uniform(settings.walk_min, settings.walk_max))):
+                continue
+
+            keys = ['w', 's'] if self.rng.random() < 0.5 else ['a', 'd']
+            if self.rng.random() < 0.5:
+                keys.reverse()
+
+            for key in keys:
+                duration = self.rng.uniform(settings.walk_duration_min, settings.walk_duration_max)
+                self.walk_key = key
+                self.backend.press(key)
+                try:
+                    walking = yield from self._walk_wait(duration)
+                finally:
+                    self.backend.release(key)
+                    self.walk_key = None
+                if not walking or not (yield from self._walk_wait(0.1)):
+                    break
+
+    def _walk_wait(self, seconds):
+        """Wait out seconds despite wakes, returning False early once walking is turned off"""
+        clock = self.scheduler.clock
+        due = clock.now() + int(seconds * 1e9)
+        while self.settings.current.walk:
+            now = clock.now()
+            if now >= due:
+                return True
+            # Added wakeable so turning walking off is noticed, which cuts this wait short
+            yield (due - now) / 1e9
+        return False
+
+
+class ClickerEngine(FeatureRunner):
+    """Clicking, movement, walk, chat command and hotkey logic with no GUI dependency
+
+    A frontend drives it through start/stop/toggle, publishes settings
+    into engine.settings and reads engine.metrics. Input goes through an
+    injection backend from backends.py. Hotkey actions run through
+    engine.dispatch, which a frontend can replace to move them onto its
+    own thread; state_listeners are called with the new state
+    ("running", "paused", "stopping" or "stopped") after every change,
+    settings_listeners after settings are replaced from outside the
+    frontend, by a profile switch or the control API, and
+    status_listeners after the listener status or the hotkey held flag
+    changes, so a stopped frontend can repaint on events instead of
+    polling metrics.
+
+    Each start is a new generation with its own scheduler thread. stop()
+    wakes that thread from whatever it is waiting on and joins it, so
+    held keys are released before it returns and two runs never overlap.
+    A thread that outlasts STOP_JOIN_TIMEOUT leaves the engine
+    "stopping" while a watcher waits for it; a start requested meanwhile
+    runs as soon as it exits rather than being dropped.
+    """
+
+    def __init__(self, config_path=DEFAULT_CONFIG_PATH, backend=None):
+        # Input backend, created from settings on first start unless one is given
+        super().__init__(backend)
+
+        # State variables
+        self.clicking = False
+        self.scheduler_thread = None
+        self.generation = 0
+        self.start_latency_ns = None
+        self.stop_latency_ns = None
+        self._lifecycle = threading.RLock()
+        self._watched_thread = None  # a scheduler thread that outlasted its join
+        self._pending_start = None  # (macro,) for a start waiting on that thread
+        self._ended_generation = None  # a run that ended while the lifecycle lock was held
+        self.listener = ListenerSupervisor(self._on_key_press, self._on_key_release,
+                                           lambda status: self._publish_status(LISTENER_STATUS, status))
+        self.is_recording_hotkey = False
+        self.recording_action = None
+        self.recording_keys = []
+        self.recording_held = set()
+        self.recording_callbacks = None  # (on_progress, on_done) while recording a hotkey
+        self.input_recorder = None
+        self.hotkeys = HotkeyMatcher()
+        self.hotkey_bindings = {action: () for action in HOTKEY_CONFIG_KEYS}
+        self.hotkey_actions = {'toggle': self.toggle, 'pause': self.toggle_pause,
+                               'profile': self.next_profile}
+        self.dispatch = lambda action: action()
+        self.state_listeners = []
+        self.settings_listeners = []
+        self.status_listeners = []
+        self.active_profile = None
+        self.config_writer = ConfigWriter(config_path)
+
+    @property
+    def profiles(self):
+        """Profiles saved next to the config file, the store is created on first use"""
+        if self._profiles is None:
+            from profiles import ProfileStore, profile_dir
+            self._profiles = ProfileStore(profile_dir(self.config_writer.path))
+        return self._profiles
+
+    @profiles.setter
+    def profiles(self, store):
+        self._profiles = store
+
+    # Configuration
+
+    def load_config(self):
+        """Load hotkeys and settings from the config file, returning the raw values"""
+        config = read_config(self.config_writer.path)
+        for action, config_key in HOTKEY_CONFIG_KEYS.items():
+            if config_key in config:
+                self.bind_hotkey(action, parse_hotkey(config[config_key]))
+        try:
+            self.settings.publish(Settings.from_config(config))
+        except SettingsError as e:
+            LOG.warning('setting_invalid', f"Invalid setting {e}, using defaults", field=e.field)
+        self.profiles.load()
+        if self.profiles.get(config.get('profile')):
+            self.active_profile = config['profile']
+        return config
+
+    def save_config(self):
+        """Queue hotkeys and the current settings for the background writer"""
+        config = {}
+        for action, config_key in HOTKEY_CONFIG_KEYS.items():
+            config[config_key] = format_hotkey(self.hotkey_bindings[action])
+        config.update(self.settings.current.to_config())
+        config['profile'] = self.active_profile or ''
+        self.config_writer.save(config)
+
+    def publish_settings(self, settings):
+        """Hand running tasks a new settings snapshot and persist it"""
+        super().publish_settings(settings)
+        self.save_config()
+
+    def update_settings(self, values):
+        settings = super().update_settings(values)
+        self._notify_settings()
+        return settings
+
+    def state(self):
+        """The run state: running, paused or stopped"""
+        if not self.clicking:
+            return "stopping" if self._watched_thread else "stopped"
+        return "paused" if self.scheduler and self.scheduler.paused else "running"
+
+    def stats(self):
+        stats = super().stats()
+        stats.update(state=self.state(), profile=self.active_profile,
+                     listener=self.metrics.values[LISTENER_STATUS])
+        return stats
+
+    # Profiles
+
+    def switch_profile(self, name):
+        """Make a loaded profile current; running tasks pick it up at their next step
+
+        The profile was compiled when loaded, so this only swaps the
+        settings snapshot and rebinds hotkeys. The config write is queued
+        for the background writer.
+        """
+        profile = self.profiles.get(name)
+        if profile is None:
+            LOG.warning('profile_unknown', f"Unknown profile: {name}", profile=name)
+            return False
+        for action, config_key in HOTKEY_CONFIG_KEYS.items():
+            if config_key in profile.hotkeys:
+                self.bind_hotkey(action, profile.hotkeys[config_key])
+        super().publish_settings(profile.settings)
+        self.active_profile = name
+        self.save_config()
+        LOG.info('profile_switched', f"Switched to profile {name}", profile=name)
+        self._notify_settings()
+        return True
+
+    def next_profile(self):
+        """Switch to the next profile in name order"""
+        name = self.profiles.next_name(self.active_profile)
+        if name:
+            self.switch_profile(name)
+
+    def save_profile(self, name):
+        """Save the current settings and hotkeys as a profile, raising on bad input"""
+        config = {}
+        for action, config_key in HOTKEY_CONFIG_KEYS.items():
+            config[config_key] = format_hotkey(self.hotkey_bindings[action])
+        config.update(self.settings.current.to_config())
+        self.profiles.save(name, config)
+        self.active_profile = name
+        self.save_config()
+
+    # Lifecycle
+
+    def toggle(self):
+        """Toggle auto-clicking state"""
+        if self.clicking:
+            self.stop()
+        else:
+            self.start()
+
+    def toggle_pause(self):
+        """Pause or resume every running feature in place"""
+        if not self.clicking or not self.scheduler:
+            return
+        if self.scheduler.paused:
+            self.scheduler.resume()
+            self._notify("running")
+        else:
+            self.scheduler.pause()
+            self._notify("paused")
+
+    def start(self, macro=None):
+        """Start all enabled features, or only a compiled macro when one is given"""
+        with self._lifecycle_held():
+            if self.clicking:
+                return
+            requested_ns = time.perf_counter_ns()
+            # A run that ended on its own may still be closing its tasks
+            if not self._join_scheduler():
+                self._pending_start = (macro,)
+                return
+            settings = self.settings.current
+            if self.backend is None:
+                try:
+                    self.backend = make_backend(settings.input_backend)
+                except Exception as e:
+                    LOG.error('backend_error',
+                              f"Error creating {settings.input_backend} input backend: {e}",
+                              backend=settings.input_backend, error=str(e))
+                    return
+            self.clicking = True
+            self.generation += 1
+            self.metrics.reset(CURRENT_DELAY, CLICK_LATENESS, CLICKS_DONE, NEXT_COMMAND, CPS_TRACKING)
+            self.telemetry.reset()
+
+            self.scheduler = Scheduler(MonotonicClock(settings.spin_budget_us))
+            if macro is None:
+                self.schedule_features(settings)
+            else:
+                self.scheduler.add("macro", macro.play(self.backend), priority=PRIORITY_NORMAL)
+
+            self.scheduler_thread = threading.Thread(
+                target=self._run_scheduler, args=(self.scheduler, self.generation, requested_ns))
+            self.scheduler_thread.daemon = True
+            self.scheduler_thread.start()
+            self._notify("running")
+
+    def play_macro(self, macro):
+        """Run a compiled macro alongside the running features, or on its own when stopped
+
+        macro is anything with a play(backend) task, a Timeline, a
+        RecordingReader or a RecordingFile.
+        """
+        with self._lifecycle_held():
+            if self.clicking and self.scheduler:
+                self.scheduler.cancel("macro")
+                self.scheduler.submit("macro", macro.play(self.backend), priority=PRIORITY_NORMAL)
+            else:
+                self.start(macro)
+
+    def stop_macro(self):
+        """Stop a playing macro, leaving other features running"""
+        if self.scheduler:
+            self.scheduler.cancel("macro")
+
+    def start_input_recording(self, path):
+        """Record mouse and keyboard input to a file until stop_input_recording()"""
+        from recorder import Recorder
+        self.stop_input_recording()
+        self.input_recorder = Recorder(path).start()
+        LOG.info('recording_started', f"Recording input to {path}", path=path)
+
+    def stop_input_recording(self):
+        """Finish the current input recording, returning its event and drop counts"""
+        recorder, self.input_recorder = self.input_recorder, None
+        if not recorder:
+            return None
+        recorder.stop()
+        LOG.info('recording_stopped',
+                 f"Recorded {recorder.events} events to {recorder.path}, dropped {recorder.dropped}",
+                 path=recorder.path, events=recorder.events, dropped=recorder.dropped)
+        return recorder.events, recorder.dropped
+
+    def _run_scheduler(self, scheduler, generation, requested_ns):
+        if self.settings.current.target_cps:
+            # This run's clock only, before the first click rather than inside a task
+            scheduler.clock.calibrate()
+        self.start_latency_ns = time.perf_counter_ns() - requested_ns
+        scheduler.run()
+        # Ran out of tasks, e.g. a macro-only run finished, so stop like the hotkey would
+        self.dispatch(lambda: self._finish_run(generation))
+
+    def _finish_run(self, generation):
+        # A start or stop in progress may be joining this thread, so never wait for the
+        # lock; whoever holds it finishes the run when it lets go, see _lifecycle_held()
+        self._ended_generation = generation
+        if not self._lifecycle.acquire(blocking=False):
+            return
+        try:
+            self._ended_generation = None
+            if self.generation == generation and self.clicking:
+                self.stop()
+        finally:
+            self._lifecycle.release()
+
+    @contextlib.contextmanager
+    def _lifecycle_held(self):
+        """Hold the lifecycle lock, then finish any run that ended on its own meanwhile"""
+        with self._lifecycle:
+            yield
+        generation, self._ended_generation = self._ended_generation, None
+        if generation is not None:
+            self._finish_run(generation)
+
+    def _join_scheduler(self):
+        """Wait for the last scheduler thread to exit, returning False if it would not
+
+        On a timeout listeners are told the engine is "stopping" and a
+        watcher thread waits for the exit, see _scheduler_exited().
+        """
+        thread = self.scheduler_thread
+        if thread is None or thread is threading.current_thread():
+            return True
+        thread.join(STOP_JOIN_TIMEOUT)
+        if not thread.is_alive():
+            return True
+        LOG.warning('stop_timeout', f"Scheduler thread still running after {STOP_JOIN_TIMEOUT}s, "
+                                    f"waiting for it to exit", timeout=STOP_JOIN_TIMEOUT)
+        if thread is not self._watched_thread:
+            self._watched_thread = thread
+            watcher = threading.Thread(target=self._watch_scheduler, args=(thread,))
+            watcher.daemon = True
+            watcher.start()
+        self._notify("stopping")
+        return False
+
+    def _watch_scheduler(self, thread):
+        thread.join()
+        self.dispatch(lambda: self._scheduler_exited(thread))
+
+    def _scheduler_exited(self, thread):
+        """Finish a stop that timed out, then run any start that waited for it"""
+        with self._lifecycle_held():
+            if thread is not self._watched_thread:
+                return
+            self._watched_thread = None
+            LOG.info('stop_joined', "Scheduler thread exited")
+            pending, self._pending_start = self._pending_start, None
+            if pending is not None:
+                self.start(*pending)
+            elif not self.clicking:
+                self._notify("stopped")
+
+    def stop(self):
+        """Stop all features, returning once their tasks are closed"""
+        with self._lifecycle_held():
+            self._pending_start = None  # A start still waiting on the last run is called off
+            if not self.clicking:
+                return
+            self.clicking = False
+            requested_ns = time.perf_counter_ns()
+            if self.scheduler:
+                self.scheduler.stop()
+            joined = self._join_scheduler()
+            self.stop_latency_ns = time.perf_counter_ns() - requested_ns
+            self.metrics.reset(CURRENT_DELAY, CLICK_LATENESS, NEXT_COMMAND, CPS_TRACKING)
+            if joined:
+                self._notify("stopped")
+
+    def close(self):
+        """Stop everything and write any pending config"""
+        self.stop()
+        self.stop_input_recording()
+        self.listener.stop()
+        if self.backend:
+            self.backend.close()
+        self.config_writer.close()
+
+    def _notify(self, state):
+        for listener in self.state_listeners:
+            listener(state)
+
+    def _notify_settings(self):
+        for listener in self.settings_listeners:
+            listener()
+
+    # Hotkeys
+
+    def bind_hotkey(self, action, tokens):
+        """Set the key combination for a hotkey action"""
+        self.hotkey_bindings[action] = tuple(tokens)
+        self.hotkeys.bind(action, tokens)
+
+    def start_hotkey_listener(self):
+        """Start the global hotkey listener, which then stays up until close()"""
+        self.listener.start()
+
+    def _on_key_press(self, key):
+        recorder = self.input_recorder
+        if recorder:
+            recorder.key_press(key)
+        try:
+            if self.is_recording_hotkey:
+                self._on_recording_press(key)
+                return True
+            # Only fires when the exact combination of some binding is held
+            action = self.hotkeys.press(key)
+            self._publish_hotkey_held()
+            if action:
+                self.dispatch(self.hotkey_actions[action])
+        except Exception as e:
+            LOG.error('hotkey_error', f"Error in hotkey press: {e}", error=str(e))
+        return True
+
+    def _on_key_release(self, key):
+        recorder = self.input_recorder
+        if recorder:
+            recorder.key_release(key)
+        try:
+            # Releases always reach the matcher so its held keys stay in step
+            self.hotkeys.release(key)
+            self._publish_hotkey_held()
+            if self.is_recording_hotkey:
+                self._on_recording_release(key)
+        except Exception as e:
+            LOG.error('hotkey_error', f"Error in hotkey release: {e}", error=str(e))
+        return True
+
+    def _publish_hotkey_held(self):
+        """Publish whether the toggle hotkey is held, only when that changes"""
+        held = self.hotkeys.is_held('toggle')
+        if held != self.metrics.values[HOTKEY_PRESSED]:
+            self._publish_status(HOTKEY_PRESSED, held)
+
+    def _publish_status(self, slot, value):
+        """Publish a status metric and tell status_listeners it changed"""
+        self.metrics.set(slot, value)
+        for listener in self.status_listeners:
+            listener()
+
+    def start_hotkey_recording(self, action, on_progress, on_done):
+        """Record a new combination for an action
+
+        on_progress(text) is called as keys are added and on_done(text)
+        once every key is released or Esc clears the binding, both from the
+        listener thread. Keys are routed from the global listener, so no
+        second hook is installed.
+        """
+        self.recording_action = action
+        self.recording_keys = []
+        self.recording_held = set()
+        self.recording_callbacks = (on_progress, on_done)
+        self.is_recording_hotkey = True
+        self.start_hotkey_listener()
+
+    def _finish_hotkey_recording(self, tokens):
+        """Store the recorded combination and hand keys back to the hotkey matcher"""
+        self.is_recording_hotkey = False
+        self.bind_hotkey(self.recording_action, tokens)
+        self.save_config()
+        self.recording_callbacks[1](format_hotkey(self.hotkey_bindings[self.recording_action]))
+
+    def _on_recording_press(self, key):
+        """Handle key press during hotkey recording"""
+        try:
+            if normalize_key(key) == 'esc':
+                self._finish_hotkey_recording(())
+                return
+
+            token = normalize_key(key)
+            self.recording_held.add(token)
+            if token not in self.recording_keys:
+                self.recording_keys.append(token)
+                self.recording_callbacks[0](format_hotkey(self.recording_keys))
+        except Exception as e:
+            LOG.error('hotkey_error', f"Error in recording press: {e}", error=str(e))
+
+    def _on_recording_release(self, key):
+        """Handle key release during hotkey recording"""
+        try:
+            self.recording_held.discard(normalize_key(key))
+
+            # The combination is every key pressed before all of them were let go
+            if not self.recording_held and self.recording_keys:
+                self._finish_hotkey_recording(self.recording_keys)
+        except Exception as e:
+            LOG.error('hotkey_error', f"Error in recording release: {e}", error=str(e))
+
+
+def run_headless(config_path=DEFAULT_CONFIG_PATH, start=False, profile=None, timing_path=None,
+                 control=None, metrics_port=None, meter=None):
+    """Run the engine from the config file with no GUI until interrupted
+
+    control is a socket path for the control API, '' for the default
+    one next to the config file, or None to leave it off; metrics_port
+    serves the metrics endpoint on localhost. meter, a WakeupMeter, is
+    attached to the engine's state changes.
+    """
+    profile = profile or StartupProfile(enabled=False)
+    with profile.phase("ClickerEngine"):
+        engine = ClickerEngine(config_path)
+    if meter:
+        meter.attach(engine)
+    with profile.phase("load_config"):
+        engine.load_config()
+    with profile.phase("start_hotkey_listener"):
+        engine.start_hotkey_listener()
+    if profile.enabled:
+        profile.mark_first_window()
+        profile.uninstall()
+        print(profile.report())
+    from control import start_control
+    server = start_control(engine, config_path, control, metrics_port)
+    hotkey = format_hotkey(engine.hotkey_bindings['toggle'])
+    if start or hotkey == 'NONE':
+        engine.start()
+    print(f"Running headless, toggle hotkey: {hotkey}, Ctrl+C to quit")
+    try:
+        # The listener supervisor restarts the hook itself, nothing to poll here
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if server:
+            server.close()
+        engine.close()
+        if timing_path:
+            count = engine.telemetry.export(timing_path)
+            print(f"Exported {count} click samples to {timing_path}")
+    return 0
@@ -0,0 +1,201 @@
+import collections
+import itertools
+import json
+import os
+import threading
+import time
+
+# Constants
+LOG_DIR = 'logs'
+LOG_FILE = 'events.jsonl'
+RING_CAPACITY = 8192  # records buffered between flushes, the oldest are dropped past this
+FLUSH_INTERVAL = 1.0  # seconds the writer gathers records into one batch
+MAX_FILE_BYTES = 5 * 1024 * 1024  # rotate the log file past this size
+BACKUP_COUNT = 3  # rotated files kept as events.jsonl.1 to .3
+METRIC_PREFIX = 'autoclicker_'
+DEFAULT_METRICS_PORT = 9464
+
+# Levels
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+LEVEL_NAMES = {DEBUG: 'debug', INFO: 'info', WARNING: 'warning', ERROR: 'error'}
+
+# Counters served on the metrics endpoint
+COUNTERS = {
+    'clicks_injected': "Clicks sent to the input backend",
+    'commands_sent': "Chat commands typed",
+    'listener_restarts': "Times the hotkey listener was restarted",
+    'config_writes': "Config files written",
+    'late_ticks': "Scheduler steps that ran later than the late tick threshold",
+}
+
+
+def log_dir(config_path):
+    """Log directory next to the config file"""
+    return os.path.join(os.path.dirname(os.path.abspath(config_path)), LOG_DIR)
+
+
+def format_metrics(counters, gauges=()):
+    """Render counters and (name, help, value) gauges in the Prometheus text format"""
+    lines = []
+    for name, value in counters.items():
+        metric = f"{METRIC_PREFIX}{name}_total"
+        lines.append(f"# HELP {metric} {COUNTERS.get(name, name)}")
+        lines.append(f"# TYPE {metric} counter")
+        lines.append(f"{metric} {value}")
+    for name, description, value in gauges:
+        if value is None:
+            continue
+        metric = METRIC_PREFIX + name
+        lines.append(f"# HELP {metric} {description}")
+        lines.append(f"# TYPE {metric} gauge")
+        lines.append(f"{metric} {float(value):g}")
+    return '\n'.join(lines) + '\n'
+
+
+class EventLog:
+    """Structured diagnostics buffered in memory and written in batches
+
+    emit() builds one fixed-shape record, (time_ns, level, event,
+    message, fields), and appends it to a bounded deque; deque appends are
+    atomic under the GIL, so any thread can emit without a lock or a
+    syscall. A writer thread wakes on the first record of a batch, waits
+    FLUSH_INTERVAL for more, then writes them all as JSON lines with one
+    write, echoing INFO and above to the console. The file rotates past
+    MAX_FILE_BYTES. Until open() is called records are only printed,
+    straight away, which is what command line tools want.
+
+    counters hold the running totals behind the metrics endpoint. count()
+    is a plain dict update with no lock; each counter is bumped from one
+    thread per scheduler, so at worst a total misses a step when two
+    schedulers bump it in the same instant.
+    """
+
+    def __init__(self, capacity=RING_CAPACITY):
+        self.capacity = capacity
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.echo_level = INFO
+        self.path = None
+        self.written = 0
+        self.appended = 0
+        self._ring = collections.deque(maxlen=capacity)
+        self._sequence = itertools.count(1)
+        self._wake = threading.Event()
+        self._closed = threading.Event()
+        self._thread = None
+        self._file = None
+        self._size = 0
+
+    @property
+    def dropped(self):
+        """Records lost because the ring filled up between flushes"""
+        return max(0, self.appended - self.written - len(self._ring))
+
+    def open(self, directory):
+        """Start writing records to directory/events.jsonl on a background thread"""
+        if self._thread:
+            return self
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, LOG_FILE)
+        self._open_file()
+        self._closed.clear()
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def close(self):
+        """Write everything still buffered and stop the writer thread"""
+        if not self._thread:
+            return
+        self._closed.set()
+        self._wake.set()
+        self._thread.join()
+        self._thread = None
+        self._flush()
+        self._file.close()
+        self._file = None
+
+    def emit(self, event, message, level=INFO, **fields):
+        """Record an event; message is the console text, fields go to the file"""
+        record = (time.time_ns(), level, event, message, fields)
+        if self._thread is None:
+            if level >= self.echo_level:
+                print(message)
+            return
+        self._ring.append(record)
+        self.appended = next(self._sequence)
+        if not self._wake.is_set():
+            self._wake.set()
+
+    def debug(self, event, message, **fields):
+        self.emit(event, message, DEBUG, **fields)
+
+    def info(self, event, message, **fields):
+        self.emit(event, message, INFO, **fields)
+
+    def warning(self, event, message, **fields):
+        self.emit(event, message, WARNING, **fields)
+
+    def error(self, event, message, **fields):
+        self.emit(event, message, ERROR, **fields)
+
+    def count(self, name, amount=1):
+        """Bump a counter, no lock and no syscall"""
+        self.counters[name] += amount
+
+    def _run(self):
+        while not self._closed.is_set():
+            self._wake.wait()
+            # Let the rest of a burst arrive so it goes out in one write
+            self._closed.wait(FLUSH_INTERVAL)
+            self._wake.clear()
+            self._flush()
+
+    def _flush(self):
+        records = []
+        try:
+            while True:
+                records.append(self._ring.popleft())
+        except IndexError:
+            pass
+        if not records:
+            return
+        lines = []
+        for timestamp, level, event, message, fields in records:
+            if level >= self.echo_level:
+                print(message)
+            entry = {'ts': timestamp / 1e9, 'level': LEVEL_NAMES.get(level, level),
+                     'event': event, 'msg': message}
+            entry.update(fields)
+            lines.append(json.dumps(entry, separators=(',', ':'), default=str))
+        text = '\n'.join(lines) + '\n'
+        try:
+            if self._size + len(text) > MAX_FILE_BYTES and self._size:
+                self._rotate()
+            self._file.write(text)
+            self._file.flush()
+            self._size += len(text)
+        except OSError as e:
+            print(f"Error writing event log: {e}")
+        self.written += len(records)
+
+    def _open_file(self):
+        self._file = open(self.path, 'a', encoding='utf-8')
+        self._size = self._file.tell()
+
+    def _rotate(self):
+        """Shift events.jsonl.N up by one, dropping the oldest, and start a new file"""
+        self._file.close()
+        for index in range(BACKUP_COUNT - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        os.replace(self.path, f"{self.path}.1")
+        self._open_file()
+
+
+# The process-wide log every module emits into
+LOG = EventLog()
@@ -0,0 +1,932 @@
+import sys
+import os
+import time
+from PyQt6.QtWidgets import (QApplication, QMainWindow, QPushButton, QVBoxLayout, 
+                            QHBoxLayout, QWidget, QLabel, QCheckBox, QLineEdit,
+                            QTabWidget, QScrollArea, QComboBox, QFileDialog, QPlainTextEdit)
+from PyQt6.QtCore import Qt, QEvent, QTimer, QObject, pyqtSignal
+from PyQt6.QtGui import QFont, QIcon, QPixmap
+from engine import ClickerEngine, DEFAULT_CONFIG_PATH, HOTKEY_CONFIG_KEYS
+from startup import StartupProfile
+from eventlog import LOG
+from delays import DISTRIBUTIONS
+from settings import (Settings, SettingsError, DEFAULT_CLICK_DELAY_MIN, DEFAULT_CLICK_DELAY_MAX,
+                      DEFAULT_WALK_INTERVAL_MIN, DEFAULT_WALK_INTERVAL_MAX, DEFAULT_WALK_DURATION_MIN,
+                      DEFAULT_WALK_DURATION_MAX, DEFAULT_CIRCLE_SPINS, DEFAULT_CIRCLE_DRIFT,
+                      DEFAULT_CIRCLE_RADIUS, DEFAULT_CIRCLE_STEPS)
+from trajectory import SHAPES
+from motion import MOTION_PATHS, DEFAULT_MOTION_RATE, DEFAULT_SPIN_TIME
+from hotkeys import format_hotkey
+from metrics import (CURRENT_DELAY, CLICK_LATENESS, CLICKS_DONE, NEXT_COMMAND, COMMAND_ERROR,
+                     LISTENER_STATUS, HOTKEY_PRESSED, CPS_TRACKING)
+
+# Constants
+DEFAULT_WINDOW_WIDTH = 550
+DEFAULT_WINDOW_HEIGHT = 800
+DEFAULT_UPDATE_INTERVAL = 50  # ms
+TELEMETRY_UPDATE_INTERVAL = 500  # ms, percentiles move slowly and cost more to compute
+HEADER_IMAGE_SIZE = 120  # px
+MACRO_PLACEHOLDER = """# One command per line, times in ms
+move 400 300
+hold w 500
+repeat 5
+  click
+  wait 80-120
+end
+say /feed
+repeat
+  move +3 -3
+  click
+  wait 100-200
+end"""
+HIDDEN_SETTING_KEYS = ('delay_seed', 'delay_histogram', 'spin_budget_us', 'input_backend')  # config.txt only
+
+def resource_path(relative_path):
+    """Get absolute path to resource, works for dev and for PyInstaller"""
+    try:
+        base_path = sys._MEIPASS
+    except Exception:
+        base_path = os.path.abspath(".")
+    return os.path.join(base_path, relative_path)
+
+class _Dispatcher(QObject):
+    """Runs callables on the GUI thread when emitted from any thread"""
+    call = pyqtSignal(object)
+
+class AutoClicker(QMainWindow):
+    def __init__(self, config_path=DEFAULT_CONFIG_PATH, profile=None):
+        super().__init__()
+        profile = profile or StartupProfile(enabled=False)
+        with profile.phase("ClickerEngine"):
+            self.engine = ClickerEngine(config_path)
+        with profile.phase("_init_window"):
+            self._init_window()
+        with profile.phase("_init_variables"):
+            self._init_variables()
+        with profile.phase("_init_ui"):
+            self._init_ui()
+        with profile.phase("_load_config"):
+            self._load_config()
+        with profile.phase("_start_hotkey_listener"):
+            self.engine.start_hotkey_listener()
+
+        # Decode the header image once the window is up instead of before it
+        QTimer.singleShot(0, self._load_header_image)
+
+    def _init_window(self):
+        """Initialize window properties"""
+        self.setWindowTitle("Faction Minecraft Custom Auto Clicker")
+        self.setMinimumSize(DEFAULT_WINDOW_WIDTH, DEFAULT_WINDOW_HEIGHT)
+        self.resize(DEFAULT_WINDOW_WIDTH, DEFAULT_WINDOW_HEIGHT)
+        self.setWindowIcon(QIcon(resource_path('cute cat.jpg')))
+
+    def _init_variables(self):
+        """Initialize class variables"""
+        # Engine hooks, hotkey actions and state changes are handled on the GUI thread
+        self.dispatcher = _Dispatcher()
+        self.dispatcher.call.connect(lambda action: action())
+        self.engine.dispatch = self.dispatcher.call.emit
+        self.engine.state_listeners.append(
+            lambda state: self.dispatcher.call.emit(lambda: self._show_state(state)))
+        self.engine.settings_listeners.append(
+            lambda: self.dispatcher.call.emit(self._show_engine_settings))
+        self.engine.status_listeners.append(
+            lambda: self.dispatcher.call.emit(self._update_delay_display))
+
+        # State variables
+        self.painted_version = -1
+        self.painted_text = {}
+        self.loading_config = False
+        self.invalid_setting = None
+
+        # Repaint timers, only running while clicking with the window on screen
+        self.update_timer = QTimer()
+        self.update_timer.setInterval(DEFAULT_UPDATE_INTERVAL)
+        self.update_timer.timeout.connect(self._update_delay_display)
+
+        self.telemetry_timer = QTimer()
+        self.telemetry_timer.setInterval(TELEMETRY_UPDATE_INTERVAL)
+        self.telemetry_timer.timeout.connect(self._update_telemetry_display)
+
+    def _init_ui(self):
+        """Initialize UI components"""
+        self.tab_widget = QTabWidget()
+        self.setCentralWidget(self.tab_widget)
+        
+        self.auto_clicker_tab = QWidget()
+        self.macro_tab = QWidget()
+        self.macro_tab_ready = False
+        
+        self._setup_auto_clicker_ui()
+        
+        self.tab_widget.addTab(self.auto_clicker_tab, "Auto Clicker")
+        self.tab_widget.addTab(self.macro_tab, "Macros")
+        self.tab_widget.currentChanged.connect(self._on_tab_changed)
+        self._register_setting_widgets()
+
+    def _on_tab_changed(self, index):
+        """Build the macro tab the first time it is opened"""
+        if self.tab_widget.widget(index) is self.macro_tab and not self.macro_tab_ready:
+            self.macro_tab_ready = True
+            self._setup_macro_ui()
+
+    def _register_setting_widgets(self):
+        """Map config.txt keys to their widgets and publish settings on every edit"""
+        self.setting_widgets = {
+            'feed': self.feed_checkbox,
+            'afk': self.afk_checkbox,
+            'commands': self.commands_input,
+            'circle': self.circle_checkbox,
+            'walk': self.walk_checkbox,
+            'spins': self.spins_input,
+            'drift': self.drift_input,
+            'shape': self.shape_combo,
+            'radius': self.radius_input,
+            'steps': self.steps_input,
+            'motion_path': self.motion_path_combo,
+            'motion_rate': self.motion_rate_input,
+            'spin_time': self.spin_time_input,
+            'walk_min': self.walk_min_input,
+            'walk_max': self.walk_max_input,
+            'walk_duration_min': self.walk_duration_min_input,
+            'walk_duration_max': self.walk_duration_max_input,
+            'min_delay': self.min_delay_input,
+            'max_delay': self.max_delay_input,
+            'delay_distribution': self.distribution_combo,
+            'target_cps': self.target_cps_input,
+            'cps_variance': self.cps_variance_input,
+        }
+        for widget in self.setting_widgets.values():
+            if isinstance(widget, QCheckBox):
+                widget.stateChanged.connect(self._publish_settings)
+            elif isinstance(widget, QComboBox):
+                widget.currentTextChanged.connect(self._publish_settings)
+            else:
+                widget.textChanged.connect(self._publish_settings)
+
+    def _setup_auto_clicker_ui(self):
+        """Setup the main auto clicker tab UI"""
+        main_layout = QVBoxLayout()
+        main_layout.setSpacing(10)
+        self.auto_clicker_tab.setLayout(main_layout)
+
+        # Create scrollable container
+        scroll_area = QScrollArea()
+        scroll_area.setWidgetResizable(True)
+        scroll_area.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        
+        container = QWidget()
+        container_layout = QVBoxLayout()
+        container.setLayout(container_layout)
+
+        # Add UI sections
+        self._add_header_section(container_layout)
+        self._add_profile_section(container_layout)
+        self._add_hotkey_section(container_layout)
+        self._add_features_section(container_layout)
+        self._add_control_section(container_layout)
+
+        # Add container to scroll area
+        scroll_area.setWidget(container)
+        main_layout.addWidget(scroll_area)
+
+        # Apply styling
+        self._apply_styling()
+
+    def _add_header_section(self, layout):
+        """Add logo, title and description"""
+        # Cat image, filled in by _load_header_image after the window is shown
+        self.cat_label = QLabel()
+        self.cat_label.setMinimumHeight(HEADER_IMAGE_SIZE)
+        self.cat_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.cat_label.setContentsMargins(0, 0, 0, 10)
+        layout.addWidget(self.cat_label)
+        layout.addSpacing(10)
+
+        # Title and description
+        title = QLabel("Faction Minecraft Custom Auto Clicker")
+        title.setFont(QFont("Arial", 16, QFont.Weight.Bold))
+        title.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        layout.addWidget(title)
+
+        desc = QLabel("Design and created for Minecraft Faction")
+        desc.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        layout.addWidget(desc)
+
+    def _add_profile_section(self, layout):
+        """Add the profile picker and save button"""
+        profile_layout = QHBoxLayout()
+        profile_layout.addWidget(QLabel("Profile:"))
+        self.profile_combo = QComboBox()
+        self.profile_combo.setEditable(True)
+        self.profile_combo.setInsertPolicy(QComboBox.InsertPolicy.NoInsert)
+        self.profile_combo.lineEdit().setPlaceholderText("Type a name to save a profile")
+        self.profile_combo.activated.connect(
+            lambda index: self.engine.switch_profile(self.profile_combo.itemText(index)))
+        profile_layout.addWidget(self.profile_combo, 1)
+
+        save_profile_button = QPushButton("Save Profile")
+        save_profile_button.clicked.connect(self._save_profile)
+        profile_layout.addWidget(save_profile_button)
+        layout.addLayout(profile_layout)
+        layout.addSpacing(5)
+
+    def _add_hotkey_section(self, layout):
+        """Add hotkey configuration section"""
+        self.hotkey_displays = {}
+        for action, label in (('toggle', "Hotkey:"), ('pause', "Pause Hotkey:"),
+                              ('profile', "Next Profile Hotkey:")):
+            hotkey_layout = QHBoxLayout()
+            hotkey_label = QLabel(label)
+            display = QLineEdit()
+            display.setReadOnly(True)
+            display.setPlaceholderText("Click to set hotkey")
+            display.mousePressEvent = lambda event, action=action: self._start_hotkey_recording(action)
+            self.hotkey_displays[action] = display
+
+            hotkey_layout.addWidget(hotkey_label)
+            hotkey_layout.addWidget(display)
+            layout.addLayout(hotkey_layout)
+        layout.addSpacing(5)
+
+    def _add_features_section(self, layout):
+        """Add feature checkboxes and their settings"""
+        checkbox_layout = QVBoxLayout()
+        checkbox_layout.setSpacing(2)
+
+        # Feed feature
+        self.feed_checkbox = QCheckBox("Toggle /feed")
+        self.feed_checkbox.stateChanged.connect(lambda: self._on_checkbox_changed("feed"))
+        checkbox_layout.addWidget(self.feed_checkbox)
+
+        # AFK feature
+        self.afk_checkbox = QCheckBox("Toggle /afk (after 5 seconds)")
+        self.afk_checkbox.stateChanged.connect(lambda: self._on_checkbox_changed("afk"))
+        checkbox_layout.addWidget(self.afk_checkbox)
+
+        # Custom chat commands, sent from the same queue as /feed and /afk
+        commands_layout = QHBoxLayout()
+        commands_layout.addWidget(QLabel("Extra commands:"))
+        self.commands_input = QLineEdit()
+        self.commands_input.setPlaceholderText("/fix@300-360+60; /sell@600")
+        self.commands_input.setToolTip("command@interval seconds (min-max, 0 sends once)"
+                                       "+first delay, separated by ;")
+        commands_layout.addWidget(self.commands_input)
+        checkbox_layout.addLayout(commands_layout)
+
+        self.command_timer_label = QLabel("Next command in: --")
+        self.command_timer_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        checkbox_layout.addWidget(self.command_timer_label)
+
+        # Circle movement feature
+        self._add_circle_movement_section(checkbox_layout)
+        
+        # Auto walk feature
+        self._add_walk_section(checkbox_layout)
+
+        layout.addLayout(checkbox_layout)
+        layout.addSpacing(5)
+
+        # Click delay settings
+        self._add_delay_settings(layout)
+
+    def _add_circle_movement_section(self, layout):
+        """Add circular mouse movement settings"""
+        self.circle_checkbox = QCheckBox("Circular Mouse Movement")
+        self.circle_checkbox.stateChanged.connect(lambda: self._on_checkbox_changed("circle"))
+        layout.addWidget(self.circle_checkbox)
+
+        circle_settings = QHBoxLayout()
+        circle_settings.setContentsMargins(20, 0, 20, 0)
+
+        # Spins setting
+        spins_label = QLabel("Spins before drift:")
+        self.spins_input = QLineEdit(str(DEFAULT_CIRCLE_SPINS))
+        self.spins_input.setMaximumWidth(70)
+
+        # Drift setting
+        drift_label = QLabel("Drift pixels:")
+        self.drift_input = QLineEdit(str(DEFAULT_CIRCLE_DRIFT))
+        self.drift_input.setMaximumWidth(70)
+
+        circle_settings.addWidget(spins_label)
+        circle_settings.addWidget(self.spins_input)
+        circle_settings.addWidget(drift_label)
+        circle_settings.addWidget(self.drift_input)
+        layout.addLayout(circle_settings)
+
+        shape_settings = QHBoxLayout()
+        shape_settings.setContentsMargins(20, 0, 20, 0)
+
+        # Shape setting
+        self.shape_combo = QComboBox()
+        self.shape_combo.addItems(SHAPES)
+
+        # Size settings
+        self.radius_input = QLineEdit(str(DEFAULT_CIRCLE_RADIUS))
+        self.radius_input.setMaximumWidth(70)
+        self.steps_input = QLineEdit(str(DEFAULT_CIRCLE_STEPS))
+        self.steps_input.setMaximumWidth(70)
+
+        shape_settings.addWidget(QLabel("Shape:"))
+        shape_settings.addWidget(self.shape_combo)
+        shape_settings.addWidget(QLabel("Radius:"))
+        shape_settings.addWidget(self.radius_input)
+        shape_settings.addWidget(QLabel("Steps:"))
+        shape_settings.addWidget(self.steps_input)
+        layout.addLayout(shape_settings)
+
+        motion_settings = QHBoxLayout()
+        motion_settings.setContentsMargins(20, 0, 20, 0)
+
+        # Path setting, step moves one point per click, the rest move smoothly
+        self.motion_path_combo = QComboBox()
+        self.motion_path_combo.addItems(MOTION_PATHS)
+
+        # Smooth motion timing
+        self.motion_rate_input = QLineEdit(str(DEFAULT_MOTION_RATE))
+        self.motion_rate_input.setMaximumWidth(70)
+        self.spin_time_input = QLineEdit(str(DEFAULT_SPIN_TIME))
+        self.spin_time_input.setMaximumWidth(70)
+
+        motion_settings.addWidget(QLabel("Path:"))
+        motion_settings.addWidget(self.motion_path_combo)
+        motion_settings.addWidget(QLabel("Rate (Hz):"))
+        motion_settings.addWidget(self.motion_rate_input)
+        motion_settings.addWidget(QLabel("Loop (ms):"))
+        motion_settings.addWidget(self.spin_time_input)
+        layout.addLayout(motion_settings)
+
+    def _add_walk_section(self, layout):
+        """Add auto walk settings"""
+        self.walk_checkbox = QCheckBox("Auto Walk")
+        self.walk_checkbox.stateChanged.connect(lambda: self._on_checkbox_changed("walk"))
+        layout.addWidget(self.walk_checkbox)
+
+        walk_settings = QVBoxLayout()
+        walk_settings.setContentsMargins(20, 0, 20, 0)
+        walk_settings.setSpacing(5)
+
+        # Interval settings
+        interval_layout = QHBoxLayout()
+        self.walk_min_input = QLineEdit(str(DEFAULT_WALK_INTERVAL_MIN))
+        self.walk_max_input = QLineEdit(str(DEFAULT_WALK_INTERVAL_MAX))
+        self.walk_min_input.setMaximumWidth(70)
+        self.walk_max_input.setMaximumWidth(70)
+
+        interval_layout.addWidget(QLabel("Walk Interval (s):"))
+        interval_layout.addWidget(self.walk_min_input)
+        interval_layout.addWidget(QLabel("to"))
+        interval_layout.addWidget(self.walk_max_input)
+        interval_layout.addStretch()
+        walk_settings.addLayout(interval_layout)
+
+        # Duration settings
+        duration_layout = QHBoxLayout()
+        self.walk_duration_min_input = QLineEdit(str(DEFAULT_WALK_DURATION_MIN))
+        self.walk_duration_max_input = QLineEdit(str(DEFAULT_WALK_DURATION_MAX))
+        self.walk_duration_min_input.setMaximumWidth(70)
+        self.walk_duration_max_input.setMaximumWidth(70)
+
+        duration_layout.addWidget(QLabel("Press Duration (ms):"))
+        duration_layout.addWidget(self.walk_duration_min_input)
+        duration_layout.addWidget(QLabel("to"))
+        duration_layout.addWidget(self.walk_duration_max_input)
+        duration_layout.addStretch()
+        walk_settings.addLayout(duration_layout)
+
+        layout.addLayout(walk_settings)
+
+    def _add_delay_settings(self, layout):
+        """Add click delay settings"""
+        delay_layout = QHBoxLayout()
+        
+        self.min_delay_input = QLineEdit(str(DEFAULT_CLICK_DELAY_MIN))
+        self.max_delay_input = QLineEdit(str(DEFAULT_CLICK_DELAY_MAX))
+        self.min_delay_input.setMaximumWidth(70)
+        self.max_delay_input.setMaximumWidth(70)
+
+        delay_layout.addWidget(QLabel("Min Delay (ms):"))
+        delay_layout.addWidget(self.min_delay_input)
+        delay_layout.addWidget(QLabel("Max Delay (ms):"))
+        delay_layout.addWidget(self.max_delay_input)
+        
+        layout.addLayout(delay_layout)
+
+        # Delay distribution
+        distribution_layout = QHBoxLayout()
+        self.distribution_combo = QComboBox()
+        self.distribution_combo.addItems(DISTRIBUTIONS)
+        distribution_layout.addWidget(QLabel("Delay Distribution:"))
+        distribution_layout.addWidget(self.distribution_combo)
+        distribution_layout.addStretch()
+        layout.addLayout(distribution_layout)
+
+        # Target CPS replaces min/max delay with the rate controller when above 0
+        cps_layout = QHBoxLayout()
+        self.target_cps_input = QLineEdit("0")
+        self.cps_variance_input = QLineEdit("0")
+        self.target_cps_input.setMaximumWidth(70)
+        self.cps_variance_input.setMaximumWidth(70)
+        cps_layout.addWidget(QLabel("Target CPS (0 = off):"))
+        cps_layout.addWidget(self.target_cps_input)
+        cps_layout.addWidget(QLabel("±"))
+        cps_layout.addWidget(self.cps_variance_input)
+        cps_layout.addStretch()
+        layout.addLayout(cps_layout)
+        
+        # Add thread status display
+        self.thread_status = QLabel("Thread Status: Not Started")
+        self.thread_status.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        layout.addWidget(self.thread_status)
+        
+        # Add hotkey press detection display
+        self.hotkey_press_status = QLabel("Last Hotkey Press: None")
+        self.hotkey_press_status.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        layout.addWidget(self.hotkey_press_status)
+
+    def _add_control_section(self, layout):
+        """Add control button and status labels"""
+        layout.addSpacing(5)
+
+        self.toggle_button = QPushButton("Start Auto Clicking")
+        self.toggle_button.setFont(QFont("Arial", 12))
+        self.toggle_button.setMinimumHeight(50)
+        self.toggle_button.clicked.connect(self.toggle_clicking)
+        layout.addWidget(self.toggle_button)
+
+        self.status_label = QLabel("Status: Idle")
+        self.status_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        layout.addWidget(self.status_label)
+
+        delay_row = QHBoxLayout()
+        self.delay_label = QLabel("Click Delay: 0.0 ms")
+        self.delay_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        delay_row.addWidget(self.delay_label)
+        # Target CPS tracking error, blank unless the rate controller is on
+        self.cps_label = QLabel("")
+        self.cps_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        delay_row.addWidget(self.cps_label)
+        layout.addLayout(delay_row)
+
+        self.clicks_label = QLabel("Clicks: 0")
+        self.clicks_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        layout.addWidget(self.clicks_label)
+
+        # Rolling percentiles of what was actually delivered
+        self.lateness_label = QLabel("Lateness p50/p99/p99.9: --")
+        self.lateness_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        layout.addWidget(self.lateness_label)
+
+        self.inject_label = QLabel("Click Injection p50/p99/p99.9: --")
+        self.inject_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        layout.addWidget(self.inject_label)
+
+        export_button = QPushButton("Export Timing")
+        export_button.clicked.connect(self._export_telemetry)
+        layout.addWidget(export_button)
+
+        layout.addSpacing(10)
+
+    def _load_header_image(self):
+        """Decode and scale the header image"""
+        try:
+            pixmap = QPixmap(resource_path('cute cat.jpg'))
+            scaled_pixmap = pixmap.scaled(HEADER_IMAGE_SIZE, HEADER_IMAGE_SIZE,
+                                        Qt.AspectRatioMode.KeepAspectRatio, 
+                                        Qt.TransformationMode.SmoothTransformation)
+            self.cat_label.setPixmap(scaled_pixmap)
+        except Exception as e:
+            LOG.error('image_error', f"Error loading image: {e}", error=str(e))
+
+    def _setup_macro_ui(self):
+        """Setup the macro features tab UI"""
+        from macros import macro_dir, list_macros
+        macro_layout = QVBoxLayout()
+        self.macro_tab.setLayout(macro_layout)
+        self.macro_directory = macro_dir(self.engine.config_writer.path)
+
+        title = QLabel("Macros")
+        title.setFont(QFont("Arial", 16, QFont.Weight.Bold))
+        title.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        macro_layout.addWidget(title)
+
+        # Saved macro picker and name
+        picker_layout = QHBoxLayout()
+        self.macro_combo = QComboBox()
+        self.macro_combo.addItems(list_macros(self.macro_directory))
+        self.macro_combo.setCurrentIndex(-1)
+        self.macro_combo.textActivated.connect(self._load_macro)
+        self.macro_name_input = QLineEdit()
+        self.macro_name_input.setPlaceholderText("Macro name")
+        picker_layout.addWidget(QLabel("Saved:"))
+        picker_layout.addWidget(self.macro_combo)
+        picker_layout.addWidget(self.macro_name_input)
+        macro_layout.addLayout(picker_layout)
+
+        self.macro_editor = QPlainTextEdit()
+        self.macro_editor.setPlaceholderText(MACRO_PLACEHOLDER)
+        self.macro_editor.setFont(QFont("Consolas", 10))
+        macro_layout.addWidget(self.macro_editor)
+
+        self.macro_status = QLabel("")
+        self.macro_status.setWordWrap(True)
+        macro_layout.addWidget(self.macro_status)
+
+        # Controls
+        button_layout = QHBoxLayout()
+        for text, handler in (("Save", self._save_macro), ("Play", self._play_macro),
+                              ("Stop", self.engine.stop_macro)):
+            button = QPushButton(text)
+            button.setMinimumHeight(35)
+            button.clicked.connect(handler)
+            button_layout.addWidget(button)
+        macro_layout.addLayout(button_layout)
+
+        # Raw input recordings, saved as <name>.rec beside the macros
+        recording_layout = QHBoxLayout()
+        self.record_button = QPushButton("Record Input")
+        self.record_button.setMinimumHeight(35)
+        self.record_button.clicked.connect(self._toggle_input_recording)
+        play_recording_button = QPushButton("Play Recording")
+        play_recording_button.setMinimumHeight(35)
+        play_recording_button.clicked.connect(self._play_recording)
+        recording_layout.addWidget(self.record_button)
+        recording_layout.addWidget(play_recording_button)
+        macro_layout.addLayout(recording_layout)
+
+    def _load_macro(self, name):
+        """Show a saved macro in the editor"""
+        from macros import load_macro
+        try:
+            self.macro_editor.setPlainText(load_macro(self.macro_directory, name))
+            self.macro_name_input.setText(name)
+            self._compile_macro()
+        except OSError as e:
+            LOG.error('macro_error', f"Error loading macro: {e}", macro=name, error=str(e))
+
+    def _compile_macro(self):
+        """Compile the editor text, reporting the result under the editor"""
+        from macros import MacroError, compile_macro
+        try:
+            timeline = compile_macro(self.macro_editor.toPlainText())
+        except MacroError as e:
+            self.macro_status.setText(f"Error: {e}")
+            return None
+        shortest, longest = timeline.duration_range()
+        loop_text = ", then loops" if timeline.loop_start is not None else ""
+        self.macro_status.setText(
+            f"{len(timeline)} events, {shortest:.2f}-{longest:.2f} s per pass{loop_text}")
+        return timeline
+
+    def _save_macro(self):
+        """Save the editor text under the entered name"""
+        from macros import save_macro
+        name = self.macro_name_input.text().strip()
+        if self._compile_macro() is None:
+            return
+        try:
+            save_macro(self.macro_directory, name, self.macro_editor.toPlainText())
+        except (OSError, ValueError) as e:
+            self.macro_status.setText(f"Error saving macro: {e}")
+            return
+        if self.macro_combo.findText(name) < 0:
+            self.macro_combo.addItem(name)
+        self.macro_combo.setCurrentText(name)
+        LOG.info('macro_saved', f"Macro '{name}' saved", macro=name)
+
+    def _recording_path(self):
+        """Recording file for the entered macro name, or None without a name"""
+        from recorder import RECORDING_EXTENSION
+        name = self.macro_name_input.text().strip()
+        if not name or os.path.basename(name) != name or name.startswith('.'):
+            self.macro_status.setText("Enter a name for the recording")
+            return None
+        return os.path.join(self.macro_directory, name + RECORDING_EXTENSION)
+
+    def _toggle_input_recording(self):
+        """Start or finish recording mouse and keyboard input"""
+        if self.engine.input_recorder:
+            events, dropped = self.engine.stop_input_recording()
+            self.record_button.setText("Record Input")
+            self.macro_status.setText(f"Recorded {events} events ({dropped} dropped)")
+            return
+        path = self._recording_path()
+        if path is None:
+            return
+        try:
+            os.makedirs(self.macro_directory, exist_ok=True)
+            self.engine.start_input_recording(path)
+        except Exception as e:
+            self.macro_status.setText(f"Error recording input: {e}")
+            return
+        self.record_button.setText("Stop Recording")
+        self.macro_status.setText(f"Recording to {path}")
+
+    def _play_recording(self):
+        """Replay the recording saved under the entered name"""
+        from recorder import RecordingFile, RecordingReader
+        path = self._recording_path()
+        if path is None:
+            return
+        try:
+            with RecordingReader(path) as reader:
+                count, duration = reader.summary()
+        except (OSError, ValueError) as e:
+            self.macro_status.setText(f"Error opening recording: {e}")
+            return
+        self.macro_status.setText(f"Playing {path}, {count} events over {duration:.1f} s")
+        self.engine.play_macro(RecordingFile(path))
+
+    def _play_macro(self):
+        """Compile and start the macro in the editor"""
+        timeline = self._compile_macro()
+        if timeline is not None:
+            self.engine.play_macro(timeline)
+
+    def _apply_styling(self):
+        """Apply stylesheet to the application"""
+        self.setStyleSheet("""
+            QMainWindow { background-color: #f0f0f0; }
+            QPushButton {
+                background-color: #4CAF50;
+                color: white;
+                border-radius: 5px;
+            }
+            QPushButton:hover { background-color: #45a049; }
+            QCheckBox {
+                margin: 2px;
+                padding: 2px;
+                min-height: 25px;
+            }
+            QHBoxLayout { margin: 5px; spacing: 10px; }
+            QLineEdit { padding: 2px 5px; }
+            QLabel { margin: 2px; }
+        """)
+
+    def _load_config(self):
+        """Load configuration from file"""
+        try:
+            # Let the engine read the file, then show what it loaded
+            self._show_config(self.engine.load_config())
+            self._refresh_profiles()
+        except Exception as e:
+            LOG.error('config_error', f"Error loading config: {e}", error=str(e))
+        self._publish_settings()
+
+    def _show_config(self, config):
+        """Show hotkeys and config.txt style settings without publishing per widget"""
+        for action in HOTKEY_CONFIG_KEYS:
+            self.hotkey_displays[action].setText(format_hotkey(self.engine.hotkey_bindings[action]))
+        self.loading_config = True
+        try:
+            defaults = Settings().to_config()
+            for key, widget in self.setting_widgets.items():
+                self._set_widget_value(widget, config.get(key, defaults[key]))
+        finally:
+            self.loading_config = False
+
+    def _show_engine_settings(self):
+        """Show settings the engine took from a profile switch or the control API"""
+        self._show_config(self.engine.settings.current.to_config())
+        self._mark_invalid_setting(None)
+        self._refresh_profiles()
+
+    def _refresh_profiles(self):
+        """List the loaded profiles with the active one selected"""
+        self.profile_combo.blockSignals(True)
+        self.profile_combo.clear()
+        self.profile_combo.addItems(self.engine.profiles.names())
+        self.profile_combo.setCurrentText(self.engine.active_profile or '')
+        self.profile_combo.blockSignals(False)
+
+    def _save_profile(self):
+        """Save the current settings and hotkeys under the name in the profile box"""
+        name = self.profile_combo.currentText().strip()
+        try:
+            self.engine.save_profile(name)
+            LOG.info('profile_saved', f"Saved profile {name}", profile=name)
+        except (ValueError, OSError) as e:
+            LOG.error('profile_error', f"Error saving profile: {e}", profile=name, error=str(e))
+        self._refresh_profiles()
+
+    def _set_widget_value(self, widget, value):
+        """Show a config.txt style value in a setting widget"""
+        if isinstance(widget, QCheckBox):
+            widget.setChecked(value.lower() == 'true')
+        elif isinstance(widget, QComboBox):
+            if widget.findText(value) >= 0:
+                widget.setCurrentText(value)
+        else:
+            widget.setText(value)
+
+    def _collect_config(self):
+        """Read every setting widget into config.txt style strings"""
+        current = self.engine.settings.current.to_config()
+        config = {key: current[key] for key in HIDDEN_SETTING_KEYS}
+        for key, widget in self.setting_widgets.items():
+            if isinstance(widget, QCheckBox):
+                config[key] = str(widget.isChecked()).lower()
+            elif isinstance(widget, QComboBox):
+                config[key] = widget.currentText()
+            else:
+                config[key] = widget.text()
+        return config
+
+    def _publish_settings(self):
+        """Validate the inputs and hand running tasks a new settings snapshot"""
+        if self.loading_config:
+            return
+        try:
+            settings = Settings.from_config(self._collect_config())
+        except SettingsError as e:
+            LOG.warning('setting_invalid', f"Invalid setting {e}, keeping previous values",
+                        field=e.field)
+            self._mark_invalid_setting(e.field)
+            return
+        self._mark_invalid_setting(None)
+        self.engine.publish_settings(settings)
+
+    def _mark_invalid_setting(self, field):
+        """Outline the input holding an invalid value"""
+        if field == self.invalid_setting:
+            return
+        for key in (self.invalid_setting, field):
+            widget = self.setting_widgets.get(key)
+            if isinstance(widget, QLineEdit):
+                widget.setStyleSheet("border: 1px solid #f44336;" if key == field else "")
+        self.invalid_setting = field
+
+    def _start_hotkey_recording(self, action):
+        """Start recording hotkey combination"""
+        display = self.hotkey_displays[action]
+        display.setText("Press keys together...")
+
+        def show(text):
+            self.dispatcher.call.emit(lambda: display.setText(text))
+
+        self.engine.start_hotkey_recording(action, show, show)
+
+    def _update_delay_display(self):
+        """Repaint the labels whose published metrics changed since the last frame"""
+        version, values = self.engine.metrics.snapshot()
+        if version == self.painted_version:
+            return
+        self.painted_version = version
+
+        if self.engine.clicking:
+            delay_ms = int(values[CURRENT_DELAY] * 1000)
+            late_ms = values[CLICK_LATENESS] / 1e6
+            self._paint_label(self.delay_label, f"Click Delay: {delay_ms} ms (late {late_ms:.2f} ms)")
+        else:
+            self._paint_label(self.delay_label, "Click Delay: 0.0 ms")
+        self._paint_label(self.clicks_label, f"Clicks: {values[CLICKS_DONE]}")
+        self._update_cps_display(values[CPS_TRACKING])
+
+        self._update_command_display(values[NEXT_COMMAND])
+
+        self._paint_label(self.thread_status, f"Thread Status: {values[LISTENER_STATUS]}")
+        hotkey_state = "YES" if values[HOTKEY_PRESSED] else "None"
+        self._paint_label(self.hotkey_press_status, f"Last Hotkey Press: {hotkey_state}")
+
+    def _update_cps_display(self, tracking):
+        """Show the delivered rate against the target and whether it is within tolerance"""
+        if tracking is None:
+            self._paint_label(self.cps_label, "")
+            return
+        from cadence import CPS_TOLERANCE
+        realized, target, error, forgiven = tracking
+        status = "on target" if abs(error) <= CPS_TOLERANCE else "off target"
+        text = f"CPS: {realized:.2f} / {target:g} ({error:+.1%}, {status} ±{CPS_TOLERANCE:.0%})"
+        if forgiven > 0:
+            text += f", {forgiven:.0f} clicks forgiven"
+        self._paint_label(self.cps_label, text)
+
+    def _update_command_display(self, next_command):
+        """Show a countdown to the next queued chat command"""
+        if next_command is None:
+            self._paint_label(self.command_timer_label, "Next command in: --")
+        elif next_command == COMMAND_ERROR:
+            self._paint_label(self.command_timer_label, "Command Error!")
+        else:
+            text, due_ns = next_command
+            seconds = max(0, (due_ns - time.perf_counter_ns()) // 1_000_000_000)
+            self._paint_label(self.command_timer_label, f"Next {text} in: {seconds}s")
+
+    def _update_telemetry_display(self):
+        """Repaint rolling lateness and injection percentiles"""
+        # The countdown ticks without new metrics, refresh it on this slower timer
+        self._update_command_display(self.engine.metrics.snapshot()[1][NEXT_COMMAND])
+        lateness, inject = self.engine.telemetry.rolling()
+        if lateness[0] is None:
+            self._paint_label(self.lateness_label, "Lateness p50/p99/p99.9: --")
+            self._paint_label(self.inject_label, "Click Injection p50/p99/p99.9: --")
+            return
+        late_text = " / ".join(f"{value / 1e6:.2f}" for value in lateness)
+        inject_text = " / ".join(f"{value / 1e3:.0f}" for value in inject)
+        self._paint_label(self.lateness_label, f"Lateness p50/p99/p99.9: {late_text} ms")
+        self._paint_label(self.inject_label, f"Click Injection p50/p99/p99.9: {inject_text} µs")
+
+    def _export_telemetry(self):
+        """Save the recent click timing samples as CSV or JSON lines"""
+        path, _ = QFileDialog.getSaveFileName(self, "Export Timing", "timing.csv",
+                                              "CSV (*.csv);;JSON Lines (*.jsonl)")
+        if not path:
+            return
+        try:
+            count = self.engine.telemetry.export(path)
+            LOG.info('timing_exported', f"Exported {count} click samples to {path}",
+                     path=path, samples=count)
+        except Exception as e:
+            LOG.error('timing_error', f"Error exporting timing: {e}", path=path, error=str(e))
+
+    def _paint_label(self, label, text):
+        """Set label text only when it differs from what is on screen"""
+        if self.painted_text.get(label) != text:
+            label.setText(text)
+            self.painted_text[label] = text
+
+    def toggle_clicking(self):
+        """Toggle auto-clicking state"""
+        self.engine.toggle()
+
+    def _update_timers(self):
+        """Run the repaint timers only while clicking and visible, so an idle window never wakes"""
+        wanted = self.engine.state() in ("running", "paused") and self.isVisible() and not self.isMinimized()
+        if wanted == self.update_timer.isActive():
+            return
+        if wanted:
+            self.update_timer.start()
+            self.telemetry_timer.start()
+        else:
+            self.update_timer.stop()
+            self.telemetry_timer.stop()
+        # Paint once on every switch so the labels hold the latest values
+        self._update_delay_display()
+        self._update_telemetry_display()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self._update_timers()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self._update_timers()
+
+    def changeEvent(self, event):
+        super().changeEvent(event)
+        if event.type() == QEvent.Type.WindowStateChange:
+            self._update_timers()
+
+    def _show_state(self, state):
+        """Reflect the engine state on the toggle button and status label"""
+        self._update_timers()
+        if state in ("stopped", "stopping"):
+            self.toggle_button.setText("Start Auto Clicking")
+            self.toggle_button.setStyleSheet("background-color: #4CAF50;")
+            self.status_label.setText("Status: Stopped" if state == "stopped"
+                                      else "Status: Stopping, waiting for the last run to finish")
+        else:
+            self.toggle_button.setText("Stop Auto Clicking")
+            self.toggle_button.setStyleSheet("background-color: #f44336;")
+            self.status_label.setText("Status: Paused" if state == "paused" else "Status: Running")
+
+    def closeEvent(self, event):
+        """Handle application closure"""
+        self.update_timer.stop()
+        self.telemetry_timer.stop()
+        self.engine.close()
+        event.accept()
+
+    def _on_checkbox_changed(self, checkbox_name):
+        """Handle checkbox state changes"""
+        checked = getattr(self, f'{checkbox_name}_checkbox').isChecked()
+        LOG.debug('checkbox_changed', f"{checkbox_name} checkbox changed to: {checked}",
+                  checkbox=checkbox_name, checked=checked)
+
+def run_gui(config_path=DEFAULT_CONFIG_PATH, argv=None, profile=None, control=None,
+            metrics_port=None, meter=None):
+    """Show the window and run the Qt event loop, with the control API and metrics if asked for"""
+    profile = profile or StartupProfile(enabled=False)
+    with profile.phase("QApplication"):
+        app = QApplication(argv or sys.argv)
+    window = AutoClicker(config_path, profile)
+    if meter:
+        meter.attach(window.engine)
+    with profile.phase("show"):
+        window.show()
+    if profile.enabled:
+        # The first event loop pass paints the window, report right after it
+        QTimer.singleShot(0, lambda: _report_startup(profile))
+    from control import start_control
+    server = start_control(window.engine, config_path, control, metrics_port)
+    try:
+        return app.exec()
+    finally:
+        if server:
+            server.close()
+
+def _report_startup(profile):
+    profile.mark_first_window()
+    profile.uninstall()
+    print(profile.report())
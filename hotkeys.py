@@ -0,0 +1,126 @@
+import time
+
+# Constants
+DEFAULT_DEBOUNCE_MS = 150  # Ignore a binding firing again this soon after the last time
+MODIFIERS = ('ctrl', 'shift', 'alt', 'cmd')
+KEY_ALIASES = {
+    'ctrl_l': 'ctrl', 'ctrl_r': 'ctrl',
+    'shift_l': 'shift', 'shift_r': 'shift',
+    'alt_l': 'alt', 'alt_r': 'alt', 'alt_gr': 'alt',
+    'cmd_l': 'cmd', 'cmd_r': 'cmd',
+}
+DISPLAY_NAMES = {'ctrl': 'Ctrl', 'shift': 'Shift', 'alt': 'Alt', 'cmd': 'Cmd', 'space': 'Space'}
+
+
+def normalize_key(key):
+    """Map a pynput key to a token with left and right modifiers unified"""
+    name = getattr(key, 'name', None)  # Special keys are Key enum members
+    if name is not None:
+        return KEY_ALIASES.get(name, name)
+    char = getattr(key, 'char', None)
+    if char and char.isprintable():
+        return char.lower()
+    vk = getattr(key, 'vk', None)
+    if vk is not None:
+        # Holding Ctrl turns letters into control characters, fall back to the key code
+        if 65 <= vk <= 90 or 48 <= vk <= 57:
+            return chr(vk).lower()
+        return f'vk{vk}'
+    return str(key)
+
+
+def parse_hotkey(text):
+    """Parse a saved 'Ctrl + A' style hotkey into tokens"""
+    if not text or text == 'NONE':
+        return ()
+    return tuple(KEY_ALIASES.get(part.lower(), part.lower())
+                 for part in text.split(' + ') if part)
+
+
+def format_hotkey(tokens):
+    """Display tokens as 'Ctrl + A', modifiers first"""
+    if not tokens:
+        return 'NONE'
+    ordered = sorted(tokens, key=lambda token: token not in MODIFIERS)
+    names = []
+    for token in ordered:
+        if token in DISPLAY_NAMES:
+            names.append(DISPLAY_NAMES[token])
+        elif len(token) == 1:
+            names.append(token.upper())
+        else:
+            names.append(token)
+    return " + ".join(names)
+
+
+class HotkeyMatcher:
+    """Matches key events against any number of bindings in constant time
+
+    Every distinct key token gets one bit, pressed keys are kept as an
+    integer mask, and bindings are a dict from mask to action, so a key
+    event is one dict lookup however many bindings exist. Auto-repeat
+    presses of a key already held are ignored.
+    """
+
+    def __init__(self, debounce_ms=DEFAULT_DEBOUNCE_MS):
+        self.debounce_ns = int(debounce_ms * 1e6)
+        self.pressed = 0
+        self._bits = {}
+        self._bindings = {}
+        self._masks = {}
+        self._last_fired = {}
+
+    def _bit(self, token):
+        bit = self._bits.get(token)
+        if bit is None:
+            bit = 1 << len(self._bits)
+            self._bits[token] = bit
+        return bit
+
+    def bind(self, action, tokens):
+        """Bind an action to a key combination, replacing its previous binding"""
+        self.unbind(action)
+        if not tokens:
+            return
+        mask = 0
+        for token in tokens:
+            mask |= self._bit(token)
+        self._bindings[mask] = action
+        self._masks[action] = mask
+
+    def unbind(self, action):
+        """Remove an action's binding if it has one"""
+        mask = self._masks.pop(action, None)
+        if mask is not None and self._bindings.get(mask) == action:
+            del self._bindings[mask]
+
+    def press(self, key, now_ns=None):
+        """Register a key press and return the action it completes, if any"""
+        bit = self._bit(normalize_key(key))
+        if self.pressed & bit:
+            return None  # Auto-repeat while held
+        self.pressed |= bit
+        action = self._bindings.get(self.pressed)
+        if action is None:
+            return None
+        now = time.monotonic_ns() if now_ns is None else now_ns
+        last = self._last_fired.get(action)
+        if last is not None and now - last < self.debounce_ns:
+            return None
+        self._last_fired[action] = now
+        return action
+
+    def release(self, key):
+        """Register a key release"""
+        bit = self._bits.get(normalize_key(key))
+        if bit is not None:
+            self.pressed &= ~bit
+
+    def is_held(self, action):
+        """Whether every key of an action's binding is currently down"""
+        mask = self._masks.get(action)
+        return bool(mask) and self.pressed & mask == mask
+
+    def reset(self):
+        """Forget all pressed keys"""
+        self.pressed = 0
@@ -0,0 +1,99 @@
+import threading
+import time
+
+from eventlog import LOG
+
+# Constants
+BACKOFF_INITIAL = 0.5  # seconds before the first restart after the listener dies
+BACKOFF_MAX = 30.0  # seconds, restart delay stops doubling here
+BACKOFF_RESET = 60.0  # seconds a listener must stay up before the delay starts over
+READY_TIMEOUT = 5.0  # seconds start() waits for the first listener to hook in
+
+
+class ListenerSupervisor:
+    """Owns the one global keyboard listener for the lifetime of the app
+
+    A supervisor thread starts the pynput listener and then blocks in
+    join() until it exits, so a dead hook is noticed the moment it dies
+    instead of by polling. It is restarted with exponential backoff, and
+    on_status(text) is pushed on every change. Key state lives with the
+    callbacks, not the listener, so it survives restarts.
+    """
+
+    def __init__(self, on_press, on_release, on_status=None):
+        self.on_press = on_press
+        self.on_release = on_release
+        self.on_status = on_status or (lambda text: None)
+        self.listener = None
+        self.restarts = 0
+        self._stopping = threading.Event()
+        self._first_attempt = threading.Event()
+        self._thread = None
+
+    def is_alive(self):
+        listener = self.listener
+        return listener is not None and listener.is_alive()
+
+    def start(self):
+        """Start supervising if not already, waiting briefly for the hook to be in place"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._first_attempt.clear()
+        self._thread = threading.Thread(target=self._supervise)
+        self._thread.daemon = True
+        self._thread.start()
+        self._first_attempt.wait(READY_TIMEOUT)
+
+    def stop(self):
+        """Stop the listener for good"""
+        self._stopping.set()
+        listener = self.listener
+        if listener:
+            listener.stop()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(READY_TIMEOUT)
+        self._thread = None
+
+    def _supervise(self):
+        backoff = BACKOFF_INITIAL
+        while not self._stopping.is_set():
+            started = time.monotonic()
+            try:
+                self._run_listener()
+                reason = "Stopped"
+            except Exception as e:
+                reason = f"Error - {e}"
+            finally:
+                self.listener = None
+                self._first_attempt.set()
+            if self._stopping.is_set():
+                break
+            if time.monotonic() - started >= BACKOFF_RESET:
+                backoff = BACKOFF_INITIAL
+            self.restarts += 1
+            LOG.count('listener_restarts')
+            LOG.warning('listener_restart', f"Hotkey listener exited ({reason}), restarting in {backoff:g}s",
+                        reason=reason, backoff=backoff, restarts=self.restarts)
+            self.on_status(f"{reason}, restarting in {backoff:g}s")
+            if self._stopping.wait(backoff):
+                break
+            backoff = min(backoff * 2, BACKOFF_MAX)
+        self.on_status("Stopped")
+
+    def _run_listener(self):
+        """Run one listener until it exits, re-raising whatever killed it"""
+        from pynput import keyboard
+
+        listener = keyboard.Listener(on_press=self.on_press, on_release=self.on_release)
+        listener.daemon = True
+        self.listener = listener
+        listener.start()
+        # Block until the OS hook is in place so the status is accurate
+        listener.wait()
+        if self._stopping.is_set():
+            listener.stop()
+        else:
+            self.on_status("Running")
+        self._first_attempt.set()
+        listener.join()
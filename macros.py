@@ -0,0 +1,294 @@
+import os
+import random
+from array import array
+
+# Constants
+MACRO_DIR = 'macros'
+MACRO_EXTENSION = '.txt'
+MAX_TIMELINE_EVENTS = 1_000_000  # Finite repeats are unrolled, refuse anything bigger
+CHAT_OPEN_DELAY = (200, 200)  # ms, after pressing t and before enter
+CHAT_KEY_DELAY = (50, 150)  # ms between typed characters
+
+# Event kinds, indexes into the playback dispatch table
+NOOP = 0
+CLICK = 1
+PRESS = 2
+RELEASE = 3
+MOVE = 4
+MOVE_BY = 5
+
+
+class MacroError(ValueError):
+    """A macro failed to compile; line is the 1-based source line"""
+
+    def __init__(self, line, message):
+        super().__init__(f"line {line}: {message}")
+        self.line = line
+
+
+class Timeline:
+    """A compiled macro as flat parallel arrays, one entry per event
+
+    Event i waits wait_min[i] plus up to wait_span[i] ns after event i-1,
+    then runs kinds[i] with values[i]. When loop_start is set, playback
+    wraps back to it after the last event instead of ending.
+    """
+
+    __slots__ = ('kinds', 'wait_min', 'wait_span', 'values', 'loop_start')
+
+    def __init__(self):
+        self.kinds = array('B')
+        self.wait_min = array('q')
+        self.wait_span = array('q')
+        self.values = []
+        self.loop_start = None
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def append(self, kind, wait_min, wait_span, value=None):
+        self.kinds.append(kind)
+        self.wait_min.append(wait_min)
+        self.wait_span.append(wait_span)
+        self.values.append(value)
+
+    def duration_range(self):
+        """Shortest and longest time for one pass, in seconds"""
+        shortest = sum(self.wait_min)
+        return shortest / 1e9, (shortest + sum(self.wait_span)) / 1e9
+
+    def play(self, backend, rng=None):
+        """Scheduler task that replays the timeline against an input backend
+
+        Each step is a fixed amount of work, an array lookup and one
+        dispatch, however long the macro is.
+        """
+        rng = rng or random.Random()
+        uniform = rng.random
+        held = set()
+
+        def press(key):
+            backend.press(key)
+            held.add(key)
+
+        def release(key):
+            backend.release(key)
+            held.discard(key)
+
+        def move_by(delta):
+            x, y = backend.position()
+            backend.move_to((x + delta[0], y + delta[1]))
+
+        actions = (lambda value: None, lambda value: backend.click(), press, release,
+                   backend.move_to, move_by)
+        kinds, wait_min, wait_span, values = self.kinds, self.wait_min, self.wait_span, self.values
+        count = len(kinds)
+        index = 0
+        try:
+            while index < count:
+                span = wait_span[index]
+                yield (wait_min[index] + (span * uniform() if span else 0)) / 1e9
+                actions[kinds[index]](values[index])
+                index += 1
+                if index == count and self.loop_start is not None:
+                    index = self.loop_start
+        finally:
+            # Never leave a key held down when the macro is stopped mid-hold
+            for key in list(held):
+                backend.release(key)
+
+
+def _parse_ms(text, line):
+    """Parse '200' or '100-300' milliseconds into (min_ns, span_ns)"""
+    low, _, high = text.partition('-')
+    try:
+        low_ms = float(low)
+        high_ms = float(high) if high else low_ms
+    except ValueError:
+        raise MacroError(line, f"'{text}' is not a duration in ms")
+    if low_ms < 0 or high_ms < low_ms:
+        raise MacroError(line, f"'{text}' is not a valid duration range")
+    return int(low_ms * 1e6), int((high_ms - low_ms) * 1e6)
+
+
+def _parse_coordinate(text, line):
+    try:
+        return int(text)
+    except ValueError:
+        raise MacroError(line, f"'{text}' is not a pixel coordinate")
+
+
+def _parse_block(lines, start, depth):
+    """Parse statements until 'end' or the end of input into ('wait'|'event'|'repeat') ops"""
+    ops = []
+    index = start
+    while index < len(lines):
+        line_number, words = lines[index]
+        command = words[0]
+        args = words[1:]
+        index += 1
+        if command == 'end':
+            if depth == 0:
+                raise MacroError(line_number, "'end' without 'repeat'")
+            return ops, index
+        if command == 'repeat':
+            if len(args) > 1:
+                raise MacroError(line_number, "usage: repeat [count]")
+            count = None
+            if args:
+                try:
+                    count = int(args[0])
+                except ValueError:
+                    raise MacroError(line_number, f"'{args[0]}' is not a repeat count")
+                if count < 0:
+                    raise MacroError(line_number, "repeat count must not be negative")
+            body, index = _parse_block(lines, index, depth + 1)
+            if count is None and (depth or index < len(lines)):
+                raise MacroError(line_number, "'repeat' without a count must be the last block")
+            if count is None and _shortest_wait(body) == 0 and any(op[0] != 'wait' for op in body):
+                # Would replay its events back to back without ever yielding time
+                raise MacroError(line_number, "'repeat' without a count needs a wait above 0 ms")
+            ops.append(('repeat', count, body))
+        elif command == 'wait' and len(args) == 1:
+            ops.append(('wait',) + _parse_ms(args[0], line_number))
+        elif command == 'click' and len(args) <= 1:
+            clicks = 1
+            if args:
+                try:
+                    clicks = int(args[0])
+                except ValueError:
+                    raise MacroError(line_number, f"'{args[0]}' is not a click count")
+            ops.extend([('event', CLICK, None)] * clicks)
+        elif command in ('press', 'release') and len(args) == 1:
+            ops.append(('event', PRESS if command == 'press' else RELEASE, args[0].lower()))
+        elif command == 'hold' and len(args) == 2:
+            key = args[0].lower()
+            ops.append(('event', PRESS, key))
+            ops.append(('wait',) + _parse_ms(args[1], line_number))
+            ops.append(('event', RELEASE, key))
+        elif command == 'move' and len(args) == 2:
+            relative = args[0][0] in '+-' and args[1][0] in '+-'
+            position = (_parse_coordinate(args[0], line_number),
+                        _parse_coordinate(args[1], line_number))
+            ops.append(('event', MOVE_BY if relative else MOVE, position))
+        elif command == 'say' and args:
+            ops.extend(_chat_ops(' '.join(args)))
+        else:
+            raise MacroError(line_number, f"unknown or malformed command: {' '.join(words)}")
+    if depth:
+        raise MacroError(lines[-1][0], "'repeat' without 'end'")
+    return ops, index
+
+
+def _shortest_wait(ops):
+    """Least total time one pass over ops waits, in ns"""
+    total = 0
+    for op in ops:
+        if op[0] == 'wait':
+            total += op[1]
+        elif op[0] == 'repeat':
+            total += op[1] * _shortest_wait(op[2])
+    return total
+
+
+def _chat_ops(text):
+    """Open chat, type text with human-like gaps and send it"""
+    open_min, open_max = CHAT_OPEN_DELAY
+    key_min, key_max = CHAT_KEY_DELAY
+    open_wait = ('wait', open_min * 1_000_000, (open_max - open_min) * 1_000_000)
+    key_wait = ('wait', key_min * 1_000_000, (key_max - key_min) * 1_000_000)
+    ops = [('event', PRESS, 't'), ('event', RELEASE, 't'), open_wait]
+    for char in text:
+        ops.extend([('event', PRESS, char), ('event', RELEASE, char), key_wait])
+    ops.extend([open_wait, ('event', PRESS, 'enter'), ('event', RELEASE, 'enter')])
+    return ops
+
+
+def chat_timeline(text):
+    """Timeline that sends one chat message, text is typed exactly as given"""
+    timeline = Timeline()
+    pending = _emit(_chat_ops(text), timeline, (0, 0))
+    timeline.append(NOOP, pending[0], pending[1])
+    return timeline
+
+
+def _emit(ops, timeline, pending):
+    """Flatten ops into the timeline, unrolling repeats; returns the carried-over wait"""
+    for op in ops:
+        if op[0] == 'wait':
+            pending = (pending[0] + op[1], pending[1] + op[2])
+        elif op[0] == 'event':
+            timeline.append(op[1], pending[0], pending[1], op[2])
+            pending = (0, 0)
+            if len(timeline) > MAX_TIMELINE_EVENTS:
+                raise MacroError(0, f"macro expands to more than {MAX_TIMELINE_EVENTS} events")
+        else:
+            _, count, body = op
+            if count is None:
+                if pending != (0, 0):
+                    # The wait before the loop must not repeat with it
+                    timeline.append(NOOP, pending[0], pending[1])
+                    pending = (0, 0)
+                timeline.loop_start = len(timeline)
+                pending = _emit(body, timeline, pending)
+            else:
+                for _ in range(count):
+                    pending = _emit(body, timeline, pending)
+    return pending
+
+
+def compile_macro(source):
+    """Compile macro source text into a Timeline
+
+    One command per line, '#' starts a comment, times are in ms:
+    click [count], press KEY, release KEY, hold KEY MS, move X Y,
+    move +DX -DY, wait MS, wait MIN-MAX, say TEXT, and repeat [count]
+    ... end. A repeat without a count loops forever, must come last and
+    must wait at least once per pass.
+    """
+    lines = []
+    for line_number, line in enumerate(source.splitlines(), 1):
+        words = line.split('#', 1)[0].split()
+        if words:
+            words[0] = words[0].lower()
+            lines.append((line_number, words))
+    ops, _ = _parse_block(lines, 0, 0)
+    timeline = Timeline()
+    pending = _emit(ops, timeline, (0, 0))
+    if pending != (0, 0):
+        # Keep trailing waits so loops and back-to-back runs honour them
+        timeline.append(NOOP, pending[0], pending[1])
+    if timeline.loop_start is not None and timeline.loop_start == len(timeline):
+        timeline.loop_start = None  # Empty forever loop, nothing to repeat
+    return timeline
+
+
+def macro_dir(config_path):
+    """Directory holding macro files next to the config file"""
+    return os.path.join(os.path.dirname(os.path.abspath(config_path)), MACRO_DIR)
+
+
+def list_macros(directory):
+    """Names of saved macros, sorted"""
+    if not os.path.isdir(directory):
+        return []
+    return sorted(name[:-len(MACRO_EXTENSION)] for name in os.listdir(directory)
+                  if name.endswith(MACRO_EXTENSION))
+
+
+def load_macro(directory, name):
+    """Read a saved macro's source text"""
+    with open(os.path.join(directory, name + MACRO_EXTENSION), 'r') as f:
+        return f.read()
+
+
+def save_macro(directory, name, source):
+    """Write a macro's source text, replacing any macro with that name"""
+    if not name or os.path.basename(name) != name or name.startswith('.'):
+        raise ValueError(f"Invalid macro name: {name!r}")
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, name + MACRO_EXTENSION)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w') as f:
+        f.write(source)
+    os.replace(temp_path, path)
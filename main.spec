@@ -10,7 +10,9 @@ a = Analysis(
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    # Qt modules and stdlib packages the clicker never loads, kept out of the archive
+    excludes=['tkinter', 'unittest', 'pydoc', 'PyQt6.QtNetwork', 'PyQt6.QtQml', 'PyQt6.QtQuick',
+              'PyQt6.QtSql', 'PyQt6.QtMultimedia', 'PyQt6.QtWebEngineCore', 'PyQt6.QtPdf'],
     noarchive=False,
     optimize=0,
 )
@@ -26,7 +28,8 @@ exe = EXE(
     debug=False,
     bootloader_ignore_signals=False,
     strip=False,
-    upx=True,
+    # UPX would be undone on every launch, decompressing all of Qt before the window shows
+    upx=False,
     upx_exclude=[],
     runtime_tmpdir=None,
     console=False,
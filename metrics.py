@@ -0,0 +1,53 @@
+import itertools
+
+# Metric slots
+CURRENT_DELAY = 0  # seconds, last delay handed to the scheduler
+CLICK_LATENESS = 1  # ns, how late the last click fired against its plan
+CLICKS_DONE = 2  # clicks injected this session
+NEXT_COMMAND = 3  # (text, due_ns) of the next chat command, None when idle, COMMAND_ERROR on failure
+LISTENER_STATUS = 4  # hotkey listener health text
+HOTKEY_PRESSED = 5  # whether the hotkey combination is currently held
+CPS_TRACKING = 6  # (realized_cps, target_cps, error, forgiven) in target CPS mode, None otherwise
+METRIC_COUNT = 7
+
+COMMAND_ERROR = -1
+
+DEFAULTS = (0.0, 0, 0, None, "Not Initialized", False, None)
+
+
+class MetricsBoard:
+    """Preallocated slots that worker threads publish into and the GUI samples
+
+    Every slot has a single writer, and a plain list store is atomic under
+    the GIL, so publishing never takes a lock or touches Qt. The version
+    moves on every publish so readers can skip frames where nothing
+    changed.
+    """
+
+    __slots__ = ('values', 'version', '_counter')
+
+    def __init__(self):
+        self.values = list(DEFAULTS)
+        self._counter = itertools.count(1)
+        self.version = 0
+
+    def set(self, slot, value):
+        """Publish a gauge value"""
+        self.values[slot] = value
+        self.version = next(self._counter)
+
+    def increment(self, slot, amount=1):
+        """Bump a counter owned by the calling thread"""
+        self.values[slot] += amount
+        self.version = next(self._counter)
+
+    def reset(self, *slots):
+        """Restore slots to their defaults"""
+        for slot in slots:
+            self.values[slot] = DEFAULTS[slot]
+        self.version = next(self._counter)
+
+    def snapshot(self):
+        """Return (version, values) as a consistent copy"""
+        version = self.version
+        return version, tuple(self.values)
@@ -0,0 +1,131 @@
+import functools
+
+from delays import load_numpy
+from trajectory import ELLIPSE_ASPECT, shape_point
+
+# Constants
+MOTION_PATHS = ("step", "line", "spline", "arc")  # step moves one table point per click
+DEFAULT_MOTION_PATH = "step"
+DEFAULT_MOTION_RATE = 120  # Hz, cursor updates per second for smooth paths
+DEFAULT_SPIN_TIME = 2000  # ms for one loop of the shape
+
+
+def _shape_points(shape, radius, ts):
+    """Vectorized shape_point over an array of parameters in [0, 1)"""
+    np = load_numpy()
+    angle = 2 * np.pi * ts
+    if shape == "circle":
+        return radius * np.cos(angle), radius * np.sin(angle)
+    if shape == "ellipse":
+        return radius * np.cos(angle), radius * ELLIPSE_ASPECT * np.sin(angle)
+    if shape == "figure-eight":
+        return radius * np.sin(angle), radius * np.sin(angle) * np.cos(angle)
+    # The square is piecewise linear, evaluate it point by point
+    points = [shape_point(shape, radius, t) for t in ts.tolist()]
+    return np.array([x for x, _ in points]), np.array([y for _, y in points])
+
+
+def _key_points(shape, radius, steps):
+    np = load_numpy()
+    return _shape_points(shape, radius, np.arange(steps) / steps)
+
+
+def _segment_numpy(path, shape, radius, steps, samples):
+    np = load_numpy()
+    if path == "arc":
+        xs, ys = _shape_points(shape, radius, np.arange(samples) / samples)
+    else:
+        kx, ky = _key_points(shape, radius, steps)
+        u = np.arange(samples) * (steps / samples)
+        k = u.astype(np.int64)
+        f = u - k
+        if path == "line":
+            k1 = (k + 1) % steps
+            xs = kx[k] + (kx[k1] - kx[k]) * f
+            ys = ky[k] + (ky[k1] - ky[k]) * f
+        else:
+            # Closed Catmull-Rom spline through the key points
+            p0, p1, p2, p3 = (k - 1) % steps, k, (k + 1) % steps, (k + 2) % steps
+            f2 = f * f
+            f3 = f2 * f
+            w0 = -0.5 * f3 + f2 - 0.5 * f
+            w1 = 1.5 * f3 - 2.5 * f2 + 1
+            w2 = -1.5 * f3 + 2 * f2 + 0.5 * f
+            w3 = 0.5 * f3 - 0.5 * f2
+            xs = w0 * kx[p0] + w1 * kx[p1] + w2 * kx[p2] + w3 * kx[p3]
+            ys = w0 * ky[p0] + w1 * ky[p1] + w2 * ky[p2] + w3 * ky[p3]
+    return np.rint(xs).astype(np.int64).tolist(), np.rint(ys).astype(np.int64).tolist()
+
+
+def _segment_python(path, shape, radius, steps, samples):
+    keys = [shape_point(shape, radius, i / steps) for i in range(steps)]
+    xs = []
+    ys = []
+    for i in range(samples):
+        if path == "arc":
+            x, y = shape_point(shape, radius, i / samples)
+        else:
+            u = i * steps / samples
+            k = int(u)
+            f = u - k
+            if path == "line":
+                (x0, y0), (x1, y1) = keys[k], keys[(k + 1) % steps]
+                x, y = x0 + (x1 - x0) * f, y0 + (y1 - y0) * f
+            else:
+                w = (-0.5 * f ** 3 + f * f - 0.5 * f, 1.5 * f ** 3 - 2.5 * f * f + 1,
+                     -1.5 * f ** 3 + 2 * f * f + 0.5 * f, 0.5 * f ** 3 - 0.5 * f * f)
+                ring = [keys[(k + j) % steps] for j in (-1, 0, 1, 2)]
+                x = sum(weight * point[0] for weight, point in zip(w, ring))
+                y = sum(weight * point[1] for weight, point in zip(w, ring))
+        xs.append(round(x))
+        ys.append(round(y))
+    return xs, ys
+
+
+@functools.lru_cache(maxsize=32)
+def segment(path, shape, radius, steps, samples):
+    """Integer (xs, ys) offsets for one loop of a shape, sampled evenly along the path
+
+    line and spline interpolate between the shape's steps key points,
+    arc samples the shape itself. Generated in one vectorized pass when
+    NumPy is available and cached by parameters.
+    """
+    if radius < 0 or steps < 1 or samples < 1:
+        raise ValueError("Radius must be >= 0, steps and samples >= 1")
+    if path not in MOTION_PATHS[1:]:
+        raise ValueError(f"Unknown motion path: {path}")
+    if load_numpy() is not None:
+        xs, ys = _segment_numpy(path, shape, radius, steps, samples)
+    else:
+        xs, ys = _segment_python(path, shape, radius, steps, samples)
+    return tuple(xs), tuple(ys)
+
+
+class Motion:
+    """Smooth movement around a drifting center, sampled by elapsed time
+
+    Positions come from the elapsed time rather than a step counter, so
+    a late update jumps straight to where the cursor should be now and
+    the points it missed are never sent. Drift is derived from the loop
+    count, leaving nothing to update between samples.
+    """
+
+    def __init__(self, origin, shape="circle", radius=5, steps=24, spins_before_drift=10,
+                 drift_pixels=2, path="spline", rate=DEFAULT_MOTION_RATE,
+                 spin_time=DEFAULT_SPIN_TIME / 1000):
+        samples = max(steps, int(round(rate * spin_time)))
+        self.xs, self.ys = segment(path, shape, radius, steps, samples)
+        self.samples = samples
+        self.rate = rate
+        self.interval = 1 / rate
+        self.center_x = int(round(origin[0]))
+        self.center_y = int(round(origin[1]))
+        self.spins_before_drift = max(1, spins_before_drift)
+        self.drift_pixels = drift_pixels
+
+    def position_at(self, elapsed_ns):
+        """Absolute cursor position elapsed_ns after the motion started"""
+        sample = elapsed_ns * self.rate // 1_000_000_000
+        spin, index = divmod(sample, self.samples)
+        drift = (spin // self.spins_before_drift) * self.drift_pixels
+        return (self.center_x + drift + self.xs[index], self.center_y + drift + self.ys[index])
@@ -0,0 +1,109 @@
+import os
+import threading
+
+from eventlog import LOG
+
+# Constants
+CONFIG_VERSION = 1
+DEFAULT_CONFIG_PATH = 'config.txt'
+DEFAULT_SAVE_DEBOUNCE = 0.5  # seconds, bursts of changes inside this window become one write
+
+
+def _migrate_v0(config):
+    """Files written before versioning have the same keys, just no version line"""
+    return config
+
+
+# Each entry upgrades a config dict from its key's version to the next one
+MIGRATIONS = {0: _migrate_v0}
+
+
+def read_config(path):
+    """Read a key=value config file, upgraded to the current schema version"""
+    config = {}
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            for line in f:
+                if '=' in line:
+                    key, value = line.strip().split('=', 1)
+                    config[key] = value.strip()
+    try:
+        version = int(config.pop('version', 0))
+    except ValueError:
+        LOG.warning('config_version_invalid', f"Invalid config version in {path}, reading as version 0",
+                    path=path)
+        version = 0
+    while version < CONFIG_VERSION:
+        config = MIGRATIONS[version](config)
+        version += 1
+    return config
+
+
+def write_config(path, config):
+    """Write a config file atomically by renaming a fully written temp file over it"""
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w') as f:
+        f.write(f'version={CONFIG_VERSION}\n')
+        for key, value in config.items():
+            f.write(f'{key}={value}\n')
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+class ConfigWriter:
+    """Coalesces config saves and writes them on a background thread
+
+    save() only stores the latest values and returns, so callers on the
+    GUI thread never wait on disk. The writer thread waits out the
+    debounce window after the first change, then writes whatever is
+    newest, skipping the write if nothing differs from the file.
+    """
+
+    def __init__(self, path, debounce=DEFAULT_SAVE_DEBOUNCE):
+        self.path = os.path.abspath(path)
+        self.debounce = debounce
+        self.writes = 0
+        self._pending = None
+        self._last_written = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def save(self, config):
+        """Queue config values to be written"""
+        with self._lock:
+            self._pending = dict(config)
+        self._wake.set()
+
+    def flush(self):
+        """Write any queued values right away on the calling thread"""
+        with self._lock:
+            config, self._pending = self._pending, None
+        if config is not None and config != self._last_written:
+            try:
+                write_config(self.path, config)
+                self._last_written = config
+                self.writes += 1
+                LOG.count('config_writes')
+                LOG.debug('config_saved', "Config saved successfully", path=self.path)
+            except Exception as e:
+                LOG.error('config_error', f"Error saving config: {e}", path=self.path, error=str(e))
+
+    def close(self):
+        """Stop the writer thread after writing anything still queued"""
+        self._closed.set()
+        self._wake.set()
+        self._thread.join()
+        self.flush()
+
+    def _run(self):
+        while not self._closed.is_set():
+            self._wake.wait()
+            self._wake.clear()
+            # Let the rest of the burst arrive, close() cuts the wait short
+            self._closed.wait(self.debounce)
+            self.flush()
@@ -0,0 +1,121 @@
+import os
+from dataclasses import dataclass
+
+from delays import make_distribution
+from eventlog import LOG
+from hotkeys import parse_hotkey
+from persistence import read_config, write_config
+from settings import Settings, SettingsError
+
+# Constants
+PROFILE_DIR = 'profiles'
+PROFILE_EXTENSION = '.txt'
+
+
+@dataclass(frozen=True)
+class Profile:
+    """A named setup compiled into everything a switch needs
+
+    settings is a validated snapshot, hotkeys maps config keys such as
+    'hotkey' to parsed tokens and distribution is the delay distribution
+    already built, so switching never parses or reads a file.
+    """
+
+    name: str
+    settings: Settings
+    hotkeys: dict
+    distribution: object
+
+
+def profile_dir(config_path):
+    """Directory holding profile files next to the config file"""
+    return os.path.join(os.path.dirname(os.path.abspath(config_path)), PROFILE_DIR)
+
+
+def compile_profile(name, config):
+    """Validate config.txt style values and build a Profile, raising SettingsError"""
+    settings = Settings.from_config(config)
+    try:
+        distribution = make_distribution(settings.delay_distribution, settings.min_delay,
+                                         settings.max_delay, settings.delay_histogram)
+    except (ValueError, OSError) as e:
+        raise SettingsError('delay_histogram', str(e))
+    hotkeys = {key: parse_hotkey(value) for key, value in config.items() if key.startswith('hotkey')}
+    return Profile(name, settings, hotkeys, distribution)
+
+
+class ProfileStore:
+    """Every saved profile, compiled when loaded or saved
+
+    Files use the config.txt format, one per profile in the profile
+    directory. A file that fails validation is reported and left out.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.profiles = {}
+
+    def __len__(self):
+        return len(self.profiles)
+
+    def __iter__(self):
+        return iter(self.profiles.values())
+
+    def load(self):
+        """Read and compile every profile file, replacing what was loaded before"""
+        profiles = {}
+        if self.directory and os.path.isdir(self.directory):
+            for filename in sorted(os.listdir(self.directory)):
+                if not filename.endswith(PROFILE_EXTENSION):
+                    continue
+                name = filename[:-len(PROFILE_EXTENSION)]
+                try:
+                    config = read_config(os.path.join(self.directory, filename))
+                    profiles[name] = compile_profile(name, config)
+                except (OSError, SettingsError) as e:
+                    LOG.warning('profile_skipped', f"Skipping profile {name}: {e}",
+                                profile=name, error=str(e))
+        self.profiles = profiles
+        return self.names()
+
+    def names(self):
+        return list(self.profiles)
+
+    def get(self, name):
+        return self.profiles.get(name)
+
+    def next_name(self, current):
+        """The profile after current in name order, wrapping around"""
+        names = self.names()
+        if not names:
+            return None
+        if current not in self.profiles:
+            return names[0]
+        return names[(names.index(current) + 1) % len(names)]
+
+    def distribution(self, settings):
+        """Precompiled delay distribution for settings, or None if no profile has it"""
+        for profile in self.profiles.values():
+            if profile.settings.delay_params == settings.delay_params:
+                return profile.distribution
+        return None
+
+    def save(self, name, config):
+        """Compile and write a profile, replacing any profile with that name"""
+        if not name or os.path.basename(name) != name or name.startswith('.'):
+            raise ValueError(f"Invalid profile name: {name!r}")
+        profile = compile_profile(name, config)
+        os.makedirs(self.directory, exist_ok=True)
+        write_config(os.path.join(self.directory, name + PROFILE_EXTENSION), config)
+        # Swap in a new dict so running tasks never see one change under them
+        profiles = dict(self.profiles)
+        profiles[name] = profile
+        self.profiles = dict(sorted(profiles.items()))
+        return profile
+
+    def delete(self, name):
+        """Remove a profile and its file"""
+        self.profiles = {key: profile for key, profile in self.profiles.items() if key != name}
+        path = os.path.join(self.directory, name + PROFILE_EXTENSION)
+        if os.path.exists(path):
+            os.remove(path)
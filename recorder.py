@@ -0,0 +1,432 @@
+import argparse
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+from array import array
+
+from hotkeys import normalize_key
+
+# Constants
+RECORDING_EXTENSION = '.rec'
+RECORDING_MAGIC = b'ACRC'
+RECORDING_VERSION = 1
+HEADER = struct.Struct('<4sB3xQ')  # magic, version, wall clock start in ns
+DEFAULT_RING_CAPACITY = 1 << 16  # events buffered between flushes
+FLUSH_INTERVAL = 0.25  # seconds between background flushes
+BUTTONS = ('left', 'right', 'middle')
+
+# Record kinds, each followed by a varint time delta in microseconds
+MOVE = 0  # zigzag dx, zigzag dy from the previous position
+MOUSE_PRESS = 1  # button index
+MOUSE_RELEASE = 2  # button index
+SCROLL = 3  # zigzag dx, zigzag dy
+KEY_PRESS = 4  # key id
+KEY_RELEASE = 5  # key id
+KEY_NAME = 6  # key id, byte length, utf-8 token; defines an id before its first use
+
+
+def _write_varint(out, value):
+    while value > 0x7f:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _zigzag(value):
+    return (value << 1) ^ (value >> 63)
+
+
+def _unzigzag(value):
+    return (value >> 1) ^ -(value & 1)
+
+
+class Recorder:
+    """Captures mouse and keyboard input into a ring buffer and streams it to a file
+
+    Listener callbacks only store four integers into preallocated arrays
+    under a short lock and return, so they stay cheap enough to share a
+    thread with the global hotkey. A background thread drains the ring
+    every FLUSH_INTERVAL and appends delta-encoded records to the file,
+    keeping memory flat however long the recording runs. Keyboard events
+    come in through key_press/key_release from the engine's existing
+    listener rather than a second keyboard hook.
+    """
+
+    def __init__(self, path, capacity=DEFAULT_RING_CAPACITY):
+        self.path = path
+        self.capacity = capacity
+        self.dropped = 0
+        self.events = 0
+        self._times = array('q', [0]) * capacity
+        self._kinds = array('B', [0]) * capacity
+        self._a = array('i', [0]) * capacity
+        self._b = array('i', [0]) * capacity
+        self._read = 0
+        self._write = 0
+        self._lock = threading.Lock()
+        self._key_ids = {}
+        self._written_key_ids = 0
+        self._last_time_us = None
+        self._last_x = 0
+        self._last_y = 0
+        self._file = None
+        self._mouse_listener = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Open the file and begin capturing mouse input"""
+        from pynput import mouse
+        # The hook is the part that can fail, so nothing is opened until it exists
+        listener = mouse.Listener(on_move=self._on_move, on_click=self._on_click,
+                                  on_scroll=self._on_scroll)
+        listener.daemon = True
+        self._file = open(self.path, 'wb')
+        try:
+            self._file.write(HEADER.pack(RECORDING_MAGIC, RECORDING_VERSION, time.time_ns()))
+            listener.start()
+        except Exception:
+            self._file.close()
+            self._file = None
+            raise
+        self._mouse_listener = listener
+        self._thread = threading.Thread(target=self._flush_loop)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop capturing, write everything buffered and close the file"""
+        if self._mouse_listener:
+            self._mouse_listener.stop()
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self._flush()
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def key_press(self, key):
+        self._store(KEY_PRESS, self._key_id(key), 0)
+
+    def key_release(self, key):
+        self._store(KEY_RELEASE, self._key_id(key), 0)
+
+    def _on_move(self, x, y):
+        self._store(MOVE, int(x), int(y))
+
+    def _on_click(self, x, y, button, pressed):
+        name = getattr(button, 'name', 'left')
+        index = BUTTONS.index(name) if name in BUTTONS else 0
+        self._store(MOUSE_PRESS if pressed else MOUSE_RELEASE, index, 0)
+
+    def _on_scroll(self, x, y, dx, dy):
+        self._store(SCROLL, int(dx), int(dy))
+
+    def _key_id(self, key):
+        token = normalize_key(key)
+        key_id = self._key_ids.get(token)
+        if key_id is None:
+            key_id = self._key_ids[token] = len(self._key_ids)
+        return key_id
+
+    def _store(self, kind, a, b):
+        now = time.perf_counter_ns()
+        with self._lock:
+            write = self._write
+            if write - self._read >= self.capacity:
+                self.dropped += 1
+                return
+            slot = write % self.capacity
+            self._times[slot] = now
+            self._kinds[slot] = kind
+            self._a[slot] = a
+            self._b[slot] = b
+            self._write = write + 1
+
+    def _flush_loop(self):
+        while not self._stop.wait(FLUSH_INTERVAL):
+            self._flush()
+
+    def _flush(self):
+        """Encode everything between the read and write counters and append it"""
+        if self._file is None:
+            return
+        write = self._write
+        out = bytearray()
+        names = list(self._key_ids)
+        for key_id in range(self._written_key_ids, len(names)):
+            token = names[key_id].encode()
+            out.append(KEY_NAME)
+            _write_varint(out, 0)
+            _write_varint(out, key_id)
+            _write_varint(out, len(token))
+            out += token
+        self._written_key_ids = len(names)
+        for index in range(self._read, write):
+            slot = index % self.capacity
+            time_us = self._times[slot] // 1000
+            if self._last_time_us is None:
+                self._last_time_us = time_us
+            kind = self._kinds[slot]
+            out.append(kind)
+            _write_varint(out, max(0, time_us - self._last_time_us))
+            self._last_time_us = max(time_us, self._last_time_us)
+            a = self._a[slot]
+            b = self._b[slot]
+            if kind == MOVE:
+                _write_varint(out, _zigzag(a - self._last_x))
+                _write_varint(out, _zigzag(b - self._last_y))
+                self._last_x, self._last_y = a, b
+            elif kind == SCROLL:
+                _write_varint(out, _zigzag(a))
+                _write_varint(out, _zigzag(b))
+            else:
+                _write_varint(out, a)
+        self.events += write - self._read
+        self._read = write
+        if out:
+            self._file.write(out)
+            self._file.flush()
+
+
+class _Truncated(Exception):
+    """A record runs past the end of the file"""
+
+
+class RecordingReader:
+    """Reads a recording through a memory map, decoding records on demand
+
+    Iterating yields (time_us, kind, a, b) with times from the start of
+    the recording, absolute positions for MOVE and key tokens for KEY_*
+    records. Only the pages being read are paged in, so hour-long
+    recordings stay out of RAM. A partial record at the end, left by a
+    recording that was cut off mid-write, ends the iteration. The reader
+    can be iterated and played any number of times; close it, or use it
+    as a context manager, when done.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        size = os.fstat(self._file.fileno()).st_size
+        if size < HEADER.size:
+            self._file.close()
+            raise ValueError(f"{path} is not a recording")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.started_ns = HEADER.unpack_from(self._map, 0)
+        if magic != RECORDING_MAGIC or version != RECORDING_VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a version {RECORDING_VERSION} recording")
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __iter__(self):
+        data = self._map
+        end = len(data)
+        position = HEADER.size
+        time_us = 0
+        x = y = 0
+        key_names = {}
+
+        def varint():
+            nonlocal position
+            result = 0
+            shift = 0
+            while True:
+                if position >= end:
+                    raise _Truncated
+                byte = data[position]
+                position += 1
+                result |= (byte & 0x7f) << shift
+                if byte < 0x80:
+                    return result
+                shift += 7
+
+        while position < end:
+            kind = data[position]
+            position += 1
+            try:
+                time_us += varint()
+                if kind == MOVE:
+                    x += _unzigzag(varint())
+                    y += _unzigzag(varint())
+                    record = time_us, kind, x, y
+                elif kind == SCROLL:
+                    record = time_us, kind, _unzigzag(varint()), _unzigzag(varint())
+                elif kind == KEY_NAME:
+                    key_id = varint()
+                    length = varint()
+                    if position + length > end:
+                        raise _Truncated
+                    key_names[key_id] = data[position:position + length].decode()
+                    position += length
+                    continue
+                elif kind in (KEY_PRESS, KEY_RELEASE):
+                    record = time_us, kind, key_names[varint()], 0
+                else:
+                    record = time_us, kind, BUTTONS[varint()], 0
+            except _Truncated:
+                return
+            yield record
+
+    def summary(self):
+        """Event count and duration in seconds, read in one streaming pass"""
+        count = 0
+        last_us = 0
+        for time_us, _, _, _ in self:
+            count += 1
+            last_us = time_us
+        return count, last_us / 1e6
+
+    def play(self, backend):
+        """Scheduler task that replays the recording against an input backend
+
+        Leaves the reader open so it can be played again.
+        """
+        held_keys = set()
+        held_buttons = set()
+        last_us = 0
+        try:
+            for time_us, kind, a, b in self:
+                if time_us > last_us:
+                    yield (time_us - last_us) / 1e6
+                    last_us = time_us
+                try:
+                    if kind == MOVE:
+                        backend.move_to((a, b))
+                    elif kind == MOUSE_PRESS:
+                        backend.mouse_press(a)
+                        held_buttons.add(a)
+                    elif kind == MOUSE_RELEASE:
+                        backend.mouse_release(a)
+                        held_buttons.discard(a)
+                    elif kind == SCROLL:
+                        backend.scroll(a, b)
+                    elif kind == KEY_PRESS:
+                        backend.press(a)
+                        held_keys.add(a)
+                    elif kind == KEY_RELEASE:
+                        backend.release(a)
+                        held_keys.discard(a)
+                except (KeyError, ValueError):
+                    pass  # A key this backend cannot send, skip it
+        finally:
+            for key in held_keys:
+                backend.release(key)
+            for button in held_buttons:
+                backend.mouse_release(button)
+
+
+class RecordingFile:
+    """A recording played by path, opened for each pass and closed when it ends
+
+    For callers like the GUI that hand playback to the scheduler and do
+    not hold a reader open themselves.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def play(self, backend):
+        with RecordingReader(self.path) as reader:
+            yield from reader.play(backend)
+
+
+def trim_recording(source, destination, start=0.0, end=None):
+    """Copy the part of a recording between start and end seconds to a new file"""
+    start_us = int(start * 1e6)
+    end_us = None if end is None else int(end * 1e6)
+    count = 0
+    with RecordingReader(source) as reader, open(destination, 'wb') as f:
+        f.write(HEADER.pack(RECORDING_MAGIC, RECORDING_VERSION, reader.started_ns + start_us * 1000))
+        out = bytearray()
+        key_ids = {}
+        last_us = start_us
+        last_x = last_y = 0
+        start_position = None
+        for time_us, kind, a, b in reader:
+            if time_us < start_us:
+                if kind == MOVE:
+                    start_position = (a, b)
+                continue
+            if end_us is not None and time_us > end_us:
+                break
+            if start_position:
+                # Begin where the cursor was when the kept range starts
+                out.append(MOVE)
+                _write_varint(out, 0)
+                _write_varint(out, _zigzag(start_position[0]))
+                _write_varint(out, _zigzag(start_position[1]))
+                last_x, last_y = start_position
+                start_position = None
+                count += 1
+            if kind in (KEY_PRESS, KEY_RELEASE):
+                if a not in key_ids:
+                    key_ids[a] = len(key_ids)
+                    token = a.encode()
+                    out.append(KEY_NAME)
+                    _write_varint(out, 0)
+                    _write_varint(out, key_ids[a])
+                    _write_varint(out, len(token))
+                    out += token
+                a = key_ids[a]
+            out.append(kind)
+            _write_varint(out, time_us - last_us)
+            last_us = time_us
+            if kind == MOVE:
+                _write_varint(out, _zigzag(a - last_x))
+                _write_varint(out, _zigzag(b - last_y))
+                last_x, last_y = a, b
+            elif kind == SCROLL:
+                _write_varint(out, _zigzag(a))
+                _write_varint(out, _zigzag(b))
+            elif kind in (MOUSE_PRESS, MOUSE_RELEASE):
+                _write_varint(out, BUTTONS.index(a))
+            else:
+                _write_varint(out, a)
+            count += 1
+            if len(out) >= 1 << 20:
+                f.write(out)
+                out = bytearray()
+        f.write(out)
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect or trim input recordings")
+    commands = parser.add_subparsers(dest='command', required=True)
+    info = commands.add_parser('info', help="show event count and duration")
+    info.add_argument('path')
+    trim = commands.add_parser('trim', help="copy a time range into a new recording")
+    trim.add_argument('source')
+    trim.add_argument('destination')
+    trim.add_argument('--start', type=float, default=0.0, help="seconds")
+    trim.add_argument('--end', type=float, help="seconds")
+    args = parser.parse_args(argv)
+
+    if args.command == 'info':
+        with RecordingReader(args.path) as reader:
+            count, duration = reader.summary()
+        print(f"{args.path}: {count} events, {duration:.1f} s, "
+              f"{os.path.getsize(args.path)} bytes")
+    else:
+        count = trim_recording(args.source, args.destination, args.start, args.end)
+        print(f"Wrote {count} events to {args.destination}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,292 @@
+import collections
+import heapq
+import itertools
+import threading
+import time
+
+from eventlog import LOG
+from timing import MonotonicClock, MAX_CATCHUP_INTERVALS
+
+# Constants
+PRIORITY_HIGH = 0  # Chat commands
+PRIORITY_NORMAL = 1  # Movement
+PRIORITY_LOW = 2  # Clicking
+LATE_TICK_NS = 5_000_000  # steps running later than this count as late ticks
+
+
+class Task:
+    """A feature running on the scheduler
+
+    The generator yields the delay in seconds until it wants to run again,
+    or None to sleep until wake(), and returns when the feature is
+    finished. group ties together the tasks of one session for
+    hold_others() and wake(). A wakeable task's timed waits are also cut
+    short by wake(), for tasks that wait on a deadline but must notice
+    settings changes sooner.
+    """
+
+    def __init__(self, name, generator, priority, group=None, wakeable=False):
+        self.name = name
+        self.generator = generator
+        self.priority = priority
+        self.group = group
+        self.wakeable = wakeable
+        self.steps = 0
+        self.cancelled = False
+        self.last_lateness_ns = 0
+        self.max_lateness_ns = 0
+        self.cpu_ns = 0
+
+
+class Scheduler:
+    """Runs every feature as a timed task on one shared timeline
+
+    Tasks due at the same instant run in priority order, then in the order
+    they were scheduled, so the interleaving is deterministic. Deadlines
+    are absolute, so the time a step spends injecting input does not push
+    later steps back.
+    """
+
+    def __init__(self, clock=None):
+        self.clock = clock or MonotonicClock()
+        self.tasks = {}
+        self.running = False
+        self.lateness_ns = 0
+        self.due_ns = 0
+        self.cpu_ns = 0
+        self.paused = False
+        self._paused_at = None
+        self._resumed = threading.Event()
+        self._queue = []
+        self._requests = collections.deque()  # (method, args) from other threads, in order
+        self._work = threading.Event()
+        self._holders = {}
+        self._parked = []
+        self._sleeping = {}  # tasks that yielded None, by name
+        self._sequence = itertools.count()
+
+    def add(self, name, generator, delay=0.0, priority=PRIORITY_LOW, group=None, wakeable=False):
+        """Schedule a generator task to take its first step after delay seconds"""
+        task = Task(name, generator, priority, group, wakeable)
+        self.tasks[name] = task
+        due = self.clock.now() + int(delay * 1e9)
+        heapq.heappush(self._queue, (due, priority, next(self._sequence), task))
+        return task
+
+    def submit(self, name, generator, delay=0.0, priority=PRIORITY_LOW, group=None, wakeable=False):
+        """Hand a task to a scheduler running on another thread
+
+        The run loop is woken to pick it up, so it starts after delay
+        even when the next step is a long way off.
+        """
+        self._request(self.add, (name, generator, delay, priority, group, wakeable))
+
+    def cancel(self, name):
+        """Drop a task now, closing its generator on the run loop; safe from any thread
+
+        Requests are handled in the order they were made, so a cancel
+        followed by a submit under the same name replaces the task.
+        """
+        self._request(self._cancel_task, (name,))
+
+    def cancel_group(self, group):
+        """Drop every task of a group, including ones submitted and not yet started"""
+        self._request(self._cancel_group, (group,))
+
+    def wake(self, group=None):
+        """Run a group's sleeping and wakeable tasks now; safe from any thread"""
+        self._request(self._wake_group, (group,))
+
+    def _wake_group(self, group):
+        now = self.clock.now()
+        for name, task in list(self._sleeping.items()):
+            if task.group == group:
+                del self._sleeping[name]
+                heapq.heappush(self._queue, (now, task.priority, next(self._sequence), task))
+        if any(entry[3].wakeable and entry[3].group == group and entry[0] > now for entry in self._queue):
+            self._queue = [(min(due, now) if task.wakeable and task.group == group else due,
+                            priority, sequence, task)
+                           for due, priority, sequence, task in self._queue]
+            heapq.heapify(self._queue)
+
+    def _request(self, method, args):
+        self._requests.append((method, args))
+        self._work.set()
+        self.clock.interrupt()
+
+    def _cancel_task(self, name):
+        task = self.tasks.get(name)
+        if task:
+            task.cancelled = True
+            task.generator.close()
+            self._drop(task)
+
+    def _cancel_group(self, group):
+        for name in [name for name, task in self.tasks.items() if task.group == group]:
+            self._cancel_task(name)
+
+    def hold_others(self, name):
+        """Run only the named task in its group until release_others(); call from its step
+
+        Tasks of the same group that come due meanwhile are parked instead
+        of run, so nothing else injects input between the holder's steps.
+        Other groups carry on.
+        """
+        self._holders[self.tasks[name].group] = name
+
+    def release_others(self, name):
+        """Let the tasks parked by name's hold run again, starting from now"""
+        group = self.tasks[name].group if name in self.tasks else None
+        for held_group, holder in list(self._holders.items()):
+            if holder == name:
+                group = held_group
+                del self._holders[held_group]
+        now = self.clock.now()
+        parked = []
+        for entry in self._parked:
+            due, priority, _, task = entry
+            if task.group == group:
+                heapq.heappush(self._queue, (max(due, now), priority, next(self._sequence), task))
+            else:
+                parked.append(entry)
+        self._parked = parked
+
+    def stop(self):
+        """Make the run loop exit now, waking it from any wait; safe from any thread"""
+        self.running = False
+        self._resumed.set()
+        self._work.set()
+        self.clock.interrupt()
+
+    def pause(self):
+        """Hold every task at its next step until resume() is called"""
+        if not self.paused:
+            self._resumed.clear()
+            self._paused_at = self.clock.now()
+            self.paused = True
+
+    def resume(self):
+        """Continue after pause(), pushing all deadlines back by the time spent paused"""
+        if self.paused:
+            self.paused = False
+            self._resumed.set()
+
+    def run(self, until_ns=None, persistent=False):
+        """Run due tasks in order until stopped, out of tasks or past until_ns
+
+        A persistent run does not end when it runs out of tasks but
+        blocks, with no timer, until submit() or stop(). A run whose only
+        tasks are sleeping blocks the same way until wake(), unless it has
+        an until_ns.
+        """
+        self.running = True
+        cpu_start = time.thread_time_ns()
+        try:
+            while self.running and (self._queue or self._requests or self._sleeping or persistent):
+                while self._requests:
+                    method, args = self._requests.popleft()
+                    method(*args)
+                if not self._queue:
+                    if self._requests:
+                        continue
+                    if not persistent and (until_ns is not None or not self._sleeping):
+                        break
+                    self._work.wait()
+                    self._work.clear()
+                    continue
+                due = self._queue[0][0]
+                if until_ns is not None and due > until_ns:
+                    break
+                lateness = self.clock.wait_until(due)
+                if not self.running:
+                    break
+                if lateness is None:
+                    continue  # Woken early by submit(), look at the queue again
+                if self._paused_at is not None:
+                    self._resumed.wait()
+                    self._shift(self.clock.now() - self._paused_at)
+                    self._paused_at = None
+                    continue
+                entry = heapq.heappop(self._queue)
+                task = entry[3]
+                holder = self._holders.get(task.group)
+                if holder is not None and task.name != holder:
+                    self._parked.append(entry)
+                    continue
+                self._step(task, due, lateness)
+        finally:
+            self.running = False
+            self._close_all()
+            self.cpu_ns += time.thread_time_ns() - cpu_start
+
+    def _step(self, task, due, lateness):
+        """Advance one task and put it back on the timeline"""
+        if task.cancelled:
+            task.generator.close()
+            self._drop(task)
+            return
+        self.lateness_ns = lateness
+        self.due_ns = due
+        task.last_lateness_ns = lateness
+        if lateness > task.max_lateness_ns:
+            task.max_lateness_ns = lateness
+        if lateness > LATE_TICK_NS:
+            LOG.count('late_ticks')
+        cpu_start = time.thread_time_ns()
+        try:
+            delay = next(task.generator)
+        except StopIteration:
+            self._drop(task)
+            return
+        except Exception as e:
+            LOG.error('task_error', f"Error in {task.name} task: {e}", task=task.name, error=str(e))
+            self._drop(task)
+            return
+        finally:
+            task.cpu_ns += time.thread_time_ns() - cpu_start
+        task.steps += 1
+        if delay is None:
+            self._sleeping[task.name] = task
+            return
+        interval = int(delay * 1e9)
+        next_due = due + interval
+        # After a long stall, drop the missed steps instead of firing them back to back
+        now = self.clock.now()
+        if now - next_due > max(interval, 1) * MAX_CATCHUP_INTERVALS:
+            LOG.debug('task_resync', f"{task.name} resynced after a {(now - next_due) / 1e6:.1f} ms stall",
+                      task=task.name, behind_ns=now - next_due)
+            next_due = now + interval
+        heapq.heappush(self._queue, (next_due, task.priority, next(self._sequence), task))
+
+    def _drop(self, task):
+        """Forget a finished task unless a newer one has taken its name"""
+        if self._holders.get(task.group) == task.name:
+            self.release_others(task.name)
+        if self.tasks.get(task.name) is task:
+            del self.tasks[task.name]
+        if self._sleeping.get(task.name) is task:
+            del self._sleeping[task.name]
+
+    def _shift(self, delta_ns):
+        """Move every pending deadline later by delta_ns"""
+        self._queue = [(due + delta_ns, priority, sequence, task)
+                       for due, priority, sequence, task in self._queue]
+        heapq.heapify(self._queue)
+
+    def _close_all(self):
+        """Close every pending generator so its cleanup code runs"""
+        while self._queue:
+            _, _, _, task = heapq.heappop(self._queue)
+            task.generator.close()
+        while self._requests:
+            method, args = self._requests.popleft()
+            if method == self.add:
+                args[1].close()
+        for _, _, _, task in self._parked:
+            task.generator.close()
+        self._parked = []
+        for task in self._sleeping.values():
+            task.generator.close()
+        self._sleeping = {}
+        self._holders.clear()
+        self.tasks.clear()
@@ -0,0 +1,169 @@
+import threading
+
+from backends import make_backend
+from engine import FeatureRunner
+from scheduler import Scheduler, PRIORITY_HIGH, PRIORITY_LOW
+from settings import Settings
+from timing import MonotonicClock
+
+
+class BackendPool:
+    """Input backends shared by every session aimed at the same target
+
+    One backend is built per (backend name, target), so sessions driving
+    the same display share its connection and cached keycodes.
+    """
+
+    def __init__(self, factory=make_backend):
+        self.factory = factory
+        self._backends = {}
+        self._lock = threading.Lock()
+
+    def get(self, name, target=None):
+        with self._lock:
+            backend = self._backends.get((name, target))
+            if backend is None:
+                backend = self._backends[(name, target)] = self.factory(name, target)
+            return backend
+
+    def close(self):
+        with self._lock:
+            for backend in self._backends.values():
+                backend.close()
+            self._backends = {}
+
+
+class Session(FeatureRunner):
+    """One independent clicker: its own settings, RNG, features and input target
+
+    Its tasks run on the manager's shared scheduler under the prefix
+    'NAME.', grouped so that a chat command typed in one session only
+    holds that session's other tasks. Delays refill on the click path,
+    so a session adds no threads.
+    """
+
+    def __init__(self, name, settings, backend, target=None, profiles=None, seed=None):
+        super().__init__(backend, profiles, task_prefix=f"{name}.", group=name, seed=seed)
+        self.name = name
+        self.target = target
+        self.active = False
+        self.background_refill = False
+        self.settings.publish(settings)
+
+    def _add_task(self, name, generator, priority=PRIORITY_LOW, wakeable=False):
+        self.scheduler.submit(self.task_prefix + name, generator, priority=priority,
+                              group=self.group, wakeable=wakeable)
+
+    def stats(self):
+        stats = super().stats()
+        stats.update(active=self.active, target=self.target)
+        return stats
+
+
+def _reset_telemetry(session):
+    """One-step task clearing a session's click timing"""
+    session.telemetry.reset()
+    yield from ()
+
+
+class SessionManager:
+    """Runs any number of sessions on one scheduler thread and one backend pool
+
+    Sessions are switched on and off independently; starting one submits
+    its tasks to the running scheduler and stopping one cancels its group,
+    so the thread count stays flat however many sessions there are.
+    run_in_background() starts the scheduler thread, which sleeps without
+    a timer while every session is off; run() drives it on the calling
+    thread instead, e.g. against recording backends and a simulated clock.
+    """
+
+    def __init__(self, clock=None, pool=None, profiles=None):
+        self.scheduler = Scheduler(clock or MonotonicClock())
+        self.pool = pool or BackendPool()
+        self.profiles = profiles
+        self.sessions = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def add(self, name, settings=None, backend=None, target=None, seed=None):
+        """Create a stopped session; backend defaults to the settings' input backend"""
+        if name in self.sessions:
+            raise ValueError(f"Session {name} already exists")
+        if '.' in name:
+            raise ValueError(f"Session names cannot contain '.': {name!r}")
+        settings = settings or Settings()
+        backend = self.pool.get(backend or settings.input_backend, target)
+        session = Session(name, settings, backend, target, self.profiles, seed)
+        session.scheduler = self.scheduler
+        self.sessions[name] = session
+        return session
+
+    def remove(self, name):
+        self.stop(name)
+        del self.sessions[name]
+
+    def start(self, name):
+        """Switch a session on"""
+        with self._lock:
+            session = self.sessions[name]
+            if session.active:
+                return
+            session.active = True
+            # Cleared on the scheduler thread, which may still be recording into it
+            self.scheduler.submit(session.task_prefix + "reset", _reset_telemetry(session),
+                                  priority=PRIORITY_HIGH, group=session.group)
+            session.schedule_features(session.settings.current)
+
+    def stop(self, name):
+        """Switch a session off, closing its tasks on the scheduler thread"""
+        with self._lock:
+            session = self.sessions[name]
+            if not session.active:
+                return
+            session.active = False
+            self.scheduler.cancel_group(session.group)
+
+    def toggle(self, name):
+        if self.sessions[name].active:
+            self.stop(name)
+        else:
+            self.start(name)
+
+    def start_all(self):
+        for name in list(self.sessions):
+            self.start(name)
+
+    def stop_all(self):
+        for name in list(self.sessions):
+            self.stop(name)
+
+    def stats(self):
+        """Per-session stats keyed by session name"""
+        return {name: session.stats() for name, session in self.sessions.items()}
+
+    def run_in_background(self):
+        """Start the shared scheduler thread if it is not running"""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run_persistent)
+            self._thread.daemon = True
+            self._thread.start()
+
+    def _run_persistent(self):
+        # Calibrated once for every session, before any of them clicks
+        self.scheduler.clock.calibrate()
+        self.scheduler.run(persistent=True)
+
+    def run(self, until_ns=None):
+        """Run the shared scheduler on this thread, e.g. with a simulated clock"""
+        self.scheduler.run(until_ns)
+
+    def close(self):
+        """Stop every session and the scheduler thread, then close the backends"""
+        self.scheduler.stop()
+        if self._thread:
+            self._thread.join()
+        for session in self.sessions.values():
+            session.active = False
+        self.pool.close()
@@ -0,0 +1,223 @@
+from dataclasses import dataclass
+
+from backends import BACKENDS, DEFAULT_BACKEND
+from commands import FEED_COMMAND, AFK_COMMAND, parse_commands, format_commands
+from delays import DISTRIBUTIONS
+from motion import MOTION_PATHS, DEFAULT_MOTION_PATH, DEFAULT_MOTION_RATE, DEFAULT_SPIN_TIME
+from timing import DEFAULT_SPIN_BUDGET_US
+from trajectory import SHAPES
+
+# Constants
+DEFAULT_CLICK_DELAY_MIN = 100  # ms
+DEFAULT_CLICK_DELAY_MAX = 300  # ms
+DEFAULT_WALK_INTERVAL_MIN = 3  # seconds
+DEFAULT_WALK_INTERVAL_MAX = 10  # seconds
+DEFAULT_WALK_DURATION_MIN = 50  # ms
+DEFAULT_WALK_DURATION_MAX = 150  # ms
+DEFAULT_CIRCLE_SPINS = 10
+DEFAULT_CIRCLE_DRIFT = 2
+DEFAULT_CIRCLE_RADIUS = 5
+DEFAULT_CIRCLE_STEPS = 24
+
+
+class SettingsError(ValueError):
+    """A setting failed validation; field is its config.txt key"""
+
+    def __init__(self, field, message):
+        super().__init__(f"{field}: {message}")
+        self.field = field
+
+
+def _parse_bool(config, key, default):
+    return config.get(key, str(default)).strip().lower() == 'true'
+
+
+def _parse_number(config, key, default, cast, minimum=None):
+    raw = config.get(key)
+    if raw is None or (default is None and raw.strip() == ''):
+        return default
+    try:
+        value = cast(raw)
+    except ValueError:
+        raise SettingsError(key, f"'{raw}' is not a valid number")
+    if minimum is not None and value < minimum:
+        raise SettingsError(key, f"must be at least {minimum}")
+    return value
+
+
+def _parse_choice(config, key, default, choices):
+    value = config.get(key, default) or default
+    if value not in choices:
+        raise SettingsError(key, f"must be one of {', '.join(choices)}")
+    return value
+
+
+def _parse_commands(config):
+    try:
+        return parse_commands(config.get('commands', ''))
+    except ValueError as e:
+        raise SettingsError('commands', str(e))
+
+
+def _format_number(value):
+    return f"{value:g}"
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Validated, immutable snapshot of every feature setting
+
+    Times are stored in seconds so running tasks can use them directly.
+    """
+
+    feed: bool = False
+    afk: bool = False
+    commands: tuple = ()
+    circle: bool = False
+    walk: bool = False
+    spins: int = DEFAULT_CIRCLE_SPINS
+    drift: int = DEFAULT_CIRCLE_DRIFT
+    shape: str = "circle"
+    radius: int = DEFAULT_CIRCLE_RADIUS
+    steps: int = DEFAULT_CIRCLE_STEPS
+    motion_path: str = DEFAULT_MOTION_PATH
+    motion_rate: int = DEFAULT_MOTION_RATE
+    spin_time: float = DEFAULT_SPIN_TIME / 1000
+    walk_min: float = DEFAULT_WALK_INTERVAL_MIN
+    walk_max: float = DEFAULT_WALK_INTERVAL_MAX
+    walk_duration_min: float = DEFAULT_WALK_DURATION_MIN / 1000
+    walk_duration_max: float = DEFAULT_WALK_DURATION_MAX / 1000
+    min_delay: float = DEFAULT_CLICK_DELAY_MIN / 1000
+    max_delay: float = DEFAULT_CLICK_DELAY_MAX / 1000
+    delay_distribution: str = "uniform"
+    delay_seed: object = None
+    delay_histogram: str = ""
+    target_cps: float = 0.0  # 0 uses min_delay/max_delay instead
+    cps_variance: float = 0.0
+    spin_budget_us: int = DEFAULT_SPIN_BUDGET_US
+    input_backend: str = DEFAULT_BACKEND
+
+    @classmethod
+    def from_config(cls, config):
+        """Build settings from config.txt style strings, raising SettingsError on bad input"""
+        settings = cls(
+            feed=_parse_bool(config, 'feed', False),
+            afk=_parse_bool(config, 'afk', False),
+            commands=_parse_commands(config),
+            circle=_parse_bool(config, 'circle', False),
+            walk=_parse_bool(config, 'walk', False),
+            spins=_parse_number(config, 'spins', DEFAULT_CIRCLE_SPINS, int, 1),
+            drift=_parse_number(config, 'drift', DEFAULT_CIRCLE_DRIFT, int),
+            shape=_parse_choice(config, 'shape', "circle", SHAPES),
+            radius=_parse_number(config, 'radius', DEFAULT_CIRCLE_RADIUS, int, 0),
+            steps=_parse_number(config, 'steps', DEFAULT_CIRCLE_STEPS, int, 1),
+            motion_path=_parse_choice(config, 'motion_path', DEFAULT_MOTION_PATH, MOTION_PATHS),
+            motion_rate=_parse_number(config, 'motion_rate', DEFAULT_MOTION_RATE, int, 1),
+            spin_time=_parse_number(config, 'spin_time', DEFAULT_SPIN_TIME, int, 1) / 1000,
+            walk_min=_parse_number(config, 'walk_min', DEFAULT_WALK_INTERVAL_MIN, float, 0),
+            walk_max=_parse_number(config, 'walk_max', DEFAULT_WALK_INTERVAL_MAX, float, 0),
+            walk_duration_min=_parse_number(config, 'walk_duration_min',
+                                            DEFAULT_WALK_DURATION_MIN, float, 0) / 1000,
+            walk_duration_max=_parse_number(config, 'walk_duration_max',
+                                            DEFAULT_WALK_DURATION_MAX, float, 0) / 1000,
+            min_delay=_parse_number(config, 'min_delay', DEFAULT_CLICK_DELAY_MIN, int, 1) / 1000,
+            max_delay=_parse_number(config, 'max_delay', DEFAULT_CLICK_DELAY_MAX, int, 1) / 1000,
+            delay_distribution=_parse_choice(config, 'delay_distribution', "uniform", DISTRIBUTIONS),
+            delay_seed=_parse_number(config, 'delay_seed', None, int, 0),
+            delay_histogram=config.get('delay_histogram', '').strip(),
+            target_cps=_parse_number(config, 'target_cps', 0.0, float, 0),
+            cps_variance=_parse_number(config, 'cps_variance', 0.0, float, 0),
+            spin_budget_us=_parse_number(config, 'spin_budget_us', DEFAULT_SPIN_BUDGET_US, int, 0),
+            input_backend=_parse_choice(config, 'input_backend', DEFAULT_BACKEND, BACKENDS),
+        )
+        settings.validate()
+        return settings
+
+    @property
+    def delay_params(self):
+        """Fields that shape the click delay stream"""
+        return (self.min_delay, self.max_delay, self.delay_distribution,
+                self.delay_seed, self.delay_histogram)
+
+    @property
+    def cadence_params(self):
+        """Fields that shape the target CPS controller"""
+        return (self.target_cps, self.cps_variance)
+
+    @property
+    def chat_commands(self):
+        """Every enabled chat command, the built-in toggles first"""
+        builtins = ((FEED_COMMAND,) if self.feed else ()) + ((AFK_COMMAND,) if self.afk else ())
+        return builtins + self.commands
+
+    @property
+    def movement_params(self):
+        """Fields that shape the mouse trajectory"""
+        return (self.circle, self.shape, self.radius, self.steps, self.spins, self.drift,
+                self.motion_path, self.motion_rate, self.spin_time)
+
+    def validate(self):
+        """Check constraints that span more than one field"""
+        if self.walk_max < self.walk_min:
+            raise SettingsError('walk_max', "must not be below walk_min")
+        if self.walk_duration_max < self.walk_duration_min:
+            raise SettingsError('walk_duration_max', "must not be below walk_duration_min")
+        if self.max_delay < self.min_delay:
+            raise SettingsError('max_delay', "must not be below min_delay")
+        if self.delay_distribution == "empirical" and not self.delay_histogram:
+            raise SettingsError('delay_histogram', "is required for the empirical distribution")
+        if self.target_cps and self.cps_variance >= self.target_cps:
+            raise SettingsError('cps_variance', "must be below target_cps")
+
+    def to_config(self):
+        """Render settings back into config.txt style strings"""
+        return {
+            'feed': str(self.feed).lower(),
+            'afk': str(self.afk).lower(),
+            'commands': format_commands(self.commands),
+            'circle': str(self.circle).lower(),
+            'walk': str(self.walk).lower(),
+            'spins': str(self.spins),
+            'drift': str(self.drift),
+            'shape': self.shape,
+            'radius': str(self.radius),
+            'steps': str(self.steps),
+            'motion_path': self.motion_path,
+            'motion_rate': str(self.motion_rate),
+            'spin_time': _format_number(self.spin_time * 1000),
+            'walk_min': _format_number(self.walk_min),
+            'walk_max': _format_number(self.walk_max),
+            'walk_duration_min': _format_number(self.walk_duration_min * 1000),
+            'walk_duration_max': _format_number(self.walk_duration_max * 1000),
+            'min_delay': _format_number(self.min_delay * 1000),
+            'max_delay': _format_number(self.max_delay * 1000),
+            'delay_distribution': self.delay_distribution,
+            'delay_seed': '' if self.delay_seed is None else str(self.delay_seed),
+            'delay_histogram': self.delay_histogram,
+            'target_cps': _format_number(self.target_cps),
+            'cps_variance': _format_number(self.cps_variance),
+            'spin_budget_us': str(self.spin_budget_us),
+            'input_backend': self.input_backend,
+        }
+
+
+class SettingsStore:
+    """Holds the current settings snapshot for running tasks
+
+    Snapshots are published by the GUI thread, the control API, the
+    profile-switch hotkey and SessionManager's sessions, each replacing
+    the whole snapshot in one attribute store, so readers never see a
+    half-updated mix and the last publish wins. Tasks compare the
+    snapshot they hold against current to notice changes.
+    """
+
+    __slots__ = ('current', 'version')
+
+    def __init__(self, settings=None):
+        self.current = settings or Settings()
+        self.version = 0
+
+    def publish(self, settings):
+        """Swap in a new snapshot"""
+        self.current = settings
+        self.version += 1
@@ -0,0 +1,88 @@
+import builtins
+import sys
+import time
+from contextlib import contextmanager
+
+# Constants
+REPORT_TOP_IMPORTS = 12  # Packages listed in the report, slowest first
+
+
+class StartupProfile:
+    """Times imports and init phases from launch to the first window
+
+    While installed, every first-time absolute import is timed and its
+    self time (excluding nested first-time imports) is charged to the
+    top-level package. Disabled profiles only run the code they wrap, so
+    the window can always use phase() without checking for a profile.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.started_ns = time.perf_counter_ns()
+        self.first_window_ns = None
+        self.phases = []
+        self.imports = {}
+        self._nested_ns = []
+        self._original_import = None
+
+    def install(self):
+        """Start timing imports"""
+        if self.enabled and self._original_import is None:
+            self._original_import = builtins.__import__
+            builtins.__import__ = self._import
+
+    def uninstall(self):
+        """Stop timing imports"""
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        if level or name in sys.modules:
+            return self._original_import(name, globals, locals, fromlist, level)
+        start = time.perf_counter_ns()
+        self._nested_ns.append(0)
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter_ns() - start
+            nested = self._nested_ns.pop()
+            package = name.partition('.')[0]
+            self.imports[package] = self.imports.get(package, 0) + elapsed - nested
+            if self._nested_ns:
+                self._nested_ns[-1] += elapsed
+
+    @contextmanager
+    def phase(self, name):
+        """Time the wrapped block as one init phase"""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter_ns() - start))
+
+    def mark_first_window(self):
+        """Record that the first window is on screen"""
+        if self.first_window_ns is None:
+            self.first_window_ns = time.perf_counter_ns() - self.started_ns
+
+    def report(self):
+        """Render the import and phase breakdown as text"""
+        total_ns = self.first_window_ns
+        if total_ns is None:
+            total_ns = time.perf_counter_ns() - self.started_ns
+        lines = [f"Startup profile, time to first window: {total_ns / 1e6:.1f} ms",
+                 "Imports (self time):"]
+        imports = sorted(self.imports.items(), key=lambda item: item[1], reverse=True)
+        for package, elapsed in imports[:REPORT_TOP_IMPORTS]:
+            lines.append(f"  {package:<24}{elapsed / 1e6:8.1f} ms")
+        rest = sum(elapsed for _, elapsed in imports[REPORT_TOP_IMPORTS:])
+        if rest:
+            lines.append(f"  {'(other)':<24}{rest / 1e6:8.1f} ms")
+        lines.append("Init phases:")
+        for name, elapsed in self.phases:
+            lines.append(f"  {name:<24}{elapsed / 1e6:8.1f} ms")
+        return "\n".join(lines)
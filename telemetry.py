@@ -0,0 +1,157 @@
+import csv
+import json
+import time
+
+# Constants
+SUB_BUCKET_BITS = 7  # 64 linear sub-buckets per power of two, about 1.6% relative error
+MAX_VALUE_BITS = 40  # ns, values up to about 18 minutes are bucketed exactly
+DEFAULT_WINDOW = 10.0  # seconds, rolling percentiles cover the last one to two windows
+DEFAULT_SAMPLE_CAPACITY = 65536  # Most recent clicks kept for export
+PERCENTILES = (50, 99, 99.9)
+SAMPLE_FIELDS = ('planned_ns', 'actual_ns', 'lateness_ns', 'inject_ns')
+
+_SUB_COUNT = 1 << SUB_BUCKET_BITS
+_HALF_COUNT = _SUB_COUNT >> 1
+BUCKET_COUNT = _SUB_COUNT + (MAX_VALUE_BITS - SUB_BUCKET_BITS) * _HALF_COUNT
+
+
+def bucket_index(value):
+    """Bucket holding a non-negative integer, clamped to the last bucket"""
+    if value < _SUB_COUNT:
+        return max(0, value)
+    shift = value.bit_length() - SUB_BUCKET_BITS
+    index = _SUB_COUNT + (shift - 1) * _HALF_COUNT + (value >> shift) - _HALF_COUNT
+    return min(index, BUCKET_COUNT - 1)
+
+
+def bucket_value(index):
+    """Smallest value that lands in a bucket"""
+    if index < _SUB_COUNT:
+        return index
+    shift, offset = divmod(index - _SUB_COUNT, _HALF_COUNT)
+    return (offset + _HALF_COUNT) << (shift + 1)
+
+
+class LogHistogram:
+    """Fixed-memory histogram with log-spaced buckets, HDR style
+
+    Buckets are exact below 128 and then split every power of two into
+    64 linear steps, so any value up to 2**40 is kept to within about
+    1.6% in a list of BUCKET_COUNT integers. Recording is one index
+    computation and one list store, safe for a single writer thread.
+    """
+
+    __slots__ = ('counts', 'total', 'max_value')
+
+    def __init__(self):
+        self.counts = [0] * BUCKET_COUNT
+        self.total = 0
+        self.max_value = 0
+
+    def record(self, value):
+        self.counts[bucket_index(value)] += 1
+        self.total += 1
+        if value > self.max_value:
+            self.max_value = value
+
+    def percentiles(self, qs, other=None):
+        """Values at each percentile in qs, optionally merged with another histogram"""
+        total = self.total + (other.total if other else 0)
+        if not total:
+            return [None] * len(qs)
+        counts = self.counts
+        if other:
+            counts = [a + b for a, b in zip(counts, other.counts)]
+        targets = [max(1, -(-total * q // 100)) for q in qs]
+        results = [None] * len(qs)
+        seen = 0
+        pending = 0
+        for index, count in enumerate(counts):
+            if not count:
+                continue
+            seen += count
+            while pending < len(qs) and seen >= targets[pending]:
+                results[pending] = bucket_value(index)
+                pending += 1
+            if pending == len(qs):
+                break
+        return results
+
+
+class Telemetry:
+    """Planned-vs-actual click timing and injection cost for a session
+
+    The click task is the only writer. Lateness and injection time go into
+    a whole-session histogram and a rolling pair that swaps every window,
+    and the raw timestamps into a fixed ring for export. Readers on other
+    threads compute percentiles from whatever counts are there, a click
+    recorded mid-read only shifts a result by one sample.
+    """
+
+    def __init__(self, window=DEFAULT_WINDOW, sample_capacity=DEFAULT_SAMPLE_CAPACITY):
+        self.window_ns = int(window * 1e9)
+        self.sample_capacity = sample_capacity
+        self.reset()
+
+    def reset(self):
+        """Forget everything recorded, call while no clicks are being recorded"""
+        self.lateness = LogHistogram()
+        self.inject = LogHistogram()
+        self.recent_lateness = LogHistogram()
+        self.recent_inject = LogHistogram()
+        self.previous_lateness = None
+        self.previous_inject = None
+        self.window_start_ns = time.perf_counter_ns()
+        self.samples = [None] * self.sample_capacity
+        self.sample_count = 0
+
+    def record_click(self, planned_ns, actual_ns, inject_ns):
+        """Record one click against the time it was planned for"""
+        lateness_ns = actual_ns - planned_ns
+        late = lateness_ns if lateness_ns > 0 else 0
+        self.lateness.record(late)
+        self.inject.record(inject_ns)
+        now = time.perf_counter_ns()
+        if now - self.window_start_ns >= self.window_ns:
+            self.previous_lateness, self.recent_lateness = self.recent_lateness, LogHistogram()
+            self.previous_inject, self.recent_inject = self.recent_inject, LogHistogram()
+            self.window_start_ns = now
+        self.recent_lateness.record(late)
+        self.recent_inject.record(inject_ns)
+        self.samples[self.sample_count % self.sample_capacity] = (
+            planned_ns, actual_ns, lateness_ns, inject_ns)
+        self.sample_count += 1
+
+    def rolling(self, qs=PERCENTILES):
+        """Rolling (lateness, inject) percentiles in ns over the last one to two windows"""
+        return (self.recent_lateness.percentiles(qs, self.previous_lateness),
+                self.recent_inject.percentiles(qs, self.previous_inject))
+
+    def summary(self, qs=PERCENTILES):
+        """Whole-session percentiles and maxima in ns"""
+        summary = {'clicks': self.lateness.total}
+        for name, histogram in (('lateness', self.lateness), ('inject', self.inject)):
+            for q, value in zip(qs, histogram.percentiles(qs)):
+                summary[f'{name}_p{q:g}_ns'] = value
+            summary[f'{name}_max_ns'] = histogram.max_value
+        return summary
+
+    def recent_samples(self):
+        """Kept samples, oldest first"""
+        count = min(self.sample_count, self.sample_capacity)
+        start = self.sample_count - count
+        return [self.samples[i % self.sample_capacity] for i in range(start, self.sample_count)]
+
+    def export(self, path):
+        """Write kept samples as CSV, or as JSON lines ending in a summary for .jsonl"""
+        samples = self.recent_samples()
+        with open(path, 'w', newline='') as f:
+            if path.endswith('.jsonl'):
+                for sample in samples:
+                    f.write(json.dumps(dict(zip(SAMPLE_FIELDS, sample))) + '\n')
+                f.write(json.dumps({'summary': self.summary()}) + '\n')
+            else:
+                writer = csv.writer(f)
+                writer.writerow(SAMPLE_FIELDS)
+                writer.writerows(samples)
+        return len(samples)
@@ -0,0 +1,79 @@
+import random
+
+import pytest
+
+from backends import RecordingBackend
+from cadence import CPS_TOLERANCE, MAX_DEFICIT, CadenceController
+from engine import FeatureRunner
+from metrics import CPS_TRACKING
+from scheduler import Scheduler
+from settings import Settings
+from timing import SimulatedClock
+
+S = 1_000_000_000
+MS = 1_000_000
+
+
+class LateClock(SimulatedClock):
+    """Wakes every wait a fixed time after its deadline, like a coarse OS timer"""
+
+    def __init__(self, late_ns):
+        super().__init__()
+        self.late_ns = late_ns
+
+    def wait_until(self, deadline_ns):
+        if deadline_ns > self.time_ns:
+            self.time_ns = deadline_ns + self.late_ns
+        return self.time_ns - deadline_ns
+
+
+def run_runner(clock, target_cps, seconds, stall=None):
+    """Click at target_cps for seconds, optionally freezing clicks for stall=(at, length) seconds"""
+    runner = FeatureRunner(RecordingBackend(clock=clock.now), seed=1)
+    runner.scheduler = Scheduler(clock)
+    settings = Settings.from_config({'target_cps': str(target_cps), 'cps_variance': '3'})
+    runner.settings.publish(settings)
+    runner.schedule_features(settings)
+    if stall:
+        def freeze():
+            yield stall[0]
+            clock.time_ns += int(stall[1] * S)  # One step that blocks every other task
+
+        runner.scheduler.add("stall", freeze())
+    runner.scheduler.run(until_ns=int(seconds * S))
+    return runner
+
+
+@pytest.mark.parametrize("late_ns", [0, 2 * MS])
+def test_long_run_rate_holds_the_target(late_ns):
+    runner = run_runner(LateClock(late_ns), 15, 60)
+    clicks = runner.backend.timestamps('click')
+    rate = (len(clicks) - 1) / ((clicks[-1] - clicks[0]) / S)
+    assert rate == pytest.approx(15, rel=CPS_TOLERANCE)
+    _, target, error, forgiven = runner.metrics.values[CPS_TRACKING]
+    assert target == 15
+    assert abs(error) < CPS_TOLERANCE
+    assert forgiven == 0
+
+
+def test_stall_beyond_the_cap_is_forgiven():
+    runner = run_runner(SimulatedClock(), 10, 30, stall=(5, 8))
+    clicks = runner.backend.timestamps('click')
+    forgiven = runner.metrics.values[CPS_TRACKING][3]
+    # Eight seconds missed, only MAX_DEFICIT seconds' worth is paid back
+    assert forgiven == pytest.approx(10 * (8 - MAX_DEFICIT), abs=1)
+    after = [timestamp for timestamp in clicks if timestamp > 13 * S]
+    made_up = len(after) - 1 - 10 * (after[-1] - after[0]) / S
+    assert made_up == pytest.approx(10 * MAX_DEFICIT, abs=2)
+
+
+def test_deficit_never_exceeds_the_cap():
+    controller = CadenceController(20, 0, random.Random(1))
+    now = 0
+    for gap in [0.05] * 10 + [30] + [0.01] * 100:
+        now += int(gap * S)
+        controller.next_interval(now, 0)
+        elapsed = (now - controller.started_ns) / S
+        deficit = 20 * elapsed + 1 - controller.clicks - controller.forgiven
+        assert abs(deficit) <= 20 * MAX_DEFICIT + 1e-9
+    assert controller.forgiven > 0
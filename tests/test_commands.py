@@ -0,0 +1,96 @@
+import dataclasses
+import random
+
+import pytest
+
+from backends import RecordingBackend
+from commands import ChatCommand, CommandQueue, format_commands, parse_commands
+from engine import FeatureRunner
+from scheduler import Scheduler
+from settings import Settings
+from timing import SimulatedClock
+
+S = 1_000_000_000
+
+
+def test_parse_and_format_round_trip():
+    commands = parse_commands("/fix@300-360+60; /sell@0+10;;/ping@5")
+    assert commands == (ChatCommand("/fix", 300, 360, 60, 1), ChatCommand("/sell", 0, 0, 10, 2),
+                        ChatCommand("/ping", 5, 5, 5, 4))
+    assert parse_commands(format_commands(commands)) == tuple(
+        dataclasses.replace(command, priority=i + 1) for i, command in enumerate(commands))
+
+
+@pytest.mark.parametrize("text", ["/fix", "@5", "/fix@ten", "/fix@9-3", "/fix@-1", "/fix@5+x"])
+def test_bad_specs(text):
+    with pytest.raises(ValueError):
+        parse_commands(text)
+
+
+def test_queue_orders_by_due_time_then_priority():
+    queue = CommandQueue(random.Random(1))
+    late, urgent, minor = (ChatCommand("/late", priority=1), ChatCommand("/urgent", priority=1),
+                           ChatCommand("/minor", priority=2))
+    queue.schedule(late, 5 * S)
+    queue.schedule(minor, S)
+    queue.schedule(urgent, S)
+    assert queue.peek() == (S, urgent)
+    assert [queue.pop() for _ in range(len(queue))] == [urgent, minor, late]
+    assert queue.peek() is None
+
+
+def test_only_repeating_commands_come_back():
+    queue = CommandQueue(random.Random(1))
+    once, every = ChatCommand("/once"), ChatCommand("/every", 10, 20)
+    queue.schedule_next(once, 0)
+    queue.schedule_next(every, S)
+    due_times = queue.due_times()
+    assert list(due_times) == [every]
+    assert 11 * S <= due_times[every] <= 21 * S
+
+
+def run_runner(commands, until_s, changes=()):
+    """Click every 10 ms with chat commands, publishing (at_s, field, value) changes"""
+    clock = SimulatedClock()
+    runner = FeatureRunner(RecordingBackend(clock=clock.now), seed=1)
+    runner.scheduler = Scheduler(clock)
+    settings = Settings.from_config({'min_delay': '10', 'max_delay': '10', 'commands': commands})
+    runner.settings.publish(settings)
+    runner.schedule_features(settings)
+
+    def publish(at_s, field, value):
+        yield at_s
+        runner.publish_settings(dataclasses.replace(runner.settings.current, **{field: value}))
+
+    for index, change in enumerate(changes):
+        runner.scheduler.add(f"change {index}", publish(*change))
+    runner.scheduler.run(until_ns=until_s * S)
+    return runner.backend
+
+
+def test_typing_holds_the_clicks_until_the_message_is_sent():
+    backend = run_runner("/hi@0+1", 3)
+    kinds = [kind for _, kind, _ in backend.events]
+    assert backend.typed_text() == "t/hi<enter>"
+    opened = kinds.index('press')
+    sent = len(kinds) - 1 - kinds[::-1].index('release')
+    assert 'click' not in kinds[opened:sent]
+    assert backend.events[opened][0] == S
+    # Clicks pick up on the 10 ms grid right after the hold is released
+    clicks = backend.timestamps('click')
+    resumed = next(timestamp for timestamp in clicks if timestamp > backend.events[sent][0])
+    assert resumed - backend.events[sent][0] <= S // 100
+    assert len(clicks) > 200
+
+
+def test_one_shot_is_not_resent_after_a_settings_change():
+    backend = run_runner("/hi@0+1", 3, changes=[(2, 'feed', False), (2.5, 'min_delay', 0.02)])
+    assert backend.typed_text() == "t/hi<enter>"
+
+
+def test_pending_due_times_survive_a_settings_change():
+    backend = run_runner("/a@10+2", 3, changes=[(1, 'afk', True)])
+    presses = [(timestamp, value) for timestamp, kind, value in backend.events if kind == 'press']
+    # /afk is due 5 s after the change, /a still at 2 s
+    assert presses[0] == (2 * S, 't')
+    assert backend.typed_text() == "t/a<enter>"
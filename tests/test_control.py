@@ -0,0 +1,179 @@
+import json
+import os
+import socket
+import stat
+
+import pytest
+
+from backends import RecordingBackend
+from control import CONTROL_TCP_HOST, CONTROL_TCP_PORT, ControlServer
+from engine import ClickerEngine
+
+unix_only = pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'), reason="needs Unix sockets")
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = ClickerEngine(str(tmp_path / "config.txt"), RecordingBackend())
+    yield engine
+    engine.close()
+
+
+@pytest.fixture
+def server(engine):
+    return ControlServer(engine, None)
+
+
+def ask(server, request):
+    line = request if isinstance(request, str) else json.dumps(request)
+    return json.loads(server.handle_line(line.encode()))
+
+
+def exchange(connection, requests):
+    """Pipeline every request on one connection, then read one reply line for each"""
+    connection.sendall(b''.join(json.dumps(request).encode() + b'\n' for request in requests))
+    replies = connection.makefile('rb')
+    return [json.loads(replies.readline()) for _ in requests]
+
+
+def test_ping(server):
+    assert ask(server, {"id": 1, "cmd": "ping"}) == {"id": 1, "ok": True, "result": "pong"}
+
+
+@pytest.mark.parametrize("line, error", [
+    ('{"id": 2, "cmd": "fly"}', "unknown command: fly"),
+    ('[1, 2]', "request must be a JSON object"),
+    ('{"id": 3, "cmd": "profile"}', "'name'"),
+    ('{"id": 4, "cmd": "set", "settings": 5}', "settings must be an object of key: value"),
+])
+def test_bad_requests_get_an_error_reply(server, line, error):
+    reply = ask(server, line)
+    assert reply['ok'] is False
+    assert reply['error'] == error
+
+
+def test_unparseable_line_gets_an_error_reply(server):
+    reply = ask(server, "not json")
+    assert reply['ok'] is False
+    assert reply['id'] is None
+
+
+def test_set_validates_like_the_config_file(server, engine):
+    reply = ask(server, {"id": 1, "cmd": "set", "settings": {"min_delay": 40, "max_delay": 60,
+                                                             "walk": True}})
+    assert reply['ok'] is True
+    assert reply['result']['walk'] == 'true'
+    assert engine.settings.current.min_delay == pytest.approx(0.04)
+    assert engine.settings.current.walk
+
+    reply = ask(server, {"id": 2, "cmd": "set", "settings": {"max_delay": 10}})
+    assert reply == {"id": 2, "ok": False, "error": "max_delay: must not be below min_delay",
+                     "field": "max_delay"}
+    reply = ask(server, {"id": 3, "cmd": "set", "settings": {"bogus": 1}})
+    assert reply['field'] == 'bogus'
+    assert engine.settings.current.max_delay == pytest.approx(0.06)
+
+
+def test_stats_and_profiles_while_stopped(server, engine):
+    stats = ask(server, {"id": 1, "cmd": "stats"})['result']['engine']
+    assert stats['state'] == 'stopped'
+    assert stats['clicks'] == 0
+    engine.save_profile("pvp")
+    assert ask(server, {"id": 2, "cmd": "profiles"})['result'] == {'names': ['pvp'], 'active': 'pvp'}
+    assert ask(server, {"id": 3, "cmd": "profile", "name": "nope"})['error'] == "unknown profile: nope"
+
+
+def test_metrics_command(server):
+    text = ask(server, {"id": 1, "cmd": "metrics"})['result']
+    assert "autoclicker_clicks_injected_total" in text
+    assert "autoclicker_running 0" in text
+
+
+@unix_only
+def test_pipelined_requests_are_answered_in_order(engine, tmp_path):
+    path = str(tmp_path / "control.sock")
+    server = ControlServer(engine, path).start()
+    try:
+        assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        connection.connect(path)
+        with connection:
+            replies = exchange(connection, [{"id": i, "cmd": "ping"} for i in range(50)] +
+                               [{"id": 50, "cmd": "set", "settings": {"feed": True}},
+                                {"id": 51, "cmd": "stats"}])
+        assert [reply['id'] for reply in replies] == list(range(52))
+        assert all(reply['ok'] for reply in replies)
+    finally:
+        server.close()
+    assert not os.path.exists(path)
+
+
+@unix_only
+def test_stale_socket_is_replaced(engine, tmp_path):
+    path = str(tmp_path / "control.sock")
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(path)
+    stale.close()  # Exited without removing it
+    server = ControlServer(engine, path).start()
+    try:
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        connection.connect(path)
+        with connection:
+            assert exchange(connection, [{"id": 1, "cmd": "ping"}])[0]['ok']
+    finally:
+        server.close()
+
+
+@unix_only
+def test_live_socket_or_other_file_is_left_alone(engine, tmp_path):
+    path = str(tmp_path / "control.sock")
+    first = ControlServer(engine, path).start()
+    try:
+        with pytest.raises(FileExistsError):
+            ControlServer(engine, path).start()
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        connection.connect(path)
+        connection.close()
+    finally:
+        first.close()
+    (tmp_path / "control.sock").write_text("notes")
+    with pytest.raises(FileExistsError):
+        ControlServer(engine, path).start()
+    assert (tmp_path / "control.sock").read_text() == "notes"
+
+
+def test_tcp_fallback_needs_the_run_token(engine, tmp_path, monkeypatch):
+    server = ControlServer(engine, str(tmp_path / "control.sock"))
+    with monkeypatch.context() as patch:
+        patch.delattr(socket, 'AF_UNIX', raising=False)
+        try:
+            server.start()
+        except OSError as e:
+            pytest.skip(f"control port unavailable: {e}")
+    try:
+        assert server.address == f"{CONTROL_TCP_HOST}:{CONTROL_TCP_PORT}"
+        if os.name == 'posix':
+            assert stat.S_IMODE(os.stat(server.token_path).st_mode) == 0o600
+        with open(server.token_path) as f:
+            token = f.read()
+        with socket.create_connection((CONTROL_TCP_HOST, CONTROL_TCP_PORT)) as connection:
+            replies = exchange(connection, [{"id": 1, "cmd": "ping"},
+                                            {"id": 2, "cmd": "ping", "token": "guess"},
+                                            {"id": 3, "cmd": "ping", "token": token}])
+        assert [reply['ok'] for reply in replies] == [False, False, True]
+    finally:
+        server.close()
+    assert not os.path.exists(server.token_path)
+
+
+def test_failed_tcp_bind_writes_no_token(engine, tmp_path, monkeypatch):
+    try:
+        taken = socket.create_server((CONTROL_TCP_HOST, CONTROL_TCP_PORT))
+    except OSError as e:
+        pytest.skip(f"control port unavailable: {e}")
+    server = ControlServer(engine, str(tmp_path / "control.sock"))
+    with taken, monkeypatch.context() as patch:
+        patch.delattr(socket, 'AF_UNIX', raising=False)
+        with pytest.raises(OSError):
+            server.start()
+    assert not (tmp_path / "control.token").exists()
@@ -0,0 +1,70 @@
+import pytest
+
+from delays import DelayStream, EmpiricalDistribution, make_distribution
+
+BOUNDED = ("uniform", "normal", "lognormal")
+
+
+def draw(distribution, count=5000, seed=1):
+    stream = DelayStream(distribution, seed, capacity=1024, batch_size=256, low_water=256)
+    stream.start(background=False)
+    try:
+        return [stream.next() for _ in range(count)]
+    finally:
+        stream.stop()
+
+
+@pytest.mark.parametrize("name", BOUNDED)
+def test_delays_stay_within_min_and_max(name):
+    delays = draw(make_distribution(name, 0.05, 0.2))
+    assert min(delays) >= 0.05
+    assert max(delays) <= 0.2
+
+
+@pytest.mark.parametrize("name", BOUNDED)
+def test_zero_width_range_returns_the_bound(name):
+    delays = draw(make_distribution(name, 0.1, 0.1), count=100)
+    assert delays == [0.1] * 100
+
+
+@pytest.mark.parametrize("name", ("normal", "lognormal"))
+def test_narrow_range_far_from_the_mode_is_clipped(name):
+    # Almost every draw lands outside, the redraw cap keeps this from spinning
+    delays = draw(make_distribution(name, 0.100, 0.101), count=500)
+    assert all(0.100 <= delay <= 0.101 for delay in delays)
+
+
+def test_same_seed_gives_the_same_sequence():
+    first = draw(make_distribution("normal", 0.05, 0.2), count=2000, seed=42)
+    second = draw(make_distribution("normal", 0.05, 0.2), count=2000, seed=42)
+    assert first == second
+    assert first != draw(make_distribution("normal", 0.05, 0.2), count=2000, seed=43)
+
+
+def test_empirical_histogram_file(tmp_path):
+    path = tmp_path / "histogram.txt"
+    path.write_text("# delay_ms weight, or low_ms high_ms weight\n80 1\n120 140 3\n")
+    delays = draw(EmpiricalDistribution.from_file(str(path)))
+    assert all(delay == pytest.approx(0.08) or 0.12 <= delay <= 0.14 for delay in delays)
+    assert 0.6 < sum(delay >= 0.12 for delay in delays) / len(delays) < 0.9
+
+
+def test_empirical_needs_a_histogram():
+    with pytest.raises(ValueError):
+        make_distribution("empirical", 0.05, 0.2)
+    with pytest.raises(ValueError):
+        EmpiricalDistribution([(0.1, 0.2, 0)])
+
+
+def test_unknown_distribution():
+    with pytest.raises(ValueError):
+        make_distribution("gamma", 0.05, 0.2)
+
+
+def test_stream_refills_on_the_caller_without_a_thread():
+    stream = DelayStream(make_distribution("uniform", 0.05, 0.2), 1, capacity=64, batch_size=16,
+                         low_water=16).start(background=False)
+    delays = [stream.next() for _ in range(1000)]
+    stream.stop()
+    assert len(delays) == 1000
+    assert stream.starved == 0
@@ -0,0 +1,171 @@
+import threading
+import time
+
+import pytest
+
+import engine as engine_module
+from backends import RecordingBackend
+from engine import ClickerEngine
+from macros import compile_macro
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+class BlockingBackend(RecordingBackend):
+    """Holds the first click until released, like an injection call that hangs"""
+
+    def __init__(self):
+        super().__init__()
+        self.entered = threading.Event()
+        self.unblock = threading.Event()
+
+    def click(self):
+        if not self.entered.is_set():
+            self.entered.set()
+            self.unblock.wait()
+        super().click()
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = ClickerEngine(str(tmp_path / "config.txt"), RecordingBackend())
+    engine.update_settings({'min_delay': '2', 'max_delay': '4'})
+    states = []
+    engine.state_listeners.append(states.append)
+    engine.states = states
+    yield engine
+    engine.close()
+
+
+def test_start_clicks_and_stop_joins(engine):
+    engine.start()
+    assert engine.state() == "running"
+    assert wait_for(lambda: len(engine.backend.timestamps('click')) >= 5)
+    thread = engine.scheduler_thread
+    engine.stop()
+    assert engine.state() == "stopped"
+    assert not thread.is_alive()
+    clicks = len(engine.backend.timestamps('click'))
+    time.sleep(0.05)
+    assert len(engine.backend.timestamps('click')) == clicks
+    assert engine.states == ["running", "stopped"]
+
+
+def test_toggle_and_pause(engine):
+    engine.toggle()
+    assert engine.state() == "running"
+    engine.toggle_pause()
+    assert engine.state() == "paused"
+    engine.toggle_pause()
+    assert engine.state() == "running"
+    engine.toggle()
+    assert engine.state() == "stopped"
+    assert engine.states == ["running", "paused", "running", "stopped"]
+
+
+def test_start_and_stop_are_idempotent(engine):
+    engine.start()
+    generation = engine.generation
+    engine.start()
+    assert engine.generation == generation
+    engine.stop()
+    engine.stop()
+    assert engine.states == ["running", "stopped"]
+
+
+def test_runs_never_overlap(engine):
+    threads = []
+    for _ in range(20):
+        engine.start()
+        threads.append(engine.scheduler_thread)
+        assert sum(thread.is_alive() for thread in threads) == 1
+        engine.stop()
+        assert not any(thread.is_alive() for thread in threads)
+    assert engine.generation == 20
+
+
+def test_macro_only_run_stops_when_it_ends(engine):
+    engine.play_macro(compile_macro("click 3\nwait 10"))
+    assert engine.state() == "running"
+    assert wait_for(lambda: engine.state() == "stopped")
+    assert len(engine.backend.timestamps('click')) == 3
+    assert engine.states == ["running", "stopped"]
+
+
+def test_run_ending_while_the_lifecycle_lock_is_held_still_stops(engine):
+    engine.play_macro(compile_macro("wait 50\nclick"))
+    thread = engine.scheduler_thread
+    with engine._lifecycle_held():
+        thread.join(2.0)
+        assert not thread.is_alive()
+        assert engine.clicking  # The finish is waiting on the lock
+    assert engine.state() == "stopped"
+    assert engine.states == ["running", "stopped"]
+
+
+def test_slow_exit_reports_stopping_and_keeps_the_start(tmp_path, monkeypatch):
+    monkeypatch.setattr(engine_module, 'STOP_JOIN_TIMEOUT', 0.05)
+    backend = BlockingBackend()
+    engine = ClickerEngine(str(tmp_path / "config.txt"), backend)
+    engine.update_settings({'min_delay': '2', 'max_delay': '4'})
+    states = []
+    engine.state_listeners.append(states.append)
+    try:
+        engine.start()
+        assert backend.entered.wait(2.0)
+        engine.stop()
+        assert engine.state() == "stopping"
+        engine.start()  # Waits for the stuck run instead of being dropped
+        assert not engine.clicking
+        backend.unblock.set()
+        assert wait_for(lambda: engine.state() == "running")
+        assert wait_for(lambda: len(backend.timestamps('click')) >= 3)
+        assert states[:3] == ["running", "stopping", "stopping"]
+        assert states[-1] == "running"
+    finally:
+        backend.unblock.set()
+        engine.close()
+
+
+def test_stop_calls_off_a_start_waiting_on_a_slow_exit(tmp_path, monkeypatch):
+    monkeypatch.setattr(engine_module, 'STOP_JOIN_TIMEOUT', 0.05)
+    backend = BlockingBackend()
+    engine = ClickerEngine(str(tmp_path / "config.txt"), backend)
+    try:
+        engine.start()
+        assert backend.entered.wait(2.0)
+        engine.stop()
+        engine.start()
+        engine.stop()
+        backend.unblock.set()
+        assert wait_for(lambda: engine.state() == "stopped")
+        time.sleep(0.05)
+        assert not engine.clicking
+    finally:
+        backend.unblock.set()
+        engine.close()
+
+
+def test_delay_streams_are_built_off_the_click_path(engine, monkeypatch):
+    built_on = []
+    create = engine._create_delay_stream
+
+    def recording_create(settings):
+        built_on.append(threading.current_thread())
+        return create(settings)
+
+    monkeypatch.setattr(engine, '_create_delay_stream', recording_create)
+    engine.start()
+    assert wait_for(lambda: len(engine.backend.timestamps('click')) >= 3)
+    engine.update_settings({'min_delay': '5', 'max_delay': '5'})
+    assert wait_for(lambda: engine.metrics.values[engine_module.CURRENT_DELAY] == 0.005)
+    assert engine._next_delays is None
+    engine.stop()
+    assert built_on == [threading.current_thread()] * 2
@@ -0,0 +1,87 @@
+import json
+import os
+
+import pytest
+
+import eventlog
+from eventlog import BACKUP_COUNT, DEBUG, WARNING, EventLog, format_metrics
+
+
+@pytest.fixture
+def log(tmp_path, monkeypatch):
+    # Nothing is flushed on its own, the tests flush when they want a batch written
+    monkeypatch.setattr(eventlog, 'FLUSH_INTERVAL', 3600)
+    log = EventLog(capacity=4)
+    yield log
+    log.close()
+
+
+def read_events(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_records_are_only_printed_until_opened(log, capsys):
+    log.info('hello', "Hello")
+    log.debug('detail', "Detail")
+    assert capsys.readouterr().out == "Hello\n"
+    assert log.appended == 0
+
+
+def test_full_ring_drops_the_oldest(log, tmp_path, capsys):
+    log.open(str(tmp_path))
+    for i in range(10):
+        log.info('tick', f"Tick {i}", i=i)
+    assert log.dropped == 6
+    log.close()
+    assert [event['i'] for event in read_events(log.path)] == [6, 7, 8, 9]
+    assert (log.written, log.dropped) == (4, 6)
+    assert capsys.readouterr().out == "Tick 6\nTick 7\nTick 8\nTick 9\n"
+
+
+def test_records_keep_their_fields_and_level(log, tmp_path, capsys):
+    log.echo_level = WARNING
+    log.open(str(tmp_path))
+    log.emit('detail', "Detail", DEBUG, path=tmp_path)
+    log.warning('late', "Late tick", lateness_ms=12)
+    log._flush()
+    first, second = read_events(log.path)
+    assert (first['level'], first['event'], first['path']) == ('debug', 'detail', str(tmp_path))
+    assert (second['level'], second['msg'], second['lateness_ms']) == ('warning', "Late tick", 12)
+    assert capsys.readouterr().out == "Late tick\n"
+
+
+def test_rotation_keeps_the_newest_batches(log, tmp_path, monkeypatch):
+    monkeypatch.setattr(eventlog, 'MAX_FILE_BYTES', 200)
+    log.echo_level = 100
+    log.open(str(tmp_path))
+    for batch in range(6):
+        for i in range(2):
+            log.info('tick', "Tick", batch=batch, i=i)
+        log._flush()
+    names = sorted(os.listdir(tmp_path))
+    assert names == ['events.jsonl'] + [f'events.jsonl.{i}' for i in range(1, BACKUP_COUNT + 1)]
+    batches = [{event['batch'] for event in read_events(os.path.join(tmp_path, name))}
+               for name in names]
+    assert batches == [{5}, {4}, {3}, {2}]
+
+
+def test_format_metrics():
+    text = format_metrics({'clicks_injected': 12, 'custom': 3},
+                          [('running', "1 while clicking", True),
+                           ('current_delay_seconds', "Last delay", 0.0625),
+                           ('missing', "Not known yet", None)])
+    assert text == (
+        "# HELP autoclicker_clicks_injected_total Clicks sent to the input backend\n"
+        "# TYPE autoclicker_clicks_injected_total counter\n"
+        "autoclicker_clicks_injected_total 12\n"
+        "# HELP autoclicker_custom_total custom\n"
+        "# TYPE autoclicker_custom_total counter\n"
+        "autoclicker_custom_total 3\n"
+        "# HELP autoclicker_running 1 while clicking\n"
+        "# TYPE autoclicker_running gauge\n"
+        "autoclicker_running 1\n"
+        "# HELP autoclicker_current_delay_seconds Last delay\n"
+        "# TYPE autoclicker_current_delay_seconds gauge\n"
+        "autoclicker_current_delay_seconds 0.0625\n"
+    )
@@ -0,0 +1,103 @@
+from types import SimpleNamespace
+
+import pytest
+
+from hotkeys import HotkeyMatcher, format_hotkey, normalize_key, parse_hotkey
+
+MS = 1_000_000
+
+
+def special(name):
+    """A pynput Key member"""
+    return SimpleNamespace(name=name)
+
+
+def char(text, vk=None):
+    """A pynput KeyCode"""
+    return SimpleNamespace(char=text, vk=vk)
+
+
+@pytest.mark.parametrize("text, tokens", [
+    ("Ctrl + A", ("ctrl", "a")),
+    ("Shift + F6", ("shift", "f6")),
+    ("ctrl_r + alt_gr + x", ("ctrl", "alt", "x")),
+    ("Space", ("space",)),
+    ("NONE", ()),
+    ("", ()),
+])
+def test_parse_hotkey(text, tokens):
+    assert parse_hotkey(text) == tokens
+
+
+@pytest.mark.parametrize("text", ["Ctrl + A", "Ctrl + Shift + f6", "Alt + Space", "NONE"])
+def test_format_round_trips(text):
+    assert format_hotkey(parse_hotkey(text)) == text
+
+
+def test_format_puts_modifiers_first():
+    assert format_hotkey(("a", "shift")) == "Shift + A"
+
+
+def test_normalize_key():
+    assert normalize_key(special("ctrl_l")) == "ctrl"
+    assert normalize_key(special("f6")) == "f6"
+    assert normalize_key(char("A")) == "a"
+    # Ctrl turns letters into control characters, the key code still names them
+    assert normalize_key(char("\x01", vk=65)) == "a"
+    assert normalize_key(char(None, vk=200)) == "vk200"
+
+
+def test_binding_fires_when_the_combination_completes():
+    matcher = HotkeyMatcher()
+    matcher.bind("toggle", parse_hotkey("Ctrl + A"))
+    assert matcher.press(special("ctrl_l"), now_ns=0) is None
+    assert matcher.press(char("a"), now_ns=0) == "toggle"
+    assert matcher.is_held("toggle")
+    matcher.release(char("a"))
+    assert not matcher.is_held("toggle")
+
+
+def test_left_and_right_modifiers_match_the_same_binding():
+    matcher = HotkeyMatcher()
+    matcher.bind("toggle", ("ctrl", "a"))
+    matcher.press(special("ctrl_r"), now_ns=0)
+    assert matcher.press(char("a"), now_ns=0) == "toggle"
+
+
+def test_extra_keys_held_do_not_match():
+    matcher = HotkeyMatcher()
+    matcher.bind("toggle", ("ctrl", "a"))
+    matcher.press(special("shift"), now_ns=0)
+    matcher.press(special("ctrl"), now_ns=0)
+    assert matcher.press(char("a"), now_ns=0) is None
+
+
+def test_auto_repeat_and_debounce():
+    matcher = HotkeyMatcher(debounce_ms=150)
+    matcher.bind("toggle", ("f6",))
+    assert matcher.press(special("f6"), now_ns=0) == "toggle"
+    assert matcher.press(special("f6"), now_ns=10 * MS) is None  # Auto-repeat while held
+    matcher.release(special("f6"))
+    assert matcher.press(special("f6"), now_ns=100 * MS) is None  # Inside the debounce window
+    matcher.release(special("f6"))
+    assert matcher.press(special("f6"), now_ns=300 * MS) == "toggle"
+
+
+def test_rebinding_replaces_the_old_combination():
+    matcher = HotkeyMatcher()
+    matcher.bind("toggle", ("f6",))
+    matcher.bind("toggle", ("f7",))
+    assert matcher.press(special("f6"), now_ns=0) is None
+    matcher.release(special("f6"))
+    assert matcher.press(special("f7"), now_ns=0) == "toggle"
+
+
+def test_several_bindings():
+    matcher = HotkeyMatcher()
+    matcher.bind("toggle", ("f6",))
+    matcher.bind("pause", ("ctrl", "p"))
+    matcher.bind("profile", ())
+    matcher.press(special("ctrl"), now_ns=0)
+    assert matcher.press(char("p"), now_ns=0) == "pause"
+    matcher.reset()
+    assert matcher.press(special("f6"), now_ns=0) == "toggle"
@@ -0,0 +1,82 @@
+from types import SimpleNamespace
+
+import listener as listener_module
+from listener import BACKOFF_INITIAL, BACKOFF_MAX, BACKOFF_RESET, ListenerSupervisor
+
+
+class StopAfter:
+    """Stands in for the stop event: records each backoff wait instead of sleeping"""
+
+    def __init__(self, waits):
+        self.remaining = waits
+        self.waits = []
+        self.stopped = False
+
+    def is_set(self):
+        return self.stopped
+
+    def set(self):
+        self.stopped = True
+
+    def wait(self, timeout):
+        self.waits.append(timeout)
+        self.remaining -= 1
+        self.stopped = self.remaining <= 0
+        return self.stopped
+
+
+class FlakySupervisor(ListenerSupervisor):
+    """Each listener stays up for the next of uptimes seconds, then dies"""
+
+    def __init__(self, uptimes, clock):
+        self.statuses = []
+        super().__init__(None, None, self.statuses.append)
+        self.uptimes = iter(uptimes)
+        self.clock = clock
+
+    def _run_listener(self):
+        self.clock.now += next(self.uptimes, 0)
+        raise OSError("hook lost")
+
+
+def supervise(uptimes, waits, monkeypatch):
+    clock = SimpleNamespace(now=0.0)
+    monkeypatch.setattr(listener_module, 'time', SimpleNamespace(monotonic=lambda: clock.now))
+    supervisor = FlakySupervisor(uptimes, clock)
+    supervisor._stopping = StopAfter(waits)
+    supervisor._supervise()
+    return supervisor
+
+
+def test_backoff_doubles_up_to_the_cap(monkeypatch):
+    supervisor = supervise([], 9, monkeypatch)
+    assert supervisor._stopping.waits == [0.5, 1, 2, 4, 8, 16, 30, 30, 30]
+    assert BACKOFF_INITIAL == 0.5 and BACKOFF_MAX == 30
+    assert supervisor.restarts == 9
+
+
+def test_backoff_starts_over_after_a_long_enough_run(monkeypatch):
+    supervisor = supervise([0, 0, 0, BACKOFF_RESET, 0, BACKOFF_RESET - 1], 6, monkeypatch)
+    assert supervisor._stopping.waits == [0.5, 1, 2, 0.5, 1, 2]
+
+
+def test_status_names_the_error_and_the_delay(monkeypatch):
+    supervisor = supervise([], 2, monkeypatch)
+    assert supervisor.statuses == ["Error - hook lost, restarting in 0.5s",
+                                   "Error - hook lost, restarting in 1s", "Stopped"]
+    assert supervisor.listener is None
+    assert supervisor._first_attempt.is_set()
+
+
+def test_stop_during_a_run_does_not_restart():
+    class StoppedWhileRunning(FlakySupervisor):
+        def _run_listener(self):
+            self._stopping.set()
+
+    clock = SimpleNamespace(now=0.0)
+    supervisor = StoppedWhileRunning([], clock)
+    supervisor._stopping = StopAfter(1)
+    supervisor._supervise()
+    assert supervisor._stopping.waits == []
+    assert supervisor.restarts == 0
+    assert supervisor.statuses == ["Stopped"]
@@ -0,0 +1,121 @@
+import random
+
+import pytest
+
+from backends import RecordingBackend
+from macros import (CLICK, MOVE, MOVE_BY, NOOP, PRESS, RELEASE, MacroError, chat_timeline,
+                    compile_macro, list_macros, load_macro, save_macro)
+from scheduler import Scheduler
+from timing import SimulatedClock
+
+MS = 1_000_000
+
+
+def play(timeline, until_ns=None):
+    """Run a timeline on a simulated clock, returning (ms, kind, value) events"""
+    clock = SimulatedClock()
+    backend = RecordingBackend(clock=clock.now)
+    scheduler = Scheduler(clock)
+    scheduler.add("macro", timeline.play(backend, random.Random(1)))
+    scheduler.run(until_ns)
+    return [(timestamp / MS, kind, value) for timestamp, kind, value in backend.events]
+
+
+def test_compile_flattens_into_timed_events():
+    timeline = compile_macro("move 400 300\nclick 2  # twice\nwait 100-200\npress w\n")
+    assert list(timeline.kinds) == [MOVE, CLICK, CLICK, PRESS]
+    assert timeline.values == [(400, 300), None, None, 'w']
+    assert list(timeline.wait_min) == [0, 0, 0, 100 * MS]
+    assert list(timeline.wait_span) == [0, 0, 0, 100 * MS]
+    assert timeline.duration_range() == (0.1, 0.2)
+    assert timeline.loop_start is None
+
+
+def test_trailing_wait_is_kept():
+    timeline = compile_macro("click\nwait 50")
+    assert list(timeline.kinds) == [CLICK, NOOP]
+    assert timeline.duration_range() == (0.05, 0.05)
+
+
+def test_counted_repeat_is_unrolled():
+    timeline = compile_macro("repeat 3\n  click\n  wait 50\nend")
+    assert list(timeline.kinds) == [CLICK, CLICK, CLICK, NOOP]
+    assert list(timeline.wait_min) == [0, 50 * MS, 50 * MS, 50 * MS]
+
+
+def test_forever_repeat_loops_after_the_prefix():
+    timeline = compile_macro("hold w 500\nwait 20\nrepeat\n  move +3 -3\n  click\n  wait 50\nend")
+    assert list(timeline.kinds) == [PRESS, RELEASE, NOOP, MOVE_BY, CLICK, NOOP]
+    assert timeline.loop_start == 3
+
+
+@pytest.mark.parametrize("source, line", [
+    ("click\nend", 2),
+    ("repeat 2\nclick", 2),
+    ("repeat\nclick\nend\nclick", 1),
+    ("wait soon", 1),
+    ("wait 200-100", 1),
+    ("click\nmove 10 up", 2),
+    ("jump", 1),
+    ("repeat -1\nclick\nend", 1),
+    ("wait 100\nrepeat\n  click\nend", 2),
+    ("repeat\n  click\n  wait 0-50\n  repeat 0\n    wait 10\n  end\nend", 1),
+])
+def test_errors_name_the_line(source, line):
+    with pytest.raises(MacroError) as error:
+        compile_macro(source)
+    assert error.value.line == line
+
+
+def test_playback_timing():
+    timeline = compile_macro("move 10 20\nclick\nwait 100\nhold w 50\nmove +5 -5")
+    assert play(timeline) == [
+        (0, 'move', (10, 20)),
+        (0, 'click', (10, 20)),
+        (100, 'press', 'w'),
+        (150, 'release', 'w'),
+        (150, 'move', (15, 15)),
+    ]
+
+
+def test_random_waits_stay_in_range():
+    events = play(compile_macro("repeat 50\n  wait 10-20\n  click\nend"))
+    gaps = [b[0] - a[0] for a, b in zip(events, events[1:])]
+    assert all(10 <= gap <= 20 for gap in gaps)
+
+
+def test_stopping_mid_hold_releases_the_key():
+    events = play(compile_macro("hold w 1000"), until_ns=500 * MS)
+    assert [(kind, value) for _, kind, value in events] == [('press', 'w'), ('release', 'w')]
+
+
+def test_forever_loop_keeps_playing():
+    events = play(compile_macro("repeat\n  click\n  wait 100\nend"), until_ns=950 * MS)
+    assert [time_ms for time_ms, _, _ in events] == [100 * i for i in range(10)]
+
+
+def test_chat_timeline_types_the_message():
+    clock = SimulatedClock()
+    backend = RecordingBackend(clock=clock.now)
+    scheduler = Scheduler(clock)
+    scheduler.add("chat", chat_timeline("/feed").play(backend, random.Random(1)))
+    scheduler.run()
+    assert backend.typed_text() == "t/feed<enter>"
+
+
+def test_save_load_and_list(tmp_path):
+    directory = str(tmp_path / "macros")
+    assert list_macros(directory) == []
+    save_macro(directory, "farm", "click\nwait 100")
+    save_macro(directory, "afk", "press w")
+    assert list_macros(directory) == ["afk", "farm"]
+    assert load_macro(directory, "farm") == "click\nwait 100"
+    for name in (".hidden", "../escape", "sub/dir", ""):
+        with pytest.raises(ValueError):
+            save_macro(directory, name, "click")
+    assert list_macros(directory) == ["afk", "farm"]
+
+
+def test_forever_loop_with_only_waits_or_nothing_compiles():
+    assert compile_macro("repeat\n  wait 100\nend").loop_start == 0
+    assert compile_macro("click\nrepeat\nend").loop_start is None
@@ -0,0 +1,82 @@
+import math
+
+import pytest
+
+import motion
+from motion import Motion, segment
+from trajectory import shape_point
+
+SHAPES = ("circle", "ellipse", "figure-eight", "square")
+
+
+def key_point(shape, radius, steps, k):
+    x, y = shape_point(shape, radius, (k % steps) / steps)
+    return round(x), round(y)
+
+
+@pytest.mark.parametrize("shape", SHAPES)
+@pytest.mark.parametrize("path", ["line", "spline"])
+def test_interpolated_paths_pass_through_the_key_points(path, shape):
+    xs, ys = segment(path, shape, 40, 8, 64)
+    assert len(xs) == len(ys) == 64
+    for k in range(8):
+        assert (xs[k * 8], ys[k * 8]) == key_point(shape, 40, 8, k)
+
+
+def test_line_runs_straight_between_key_points():
+    xs, ys = segment("line", "circle", 40, 4, 8)
+    # Halfway between (40, 0) and (0, 40)
+    assert (xs[1], ys[1]) == (20, 20)
+    assert (xs[3], ys[3]) == (-20, 20)
+
+
+def test_spline_bulges_out_towards_the_circle():
+    radius = 40
+    line = segment("line", "circle", radius, 6, 60)
+    spline = segment("spline", "circle", radius, 6, 60)
+    for i in range(5, 60, 10):  # Midway between key points
+        line_distance = math.hypot(line[0][i], line[1][i])
+        spline_distance = math.hypot(spline[0][i], spline[1][i])
+        assert line_distance < spline_distance <= radius + 1
+
+
+@pytest.mark.parametrize("shape", SHAPES)
+def test_arc_samples_the_shape_itself(shape):
+    xs, ys = segment("arc", shape, 25, 3, 50)
+    for i in range(50):
+        x, y = shape_point(shape, 25, i / 50)
+        assert (xs[i], ys[i]) == (round(x), round(y))
+
+
+def test_segments_are_cached():
+    assert segment("spline", "circle", 10, 12, 120) is segment("spline", "circle", 10, 12, 120)
+
+
+@pytest.mark.parametrize("args", [
+    ("step", "circle", 10, 12, 120),
+    ("spline", "circle", -1, 12, 120),
+    ("spline", "circle", 10, 0, 120),
+    ("line", "circle", 10, 12, 0),
+])
+def test_invalid_segments(args):
+    with pytest.raises(ValueError):
+        segment(*args)
+
+
+@pytest.mark.parametrize("path", ["line", "spline", "arc"])
+def test_numpy_and_python_paths_agree(path):
+    if motion.load_numpy() is None:
+        pytest.skip("NumPy not installed")
+    for shape in SHAPES:
+        assert motion._segment_numpy(path, shape, 37, 9, 100) == \
+               motion._segment_python(path, shape, 37, 9, 100)
+
+
+def test_position_follows_elapsed_time_and_drifts():
+    moving = Motion((100, 200), "circle", 10, 4, spins_before_drift=2, drift_pixels=3,
+                    path="line", rate=4, spin_time=1)
+    assert moving.samples == 4
+    assert moving.position_at(0) == (110, 200)
+    assert moving.position_at(250_000_000) == (100, 210)
+    assert moving.position_at(1_999_999_999) == (100, 190)  # The last sample of the second loop
+    assert moving.position_at(2_000_000_000) == (113, 203)  # Third loop, drifted once
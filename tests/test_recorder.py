@@ -0,0 +1,180 @@
+import itertools
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+import recorder
+from backends import RecordingBackend
+from recorder import (HEADER, KEY_PRESS, KEY_RELEASE, MOUSE_PRESS, MOUSE_RELEASE, MOVE,
+                      RECORDING_MAGIC, RECORDING_VERSION, SCROLL, Recorder, RecordingReader,
+                      trim_recording)
+from scheduler import Scheduler
+from timing import SimulatedClock
+
+MS = 1_000_000
+
+EVENTS = [  # (ms, kind, a, b) as the recorder stores them
+    (0, MOVE, 100, 200),
+    (10, MOVE, 103, 198),
+    (20, MOUSE_PRESS, 0, 0),
+    (35, MOUSE_RELEASE, 0, 0),
+    (50, KEY_PRESS, 'w', 0),
+    (300, KEY_RELEASE, 'w', 0),
+    (400, SCROLL, 0, -2),
+    (500, MOVE, 90, 210),
+]
+
+
+def write_recording(path, events, monkeypatch, capacity=1024):
+    """Write events through the Recorder's ring and encoder, without hooking the mouse"""
+    times = iter([time_ms * MS for time_ms, _, _, _ in events])
+    monkeypatch.setattr(recorder, 'time', SimpleNamespace(perf_counter_ns=lambda: next(times),
+                                                          time_ns=lambda: 0))
+    writer = Recorder(str(path), capacity=capacity)
+    writer._file = open(path, 'wb')
+    writer._file.write(HEADER.pack(RECORDING_MAGIC, RECORDING_VERSION, 0))
+    for _, kind, a, b in events:
+        if kind == MOVE:
+            writer._on_move(a, b)
+        elif kind in (MOUSE_PRESS, MOUSE_RELEASE):
+            writer._on_click(0, 0, SimpleNamespace(name='left'), kind == MOUSE_PRESS)
+        elif kind == SCROLL:
+            writer._on_scroll(0, 0, a, b)
+        elif kind == KEY_PRESS:
+            writer.key_press(SimpleNamespace(char=a))
+        else:
+            writer.key_release(SimpleNamespace(char=a))
+    writer.stop()
+    monkeypatch.undo()
+    return writer
+
+
+def expected(events, offset_ms=0):
+    decoded = []
+    for time_ms, kind, a, b in events:
+        if kind in (MOUSE_PRESS, MOUSE_RELEASE):
+            a = 'left'
+        decoded.append(((time_ms - offset_ms) * 1000, kind, a, b))
+    return decoded
+
+
+@pytest.fixture
+def recording(tmp_path, monkeypatch):
+    path = tmp_path / "input.rec"
+    write_recording(path, EVENTS, monkeypatch)
+    return str(path)
+
+
+def test_write_read_round_trip(recording):
+    with RecordingReader(recording) as reader:
+        assert list(reader) == expected(EVENTS)
+        assert reader.summary() == (len(EVENTS), 0.5)
+
+
+def test_recorder_counts_and_drops(tmp_path, monkeypatch):
+    events = [(i, MOVE, i, i) for i in range(20)]
+    writer = write_recording(tmp_path / "full.rec", events, monkeypatch, capacity=16)
+    # Nothing is flushed until stop(), so a 16 slot ring keeps the first 16
+    assert (writer.events, writer.dropped) == (16, 4)
+    with RecordingReader(str(tmp_path / "full.rec")) as reader:
+        assert reader.summary()[0] == 16
+
+
+def test_play_twice_and_summarise_after(recording):
+    with RecordingReader(recording) as reader:
+        for _ in range(2):
+            clock = SimulatedClock()
+            backend = RecordingBackend(clock=clock.now)
+            scheduler = Scheduler(clock)
+            scheduler.add("macro", reader.play(backend))
+            scheduler.run()
+            assert [(timestamp // MS, kind, value) for timestamp, kind, value in backend.events] == [
+                (0, 'move', (100, 200)),
+                (10, 'move', (103, 198)),
+                (20, 'mouse_press', 'left'),
+                (35, 'mouse_release', 'left'),
+                (50, 'press', 'w'),
+                (300, 'release', 'w'),
+                (400, 'scroll', (0, -2)),
+                (500, 'move', (90, 210)),
+            ]
+        assert reader.summary() == (len(EVENTS), 0.5)
+
+
+def test_stopped_playback_releases_held_input(recording):
+    with RecordingReader(recording) as reader:
+        clock = SimulatedClock()
+        backend = RecordingBackend(clock=clock.now)
+        scheduler = Scheduler(clock)
+        scheduler.add("macro", reader.play(backend))
+        scheduler.run(until_ns=100 * MS)
+    assert backend.events[-1][1:] == ('release', 'w')
+
+
+def test_trim_keeps_the_range_from_the_cursor_position(recording, tmp_path):
+    destination = str(tmp_path / "trimmed.rec")
+    assert trim_recording(recording, destination, start=0.015, end=0.4) == 6
+    with RecordingReader(destination) as reader:
+        assert reader.started_ns == 15 * MS
+        assert list(reader) == [(0, MOVE, 103, 198)] + expected(EVENTS[2:7], offset_ms=15)
+
+
+def test_trim_round_trips_the_whole_recording(recording, tmp_path):
+    destination = str(tmp_path / "copy.rec")
+    trim_recording(recording, destination)
+    with RecordingReader(recording) as original, RecordingReader(destination) as copy:
+        assert list(copy) == list(original)
+
+
+def test_truncated_recording_stops_at_the_partial_record(recording, tmp_path):
+    with open(recording, 'rb') as f:
+        data = f.read()
+    lengths = set()
+    for cut in range(1, len(data) - HEADER.size + 1):
+        path = tmp_path / "cut.rec"
+        path.write_bytes(data[:-cut])
+        with RecordingReader(str(path)) as reader:
+            records = list(reader)
+            assert records == expected(EVENTS)[:len(records)]
+            assert reader.summary()[0] == len(records)
+            for _ in reader.play(RecordingBackend()):
+                pass
+        trim_recording(str(path), str(tmp_path / "trimmed.rec"))
+        lengths.add(len(records))
+    assert lengths == set(range(len(EVENTS)))
+
+
+@pytest.mark.parametrize("data", [b"", b"ACRC", b"XXXX" + bytes(HEADER.size - 4)])
+def test_not_a_recording(tmp_path, data):
+    path = tmp_path / "bad.rec"
+    path.write_bytes(data)
+    with pytest.raises(ValueError):
+        RecordingReader(str(path))
+
+
+def test_key_names_are_written_once(tmp_path, monkeypatch):
+    events = list(itertools.chain.from_iterable(
+        [(i * 20, KEY_PRESS, 'a', 0), (i * 20 + 10, KEY_RELEASE, 'a', 0)] for i in range(50)))
+    write_recording(tmp_path / "keys.rec", events, monkeypatch)
+    with RecordingReader(str(tmp_path / "keys.rec")) as reader:
+        assert list(reader) == expected(events)
+    assert (tmp_path / "keys.rec").read_bytes().count(b'a') == 1
+
+
+def test_failed_mouse_hook_leaves_nothing_open(tmp_path, monkeypatch):
+    class FailingListener:
+        def __init__(self, **callbacks):
+            self.daemon = False
+
+        def start(self):
+            raise OSError("no input hook")
+
+    mouse = SimpleNamespace(Listener=FailingListener)
+    monkeypatch.setitem(sys.modules, 'pynput', SimpleNamespace(mouse=mouse))
+    monkeypatch.setitem(sys.modules, 'pynput.mouse', mouse)
+    writer = Recorder(str(tmp_path / "input.rec"))
+    with pytest.raises(OSError):
+        writer.start()
+    assert writer._file is None and writer._thread is None
+    writer.stop()  # Still safe to call
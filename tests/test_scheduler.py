@@ -0,0 +1,127 @@
+from scheduler import Scheduler, PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW
+from timing import SimulatedClock
+
+MS = 1_000_000
+
+
+def once(log, label):
+    log.append(label)
+    return
+    yield
+
+
+def ticker(scheduler, log, label, interval, steps):
+    for _ in range(steps):
+        log.append((label, scheduler.clock.now() // MS))
+        yield interval
+
+
+def test_same_deadline_runs_by_priority_then_insertion_order():
+    scheduler = Scheduler(SimulatedClock())
+    log = []
+    scheduler.add("click", once(log, "click"), priority=PRIORITY_LOW)
+    scheduler.add("motion", once(log, "motion"), priority=PRIORITY_NORMAL)
+    scheduler.add("walk", once(log, "walk"), priority=PRIORITY_NORMAL)
+    scheduler.add("chat", once(log, "chat"), priority=PRIORITY_HIGH)
+    scheduler.run()
+    assert log == ["chat", "motion", "walk", "click"]
+
+
+def test_deadlines_are_absolute_and_tasks_interleave():
+    scheduler = Scheduler(SimulatedClock())
+    log = []
+    scheduler.add("a", ticker(scheduler, log, "a", 0.02, 3))
+    scheduler.add("b", ticker(scheduler, log, "b", 0.03, 2), delay=0.01)
+    scheduler.run()
+    assert log == [("a", 0), ("b", 10), ("a", 20), ("b", 40), ("a", 40)]
+    assert not scheduler.tasks
+
+
+def test_run_stops_at_until_ns_and_closes_pending_tasks():
+    scheduler = Scheduler(SimulatedClock())
+    log = []
+    closed = []
+
+    def task():
+        try:
+            yield from ticker(scheduler, log, "a", 0.01, 100)
+        finally:
+            closed.append(True)
+
+    scheduler.add("a", task())
+    scheduler.run(until_ns=45 * MS)
+    assert [time_ms for _, time_ms in log] == [0, 10, 20, 30, 40]
+    assert closed == [True]
+
+
+def test_hold_others_parks_the_group_until_release():
+    scheduler = Scheduler(SimulatedClock())
+    log = []
+
+    def chat():
+        scheduler.hold_others("chat")
+        log.append(("chat", scheduler.clock.now() // MS))
+        yield 0.05
+        log.append(("chat done", scheduler.clock.now() // MS))
+        scheduler.release_others("chat")
+        yield 0.5
+
+    scheduler.add("chat", chat(), priority=PRIORITY_HIGH, group="one")
+    scheduler.add("click", ticker(scheduler, log, "click", 0.02, 2), group="one")
+    scheduler.add("other", ticker(scheduler, log, "other", 0.02, 2), group="two")
+    scheduler.run()
+    assert log == [("chat", 0), ("other", 0), ("other", 20),
+                   ("chat done", 50), ("click", 50), ("click", 70)]
+
+
+def test_finished_holder_releases_its_group():
+    scheduler = Scheduler(SimulatedClock())
+    log = []
+
+    def chat():
+        scheduler.hold_others("chat")
+        yield 0.03
+
+    scheduler.add("chat", chat(), priority=PRIORITY_HIGH)
+    scheduler.add("click", ticker(scheduler, log, "click", 0.01, 1))
+    scheduler.run()
+    assert log == [("click", 30)]
+
+
+def test_wake_runs_a_sleeping_task():
+    scheduler = Scheduler(SimulatedClock())
+    log = []
+
+    def sleeper():
+        log.append(("asleep", scheduler.clock.now() // MS))
+        yield None
+        log.append(("awake", scheduler.clock.now() // MS))
+
+    def waker():
+        yield 0.01
+        scheduler.wake()
+
+    scheduler.add("sleeper", sleeper())
+    scheduler.add("waker", waker())
+    scheduler.run()
+    assert log == [("asleep", 0), ("awake", 10)]
+
+
+def test_cancel_then_submit_replaces_the_task():
+    scheduler = Scheduler(SimulatedClock())
+    log = []
+    scheduler.add("macro", ticker(scheduler, log, "old", 0.01, 100))
+    scheduler.cancel("macro")
+    scheduler.submit("macro", ticker(scheduler, log, "new", 0.01, 2))
+    scheduler.run()
+    assert [label for label, _ in log] == ["new", "new"]
+
+
+def test_cancel_group_leaves_other_groups_running():
+    scheduler = Scheduler(SimulatedClock())
+    log = []
+    scheduler.add("a.click", ticker(scheduler, log, "a", 0.01, 3), group="a")
+    scheduler.add("b.click", ticker(scheduler, log, "b", 0.01, 3), group="b")
+    scheduler.cancel_group("a")
+    scheduler.run()
+    assert [label for label, _ in log] == ["b", "b", "b"]
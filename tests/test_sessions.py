@@ -0,0 +1,23 @@
+from backends import RecordingBackend
+from sessions import BackendPool, SessionManager
+from settings import Settings
+from timing import SimulatedClock
+
+S = 1_000_000_000
+
+
+def test_restart_clears_timing_on_the_scheduler_thread():
+    clock = SimulatedClock()
+    manager = SessionManager(clock, BackendPool(lambda name, target: RecordingBackend(clock=clock.now)))
+    session = manager.add("a", Settings.from_config({'min_delay': '100', 'max_delay': '100'}))
+    manager.start("a")
+    manager.scheduler.run(until_ns=S)
+    first_run = session.telemetry.summary()['clicks']
+    assert first_run == 11
+
+    manager.stop("a")
+    manager.start("a")
+    # Left to the scheduler thread, which is the one recording clicks
+    assert session.telemetry.summary()['clicks'] == first_run
+    manager.scheduler.run(until_ns=2 * S)
+    assert session.telemetry.summary()['clicks'] == 11
@@ -0,0 +1,106 @@
+import dataclasses
+
+import pytest
+
+from backends import RecordingBackend
+from commands import ChatCommand
+from engine import FeatureRunner
+from persistence import read_config, write_config
+from scheduler import Scheduler
+from settings import Settings, SettingsError, SettingsStore
+from timing import SimulatedClock
+
+S = 1_000_000_000
+
+
+def test_defaults_round_trip():
+    assert Settings.from_config(Settings().to_config()) == Settings()
+
+
+def test_empty_config_gives_defaults():
+    assert Settings.from_config({}) == Settings()
+
+
+def test_config_values_round_trip():
+    config = Settings().to_config()
+    config.update(feed='true', walk='true', min_delay='40', max_delay='90', shape='square',
+                  delay_distribution='lognormal', delay_seed='7', target_cps='12.5',
+                  cps_variance='2', commands='/fix@300-360+60; /sell@0+10')
+    settings = Settings.from_config(config)
+    assert settings.min_delay == pytest.approx(0.04)
+    assert settings.max_delay == pytest.approx(0.09)
+    assert settings.delay_seed == 7
+    assert settings.commands == (ChatCommand("/fix", 300, 360, 60, 1), ChatCommand("/sell", 0, 0, 10, 2))
+    assert settings.to_config() == config
+    assert Settings.from_config(settings.to_config()) == settings
+
+
+def test_round_trip_through_the_config_file(tmp_path):
+    path = str(tmp_path / "config.txt")
+    settings = Settings.from_config({'afk': 'true', 'radius': '9', 'delay_seed': '3'})
+    write_config(path, settings.to_config())
+    with open(path) as f:
+        assert f.readline() == "version=1\n"
+    assert Settings.from_config(read_config(path)) == settings
+
+
+@pytest.mark.parametrize("config, field", [
+    ({'min_delay': 'fast'}, 'min_delay'),
+    ({'min_delay': '0'}, 'min_delay'),
+    ({'min_delay': '200', 'max_delay': '100'}, 'max_delay'),
+    ({'walk_min': '5', 'walk_max': '2'}, 'walk_max'),
+    ({'walk_duration_min': '100', 'walk_duration_max': '50'}, 'walk_duration_max'),
+    ({'shape': 'hexagon'}, 'shape'),
+    ({'delay_distribution': 'gamma'}, 'delay_distribution'),
+    ({'delay_distribution': 'empirical'}, 'delay_histogram'),
+    ({'target_cps': '10', 'cps_variance': '10'}, 'cps_variance'),
+    ({'spins': '0'}, 'spins'),
+    ({'commands': '/fix'}, 'commands'),
+    ({'input_backend': 'telepathy'}, 'input_backend'),
+])
+def test_invalid_values_name_their_field(config, field):
+    with pytest.raises(SettingsError) as error:
+        Settings.from_config(config)
+    assert error.value.field == field
+    assert str(error.value).startswith(f"{field}: ")
+
+
+def test_settings_error_is_a_value_error():
+    assert issubclass(SettingsError, ValueError)
+
+
+def test_blank_seed_means_no_seed():
+    assert Settings.from_config({'delay_seed': ''}).delay_seed is None
+
+
+def test_store_swaps_whole_snapshots():
+    store = SettingsStore()
+    first = store.current
+    store.publish(Settings.from_config({'feed': 'true'}))
+    assert store.version == 1
+    assert store.current.feed and not first.feed
+
+
+def test_walk_follows_settings_published_mid_run():
+    clock = SimulatedClock()
+    runner = FeatureRunner(RecordingBackend(clock=clock.now), seed=1)
+    runner.scheduler = Scheduler(clock)
+    settings = Settings.from_config({'min_delay': '1000', 'max_delay': '1000', 'walk_min': '1',
+                                     'walk_max': '1', 'walk_duration_min': '200',
+                                     'walk_duration_max': '200'})
+    runner.settings.publish(settings)
+    runner.schedule_features(settings)
+
+    def publish_at(seconds, **changes):
+        yield seconds
+        runner.publish_settings(dataclasses.replace(runner.settings.current, **changes))
+
+    runner.scheduler.add("walk on", publish_at(5, walk=True))
+    runner.scheduler.add("unrelated change", publish_at(6.1, feed=True))
+    runner.scheduler.add("walk off", publish_at(10, walk=False))
+    runner.scheduler.run(until_ns=20 * S)
+    # Waking the task for another setting neither starts nor shortens a step
+    presses = [timestamp / S for timestamp in runner.backend.timestamps('press')]
+    releases = [timestamp / S for timestamp in runner.backend.timestamps('release')]
+    assert presses == pytest.approx([6.0, 6.3, 7.6, 7.9, 9.2, 9.5])
+    assert releases == pytest.approx([timestamp + 0.2 for timestamp in presses])
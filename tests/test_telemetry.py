@@ -0,0 +1,66 @@
+import pytest
+
+from telemetry import BUCKET_COUNT, LogHistogram, Telemetry, bucket_index, bucket_value
+
+MS = 1_000_000
+
+
+def test_small_values_have_their_own_bucket():
+    for value in range(128):
+        assert bucket_index(value) == value
+        assert bucket_value(value) == value
+
+
+@pytest.mark.parametrize("value", [128, 129, 255, 256, 1000, 4095, 4096, 12_345_678, 2 ** 39 + 7])
+def test_bucket_bounds_hold_the_value(value):
+    index = bucket_index(value)
+    assert bucket_value(index) <= value < bucket_value(index + 1)
+    assert (value - bucket_value(index)) / value < 1 / 64
+
+
+def test_buckets_are_contiguous_and_increasing():
+    values = [bucket_value(index) for index in range(BUCKET_COUNT)]
+    assert values == sorted(set(values))
+    for index, value in enumerate(values):
+        assert bucket_index(value) == index
+        if index:
+            assert bucket_index(value - 1) == index - 1
+
+
+def test_out_of_range_values_are_clamped():
+    assert bucket_index(-5) == 0
+    assert bucket_index(2 ** 50) == BUCKET_COUNT - 1
+
+
+def test_percentiles():
+    histogram = LogHistogram()
+    for value in range(1, 1001):
+        histogram.record(value * 1000)
+    p50, p99, p100 = histogram.percentiles((50, 99, 100))
+    assert p50 == pytest.approx(500_000, rel=1 / 64)
+    assert p99 == pytest.approx(990_000, rel=1 / 64)
+    assert p100 <= histogram.max_value == 1_000_000
+    assert LogHistogram().percentiles((50, 99)) == [None, None]
+
+
+def test_percentiles_merge_another_histogram():
+    low, high = LogHistogram(), LogHistogram()
+    for _ in range(90):
+        low.record(10)
+    for _ in range(10):
+        high.record(100)
+    assert low.percentiles((50, 95), high) == [10, 100]
+    assert low.percentiles((95,)) == [10]
+
+
+def test_telemetry_summary_counts_early_clicks_as_on_time():
+    telemetry = Telemetry()
+    telemetry.record_click(10 * MS, 12 * MS, 50_000)
+    telemetry.record_click(20 * MS, 19 * MS, 50_000)
+    summary = telemetry.summary()
+    assert summary['clicks'] == 2
+    assert summary['lateness_max_ns'] == 2 * MS
+    assert summary['lateness_p50_ns'] == 0
+    assert telemetry.recent_samples()[1] == (20 * MS, 19 * MS, -MS, 50_000)
+    telemetry.reset()
+    assert telemetry.summary()['clicks'] == 0
@@ -0,0 +1,151 @@
+import threading
+import time
+
+# Constants
+DEFAULT_SPIN_BUDGET_US = 2000  # Busy-wait the last 2 ms before a deadline
+MAX_CATCHUP_INTERVALS = 1  # Resync instead of bursting after a stall longer than this
+SLACK_SAMPLES = 64  # most recent sleep overshoots kept for tuning the spin budget
+CALIBRATION_SAMPLES = 20  # short sleeps timed by calibrate()
+CALIBRATION_SLEEP = 0.001  # seconds per calibration sleep
+SPIN_MARGIN = 1.5  # spin budget as a multiple of the p99 sleep overshoot
+MIN_SPIN_BUDGET_US = 200
+MAX_SPIN_BUDGET_US = 20000
+RETUNE_INTERVAL = 5.0  # seconds between spin budget retunes once tuning is on
+
+
+class SleepSlack:
+    """How far recent sleeps overran what they asked for, in ns
+
+    A fixed ring of the last SLACK_SAMPLES overshoots, written only by the
+    thread that sleeps.
+    """
+
+    def __init__(self, size=SLACK_SAMPLES):
+        self.samples = [0] * size
+        self.count = 0
+
+    def record(self, overshoot_ns):
+        self.samples[self.count % len(self.samples)] = overshoot_ns
+        self.count += 1
+
+    def percentile(self, q):
+        """Overshoot at percentile q of the kept samples, None before any sleep"""
+        kept = sorted(self.samples[:min(self.count, len(self.samples))])
+        if not kept:
+            return None
+        return kept[max(1, -(-len(kept) * q // 100)) - 1]
+
+
+def wait_until(deadline_ns, spin_budget_ns=DEFAULT_SPIN_BUDGET_US * 1000, wake=None, slack=None):
+    """Sleep until shortly before the deadline, then spin for the remainder
+
+    When wake is a threading.Event, setting it ends the wait early and
+    None is returned instead of the lateness. slack, a SleepSlack,
+    records how far the sleep overran its target.
+    """
+    remaining = deadline_ns - time.perf_counter_ns()
+    if remaining > spin_budget_ns:
+        timeout = (remaining - spin_budget_ns) / 1e9
+        if wake is None:
+            time.sleep(timeout)
+        elif wake.wait(timeout):
+            return None
+        if slack is not None:
+            slack.record(max(0, time.perf_counter_ns() - (deadline_ns - spin_budget_ns)))
+    if wake is None:
+        while time.perf_counter_ns() < deadline_ns:
+            pass
+    else:
+        while time.perf_counter_ns() < deadline_ns:
+            if wake.is_set():
+                return None
+    return time.perf_counter_ns() - deadline_ns
+
+
+class MonotonicClock:
+    """Real time on the perf_counter_ns timeline with hybrid sleep-then-spin waits
+
+    interrupt() wakes a wait in progress from any thread, so a stop or a
+    newly submitted task never has to sit out the rest of a long sleep.
+    Every sleep's overshoot goes into slack. Once calibrate() or
+    start_tuning() has been called, the clock retunes its own spin budget
+    from that slack every RETUNE_INTERVAL, so it spins just long enough to
+    cover this machine's timer slack whoever is waiting on it.
+    """
+
+    def __init__(self, spin_budget_us=DEFAULT_SPIN_BUDGET_US):
+        self.spin_budget_ns = int(spin_budget_us * 1000)
+        self.slack = SleepSlack()
+        self.tuning = False
+        self._retuned_ns = 0
+        self._wake = threading.Event()
+
+    def now(self):
+        return time.perf_counter_ns()
+
+    def wait_until(self, deadline_ns):
+        """Block until the deadline and return how late we woke up in ns, or None if interrupted"""
+        lateness = wait_until(deadline_ns, self.spin_budget_ns, self._wake, self.slack)
+        if self.tuning and deadline_ns - self._retuned_ns >= RETUNE_INTERVAL * 1e9:
+            self.tune_spin_budget()
+        if lateness is None:
+            # Cleared only once consumed, so an interrupt just before the wait is not lost
+            self._wake.clear()
+        return lateness
+
+    def interrupt(self):
+        """End the current or next wait early"""
+        self._wake.set()
+
+    def calibrate(self, samples=CALIBRATION_SAMPLES):
+        """Time a burst of short sleeps into slack, tune the spin budget and keep tuning
+
+        Blocks for about samples milliseconds, so call it once before the
+        scheduler using this clock starts running.
+        """
+        for _ in range(samples):
+            start = time.perf_counter_ns()
+            time.sleep(CALIBRATION_SLEEP)
+            self.slack.record(max(0, time.perf_counter_ns() - start - int(CALIBRATION_SLEEP * 1e9)))
+        self.tuning = True
+        return self.tune_spin_budget()
+
+    def start_tuning(self):
+        """Retune from the slack of ordinary waits from now on, without a calibration burst"""
+        self.tuning = True
+
+    def tune_spin_budget(self):
+        """Set the spin budget to cover the p99 recent sleep overshoot, returning it in ns"""
+        self._retuned_ns = self.now()
+        overshoot = self.slack.percentile(99)
+        if overshoot is not None:
+            budget = min(max(overshoot * SPIN_MARGIN, MIN_SPIN_BUDGET_US * 1000), MAX_SPIN_BUDGET_US * 1000)
+            self.spin_budget_ns = int(budget)
+        return self.spin_budget_ns
+
+
+class SimulatedClock:
+    """Virtual time that jumps straight to each deadline, for faster than real time runs"""
+
+    def __init__(self, start_ns=0):
+        self.time_ns = start_ns
+
+    def now(self):
+        return self.time_ns
+
+    def wait_until(self, deadline_ns):
+        if deadline_ns > self.time_ns:
+            self.time_ns = deadline_ns
+        return self.time_ns - deadline_ns
+
+    def interrupt(self):
+        pass  # Waits never block
+
+    def calibrate(self, samples=CALIBRATION_SAMPLES):
+        return 0  # Simulated waits have no slack
+
+    def start_tuning(self):
+        pass
+
+    def tune_spin_budget(self):
+        return 0
@@ -0,0 +1,73 @@
+import functools
+import math
+
+# Constants
+SHAPES = ("circle", "ellipse", "figure-eight", "square")
+ELLIPSE_ASPECT = 0.5  # Vertical radius as a fraction of the horizontal one
+
+
+def shape_point(shape, radius, t):
+    """Point on a shape for a parameter t in [0, 1)"""
+    angle = 2 * math.pi * t
+    if shape == "circle":
+        return radius * math.cos(angle), radius * math.sin(angle)
+    if shape == "ellipse":
+        return radius * math.cos(angle), radius * ELLIPSE_ASPECT * math.sin(angle)
+    if shape == "figure-eight":
+        return radius * math.sin(angle), radius * math.sin(angle) * math.cos(angle)
+    if shape == "square":
+        # Walk the perimeter clockwise starting from the right edge midpoint
+        side = (t * 4 + 0.5) % 4
+        edge, along = int(side), side - int(side)
+        offset = radius * (2 * along - 1)
+        return ((radius, offset), (-offset, radius), (-radius, -offset), (offset, -radius))[edge]
+    raise ValueError(f"Unknown movement shape: {shape}")
+
+
+@functools.lru_cache(maxsize=32)
+def offset_table(shape, radius, steps):
+    """Integer (dx, dy) offsets for one loop of a shape, cached by parameters"""
+    if radius < 0 or steps < 1:
+        raise ValueError("Radius must be >= 0 and steps >= 1")
+    points = []
+    for i in range(steps):
+        x, y = shape_point(shape, radius, i / steps)
+        points.append((round(x), round(y)))
+    return tuple(points)
+
+
+class Trajectory:
+    """Steps the cursor around a precomputed shape, drifting after a number of loops"""
+
+    def __init__(self, origin, shape="circle", radius=5, steps=24,
+                 spins_before_drift=10, drift_pixels=2):
+        self.table = offset_table(shape, radius, steps)
+        self.center_x = int(round(origin[0]))
+        self.center_y = int(round(origin[1]))
+        self.spins_before_drift = spins_before_drift
+        self.drift_pixels = drift_pixels
+        self.index = 0
+        self.spin_count = 0
+        self.last_position = None
+
+    def next_position(self):
+        """Return the next absolute position and advance along the table"""
+        dx, dy = self.table[self.index]
+        position = (self.center_x + dx, self.center_y + dy)
+        self.index += 1
+        if self.index == len(self.table):
+            self.index = 0
+            self.spin_count += 1
+            if self.spin_count >= self.spins_before_drift:
+                self.center_x += self.drift_pixels
+                self.center_y += self.drift_pixels
+                self.spin_count = 0
+        return position
+
+    def step(self, move):
+        """Advance one point, calling move(position) only when the pixel changes"""
+        position = self.next_position()
+        if position != self.last_position:
+            move(position)
+            self.last_position = position
+        return position
@@ -0,0 +1,118 @@
+import os
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # Windows has no getrusage, only CPU time is measured there
+    resource = None
+
+# Constants
+ACTIVE_STATES = ("running", "paused")
+
+
+def process_counters():
+    """(voluntary context switches or None, CPU ns) for the whole process
+
+    A thread that blocks and is woken again makes one voluntary context
+    switch, so the count is the number of wakeups across every thread.
+    """
+    if resource is None:
+        return None, time.process_time_ns()
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_nvcsw, time.process_time_ns()
+
+
+def thread_wakeups():
+    """Voluntary context switches per thread name, empty where /proc is unavailable"""
+    names = {thread.native_id: thread.name for thread in threading.enumerate()}
+    counts = {}
+    try:
+        tids = os.listdir('/proc/self/task')
+    except OSError:
+        return counts
+    for tid in tids:
+        try:
+            with open(f'/proc/self/task/{tid}/status') as f:
+                for line in f:
+                    if line.startswith('voluntary_ctxt_switches:'):
+                        name = names.get(int(tid), f"tid {tid}")
+                        counts[name] = counts.get(name, 0) + int(line.split()[1])
+                        break
+        except OSError:
+            continue  # The thread exited while we were reading
+    return counts
+
+
+class WakeupMeter:
+    """Wakeups per second and CPU time per hour, split into idle and active time
+
+    enter(state) closes the current stretch and charges its wakeups and
+    CPU time to idle or active, so the meter only does work when the
+    engine changes state and adds no wakeups of its own. attach() hooks
+    it to an engine's state_listeners; report() sums both states.
+    Threads that exit during a stretch drop out of the per-thread counts,
+    the process totals still include them.
+    """
+
+    def __init__(self):
+        self.totals = {'idle': [0, 0, 0], 'active': [0, 0, 0]}  # elapsed ns, wakeups, CPU ns
+        self.thread_totals = {'idle': {}, 'active': {}}
+        self.state = 'idle'
+        self._mark = self._sample()
+
+    def _sample(self):
+        wakeups, cpu_ns = process_counters()
+        return time.perf_counter_ns(), wakeups, cpu_ns, thread_wakeups()
+
+    def attach(self, engine):
+        """Follow engine's state, counting from now so imports and setup are left out"""
+        engine.state_listeners.append(self.enter)
+        self._mark = self._sample()
+        return self
+
+    def enter(self, state):
+        """Charge everything since the last change to the previous state"""
+        self._close()
+        self.state = 'active' if state in ACTIVE_STATES else 'idle'
+
+    def _close(self):
+        mark = self._sample()
+        totals = self.totals[self.state]
+        totals[0] += mark[0] - self._mark[0]
+        if mark[1] is not None:
+            totals[1] += mark[1] - self._mark[1]
+        totals[2] += mark[2] - self._mark[2]
+        threads = self.thread_totals[self.state]
+        for name, count in mark[3].items():
+            threads[name] = threads.get(name, 0) + count - self._mark[3].get(name, 0)
+        self._mark = mark
+
+    def report(self):
+        """Per state seconds, wakeups per second, CPU seconds per hour and the busiest threads"""
+        self._close()
+        report = {}
+        for state, (elapsed_ns, wakeups, cpu_ns) in self.totals.items():
+            if not elapsed_ns:
+                continue
+            seconds = elapsed_ns / 1e9
+            report[state] = {
+                'seconds': seconds,
+                'wakeups_per_s': wakeups / seconds if resource is not None else None,
+                'cpu_s_per_hour': cpu_ns / 1e9 / seconds * 3600,
+                'threads': {name: count / seconds
+                            for name, count in sorted(self.thread_totals[state].items(),
+                                                      key=lambda item: -item[1]) if count},
+            }
+        return report
+
+    def format_report(self):
+        lines = ["Wakeup measurement:"]
+        for state, values in self.report().items():
+            wakeups = values['wakeups_per_s']
+            wakeup_text = f"{wakeups:.1f} wakeups/s" if wakeups is not None else "wakeups n/a"
+            lines.append(f"  {state}: {values['seconds']:.1f} s, {wakeup_text}, "
+                         f"{values['cpu_s_per_hour']:.2f} CPU s/hour")
+            for name, rate in values['threads'].items():
+                lines.append(f"    {name}: {rate:.1f}/s")
+        return '\n'.join(lines)